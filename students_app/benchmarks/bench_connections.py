@@ -0,0 +1,105 @@
+"""
+Бенчмарк накладных расходов на соединение в методах доступа к базе
+
+Сравнивает время одного вызова при открытии соединения на каждый вызов
+(прежний код StudentDB, Database и QuestionsDB) и при соединении потока из
+ConnectionManager. Измеряется чтение по первичному ключу и запись одной
+строки с фиксацией.
+
+Запуск: python -m benchmarks.bench_connections [--calls 5000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Callable
+
+from utils.connection_manager import ConnectionManager
+
+SELECT = "SELECT first_name, last_name FROM students WHERE id = ?"
+INSERT = "INSERT INTO visits (student_id, points) VALUES (?, ?)"
+
+
+def prepare(db_path: str) -> None:
+    """Таблицы и студенты для запросов"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE students (id INTEGER PRIMARY KEY, first_name TEXT, last_name TEXT)"
+    )
+    conn.execute("CREATE TABLE visits (student_id INTEGER, points INTEGER)")
+    conn.executemany(
+        "INSERT INTO students VALUES (?, ?, ?)",
+        ((i, f"Имя {i}", f"Фамилия {i}") for i in range(1, 1001)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def per_call_read(db_path: str, i: int) -> None:
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(SELECT, (i % 1000 + 1,)).fetchone()
+    finally:
+        conn.close()
+
+
+def per_call_write(db_path: str, i: int) -> None:
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(INSERT, (i, 1))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def measure(calls: int, func: Callable[[int], None]) -> float:
+    """Среднее время вызова в микросекундах"""
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        before_path = os.path.join(tmp_dir, "before.db")
+        after_path = os.path.join(tmp_dir, "after.db")
+        prepare(before_path)
+        prepare(after_path)
+        manager = ConnectionManager(after_path)
+
+        def managed_read(i: int) -> None:
+            manager.get().execute(SELECT, (i % 1000 + 1,)).fetchone()
+
+        def managed_write(i: int) -> None:
+            with manager.get() as conn:
+                conn.execute(INSERT, (i, 1))
+
+        rows = [
+            (
+                "чтение",
+                measure(args.calls, lambda i: per_call_read(before_path, i)),
+                measure(args.calls, managed_read),
+            ),
+            (
+                "запись",
+                measure(args.calls, lambda i: per_call_write(before_path, i)),
+                measure(args.calls, managed_write),
+            ),
+        ]
+        manager.close()
+
+    print(f"Вызовов: {args.calls}")
+    print(f"{'':8}{'соединение на вызов':>22}{'соединение потока':>20}")
+    for name, before, after in rows:
+        print(f"{name:8}{before:>19.1f} мкс{after:>17.1f} мкс  x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
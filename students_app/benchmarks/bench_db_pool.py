@@ -0,0 +1,75 @@
+"""
+Бенчмарк параллельного сохранения результатов тестов
+
+Сравнивает пропускную способность save_test_result для одного общего
+соединения (все вызовы выполняются в потоке, создавшем соединение) и для
+пула соединений с журналом WAL.
+
+Запуск: python -m benchmarks.bench_db_pool [--threads 30] [--results 20] [--pool-size 8]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from database.db_manager import DatabaseManager
+
+
+def run(db_path: str, threads: int, results: int, pool_size: int) -> float:
+    """Сохранение threads * results результатов, возвращает операций в секунду"""
+    if pool_size:
+        db = DatabaseManager(db_path, pool_size=pool_size)
+        executor = ThreadPoolExecutor(max_workers=threads)
+    else:
+        # Одно соединение привязано к своему потоку, поэтому все вызовы
+        # выстраиваются в очередь к нему, как сейчас к потоку интерфейса
+        executor = ThreadPoolExecutor(max_workers=1)
+        db = executor.submit(DatabaseManager, db_path).result()
+
+    for station in range(threads):
+        executor.submit(db.add_user, f"station{station}", "pwd", "ИУ7-51Б").result()
+
+    started = time.perf_counter()
+    futures = [
+        executor.submit(db.save_test_result, station + 1, 1, 80, 100, 600)
+        for station in range(threads)
+        for _ in range(results)
+    ]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started
+
+    executor.submit(db.close).result()
+    executor.shutdown()
+    return threads * results / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=30)
+    parser.add_argument("--results", type=int, default=20)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    logger.disable("database")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        single = run(os.path.join(tmp_dir, "single.db"), args.threads, args.results, 0)
+        # Соединение берется из пула только на время вызова, поэтому
+        # потоков может быть больше, чем соединений
+        pooled = run(
+            os.path.join(tmp_dir, "pooled.db"),
+            args.threads,
+            args.results,
+            args.pool_size,
+        )
+
+    print(f"Одно соединение: {single:10.1f} сохранений/с")
+    print(f"Пул соединений:  {pooled:10.1f} сохранений/с ({pooled / single:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Бенчмарк перепроверки всех попыток теста
+
+Создает тест из вопросов всех четырех типов и попытки со случайными
+ответами, затем измеряет regrade_test и отдельно векторную проверку
+ответов (AnswerKey.grade) без обращений к базе.
+
+Запуск: python -m benchmarks.bench_grading [--attempts 5000] [--questions 40]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models import grading
+from models.base import Base
+from models.repository import TestRepository
+from models.test import UserAnswer, ordinals_to_mask
+
+TYPES = ("single_choice", "multiple_choice", "text", "numeric")
+
+
+def populate(db_path: str, attempts: int, questions: int) -> None:
+    """Заполнение базы тестом, попытками и ответами"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO user (id, username, password_hash, full_name, role, "
+        "created_at, updated_at) VALUES (1, 'student', 'x', 'Студент', 'STUDENT', ?, ?)",
+        (now, now),
+    )
+    conn.execute(
+        "INSERT INTO test (id, title, duration_minutes, passing_score, created_at, "
+        "updated_at) VALUES (1, 'Бенчмарк', 60, 60, ?, ?)",
+        (now, now),
+    )
+    option_id = 0
+    options = {}
+    for number in range(1, questions + 1):
+        kind = TYPES[number % 4]
+        conn.execute(
+            "INSERT INTO question (id, test_id, text, type, points, "
+            "correct_numeric_answer, numeric_tolerance, created_at, updated_at) "
+            "VALUES (?, 1, ?, ?, 1, ?, ?, ?, ?)",
+            (
+                number,
+                f"Вопрос {number}",
+                kind.upper(),
+                10.0 if kind == "numeric" else None,
+                0.5 if kind == "numeric" else None,
+                now,
+                now,
+            ),
+        )
+        options[number] = []
+        for index in range(4 if kind != "numeric" else 0):
+            option_id += 1
+            options[number].append(option_id)
+            conn.execute(
+                "INSERT INTO questionoption (id, question_id, text, is_correct, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (option_id, number, f"ответ {index}", index == 0, now, now),
+            )
+
+    conn.executemany(
+        "INSERT INTO testattempt (id, test_id, user_id, start_time, created_at, "
+        "updated_at) VALUES (?, 1, 1, ?, ?, ?)",
+        ((attempt, now, now, now) for attempt in range(1, attempts + 1)),
+    )
+
+    def answers():
+        for attempt in range(1, attempts + 1):
+            for number in range(1, questions + 1):
+                kind = TYPES[number % 4]
+                selected = text = numeric = None
+                if kind in ("single_choice", "multiple_choice"):
+                    selected = ordinals_to_mask(
+                        rng.sample(range(len(options[number])), rng.randint(1, 2))
+                    )
+                elif kind == "text":
+                    text = f"ответ {rng.randint(0, 3)}"
+                else:
+                    numeric = rng.uniform(9, 11)
+                yield attempt, number, selected, text, numeric, now, now
+
+    conn.executemany(
+        "INSERT INTO useranswer (attempt_id, question_id, selected_options, "
+        "text_answer, numeric_answer, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        answers(),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def measure(db_path: str) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            started = time.perf_counter()
+            regraded = await grading.regrade_test(session, 1)
+            elapsed = time.perf_counter() - started
+            print(f"regrade_test: {regraded} попыток за {elapsed:.2f} с")
+
+            snapshot = await TestRepository(session).get_snapshot(1)
+            key = grading.AnswerKey(snapshot)
+            rows = [
+                grading.AnswerRow(*row)
+                for row in (
+                    await session.execute(
+                        select(
+                            UserAnswer.id,
+                            UserAnswer.attempt_id,
+                            UserAnswer.question_id,
+                            UserAnswer.selected_options,
+                            UserAnswer.text_answer,
+                            UserAnswer.numeric_answer,
+                        )
+                    )
+                )
+            ]
+            started = time.perf_counter()
+            key.grade(rows)
+            elapsed = time.perf_counter() - started
+            print(f"AnswerKey.grade: {len(rows)} ответов за {elapsed * 1000:.0f} мс")
+    finally:
+        await engine.dispose()
+
+
+async def create_schema(db_path: str) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--attempts", type=int, default=5000)
+    parser.add_argument("--questions", type=int, default=40)
+    args = parser.parse_args()
+    logger.disable("models")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "grading.db")
+        asyncio.run(create_schema(db_path))
+        populate(db_path, args.attempts, args.questions)
+        print(
+            f"Попыток: {args.attempts}, вопросов: {args.questions}, "
+            f"ответов: {args.attempts * args.questions}"
+        )
+        asyncio.run(measure(db_path))
+
+
+if __name__ == "__main__":
+    main()
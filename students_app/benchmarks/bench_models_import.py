@@ -0,0 +1,82 @@
+"""
+Бенчмарк времени импорта пакета models
+
+Запускает отдельные процессы с python -X importtime и сравнивает импорт
+models с прежним поведением, когда при импорте создавался движок с echo=True
+и выполнялся Base.metadata.create_all. Прежнее поведение воспроизводится
+вызовами configure(echo=True) и bootstrap_schema(force=True) сразу после
+импорта. Отдельно показан первый запрос сессии к базе с актуальной схемой:
+bootstrap_schema в нем сводится к чтению PRAGMA user_version.
+
+Запуск: python -m benchmarks.bench_models_import [--runs 7]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import models (лениво)": "import models",
+    "прежний импорт: echo + create_all": (
+        "import models; models.configure(echo=True); "
+        "models.bootstrap_schema(force=True)"
+    ),
+    "import models + первая сессия": "import models; models.SessionLocal().close()",
+}
+
+
+def parse_importtime(stderr: str, module: str) -> int:
+    """Суммарное время импорта модуля в микросекундах из вывода -X importtime"""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:") :].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise ValueError(f"Модуль {module} не найден в выводе importtime")
+
+
+def run_once(code: str, work_dir: str) -> tuple:
+    """Время импорта models и полное время выполнения фрагмента в мс"""
+    wrapped = (
+        "import time; _started = time.perf_counter(); "
+        f"{code}; "
+        "print((time.perf_counter() - _started) * 1000)"
+    )
+    env = dict(os.environ, PYTHONPATH=APP_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", wrapped],
+        cwd=work_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_ms = float(result.stdout.strip().splitlines()[-1])
+    return parse_importtime(result.stderr, "models") / 1000, total_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Первый запуск создает questions.db, дальше схема уже актуальна
+        run_once(SCENARIOS["import models + первая сессия"], work_dir)
+
+        print(f"{'сценарий':<36} {'импорт models, мс':>18} {'всего, мс':>10}")
+        for name, code in SCENARIOS.items():
+            runs = [run_once(code, work_dir) for _ in range(args.runs)]
+            import_ms = statistics.median(run[0] for run in runs)
+            total_ms = statistics.median(run[1] for run in runs)
+            print(f"{name:<36} {import_ms:>18.1f} {total_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
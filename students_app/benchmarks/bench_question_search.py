@@ -0,0 +1,78 @@
+"""
+Бенчмарк поиска по банку вопросов
+
+Заполняет questions.db синтетическими вопросами из случайных слов и
+сравнивает QuestionsDB.search_questions (FTS5) с полным просмотром через
+LIKE на одних и тех же запросах.
+
+Запуск: python -m benchmarks.bench_question_search [--questions 50000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from loguru import logger
+
+from utils import question_bank
+from utils.questions_db import QuestionsDB
+
+SYLLABLES = "ка ра то ме ни су ло ве де па ти мо ры за ша бу".split()
+
+
+def populate(db: QuestionsDB, count: int, rng: random.Random) -> list:
+    """Вопросы из случайных слов; возвращает словарь слов"""
+    words = ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(5000)]
+    rows = [
+        (
+            1 + i % 10,
+            " ".join(rng.choices(words, k=rng.randint(8, 20))),
+            " ".join(rng.choices(words, k=2)),
+        )
+        for i in range(count)
+    ]
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO questions (lab_id, question_text, correct_answer) "
+            "VALUES (?, ?, ?)",
+            rows,
+        )
+    return words
+
+
+def measure(func, queries) -> float:
+    """Среднее время запроса в миллисекундах"""
+    started = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+    logger.disable("utils")
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = QuestionsDB(os.path.join(tmp_dir, "questions.db"))
+        words = populate(db, args.questions, rng)
+        queries = [" ".join(rng.sample(words, 2)) for _ in range(args.queries)]
+
+        fts = measure(lambda q: db.search_questions(q), queries)
+        db.fts_enabled = False
+        like = measure(lambda q: db.search_questions(q), queries)
+        db.close()
+        question_bank.clear_caches()
+
+    print(f"Вопросов: {args.questions}, запросов: {args.queries}")
+    print(f"FTS5: {fts:.2f} мс на запрос")
+    print(f"LIKE: {like:.2f} мс на запрос (x{like / fts:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Бенчмарк памяти на строку результата
+
+Заполняет test_results синтетическими результатами и сравнивает память,
+занятую списком словарей (прежний формат get_test_results), со списком
+записей TestResultRecord.
+
+Запуск: python -m benchmarks.bench_records [--rows 1000000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from database.db_manager import DatabaseManager
+
+QUERY = """
+    SELECT
+        u.username,
+        u.group_number,
+        tr.lab_number,
+        tr.score,
+        tr.max_score,
+        tr.time_spent,
+        tr.completed_at,
+        tr.id
+    FROM test_results tr
+    JOIN users u ON tr.user_id = u.id
+    WHERE tr.completed_at BETWEEN ? AND ?
+    ORDER BY tr.completed_at DESC
+"""
+
+PERIOD = ("2024-01-01", "2025-01-01")
+
+
+def populate(db: DatabaseManager, rows: int, students: int = 3000) -> None:
+    """Заполнение базы пользователями и результатами тестов за год"""
+    conn = db.conn
+    conn.executemany(
+        "INSERT INTO users (username, password, group_number) VALUES (?, 'pwd', ?)",
+        [(f"student{i}", f"ИУ7-{50 + i % 30}Б") for i in range(students)],
+    )
+    start = datetime(2024, 1, 1)
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO test_results (user_id, lab_number, score, max_score, "
+        "time_spent, completed_at) VALUES (?, ?, ?, 100, ?, ?)",
+        (
+            (
+                rng.randint(1, students),
+                rng.randint(1, 8),
+                rng.randint(0, 100),
+                rng.randint(60, 1200),
+                (start + timedelta(seconds=rng.randint(0, 365 * 86400))).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            )
+            for _ in range(rows)
+        ),
+    )
+    conn.commit()
+
+
+def as_dicts(db: DatabaseManager) -> list:
+    """Прежнее представление: словарь с ключами-строками на каждую строку"""
+    return [
+        {
+            "username": row[0],
+            "group_number": row[1],
+            "lab_number": row[2],
+            "score": row[3],
+            "max_score": row[4],
+            "time_spent": row[5],
+            "completed_at": row[6],
+            "id": row[7],
+        }
+        for row in db.conn.execute(QUERY, PERIOD)
+    ]
+
+
+def as_records(db: DatabaseManager) -> list:
+    """Записи TestResultRecord, как их возвращает get_test_results"""
+    return db.get_test_results(*PERIOD)
+
+
+def measure(load, db: DatabaseManager) -> tuple:
+    """Строк, время загрузки в секундах и память списка в байтах"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = load(db)
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(rows)
+    del rows
+    return count, elapsed, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logger.disable("database")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "records.db"))
+        populate(db, args.rows)
+        dicts = measure(as_dicts, db)
+        records = measure(as_records, db)
+        db.close()
+
+    print(f"Строк в test_results: {args.rows}")
+    print("Формат           строк   время, с   всего, МБ   байт/строку")
+    for name, (count, elapsed, size) in (("dict", dicts), ("NamedTuple", records)):
+        print(
+            f"{name:<12} {count:>9} {elapsed:>10.2f} {size / 1024 / 1024:>11.1f}"
+            f" {size / max(count, 1):>13.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
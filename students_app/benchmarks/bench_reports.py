@@ -0,0 +1,97 @@
+"""
+Бенчмарк отчетов за месяц и за семестр
+
+Заполняет базу синтетическими результатами и сравнивает прежний фильтр
+strftime(...) = ? с диапазоном по submission_date, который использует
+покрывающий индекс.
+
+Запуск: python -m benchmarks.bench_reports [--rows 500000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from database.db_manager import DatabaseManager
+
+LEGACY_MONTHLY_QUERY = """
+    SELECT u.username, u.group_number, l.title, r.points, r.status, r.submission_date
+    FROM results r
+    JOIN users u ON r.user_id = u.id
+    JOIN labs l ON r.lab_id = l.id
+    WHERE strftime('%m', r.submission_date) = ?
+    AND strftime('%Y', r.submission_date) = ?
+    AND u.role = 'student'
+    ORDER BY u.group_number, u.username, l.title
+"""
+
+
+def populate(db: DatabaseManager, rows: int, students: int = 3000) -> None:
+    """Заполнение базы пользователями, работами и результатами за год"""
+    conn = db.conn
+    conn.executemany(
+        "INSERT INTO users (username, password, group_number) VALUES (?, 'pwd', ?)",
+        [(f"student{i}", f"ИУ7-{50 + i % 30}Б") for i in range(students)],
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO labs (id, title, max_score) VALUES (?, ?, 100)",
+        [(lab, f"Лабораторная работа №{lab}") for lab in range(1, 9)],
+    )
+    start = datetime(2024, 1, 1)
+    rng = random.Random(42)
+    conn.executemany(
+        "INSERT INTO results (user_id, lab_id, points, status, submission_date) "
+        "VALUES (?, ?, ?, 'completed', ?)",
+        (
+            (
+                rng.randint(1, students),
+                rng.randint(1, 8),
+                rng.randint(0, 100),
+                (start + timedelta(seconds=rng.randint(0, 365 * 86400))).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            )
+            for _ in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def timed(func, *args) -> float:
+    """Время выполнения в миллисекундах"""
+    started = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    logger.disable("database")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "reports.db"))
+        populate(db, args.rows)
+
+        legacy = timed(
+            lambda: db.conn.execute(LEGACY_MONTHLY_QUERY, ("12", "2024")).fetchall()
+        )
+        monthly = timed(db.get_monthly_report, 12, 2024)
+        term = timed(db.get_results_by_period, "2024-09-01", "2024-12-31")
+        db.close()
+
+    print(f"Строк в results: {args.rows}")
+    print(f"Месяц, strftime (прежний запрос): {legacy:8.1f} мс")
+    print(f"Месяц, диапазон по индексу:       {monthly:8.1f} мс")
+    print(f"Семестр, все группы:              {term:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Бенчмарк потокового чтения результатов
+
+Сравнивает пиковую память выгрузки за период через get_results_by_period
+(весь список в памяти) и через iter_results_by_period (страницы по ключу
+(submission_date, id)).
+
+Запуск: python -m benchmarks.bench_streaming [--rows 500000] [--batch 500]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from loguru import logger
+
+from benchmarks.bench_reports import populate
+from database.db_manager import DatabaseManager
+
+
+def measure(func) -> tuple:
+    """Время в миллисекундах и пиковая память в мегабайтах"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func()
+    elapsed = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    logger.disable("database")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = DatabaseManager(os.path.join(tmp_dir, "streaming.db"))
+        populate(db, args.rows)
+
+        full = measure(
+            lambda: len(db.get_results_by_period("2024-01-01", "2024-12-31"))
+        )
+        streamed = measure(
+            lambda: sum(
+                1
+                for _ in db.iter_results_by_period(
+                    "2024-01-01", "2024-12-31", args.batch
+                )
+            )
+        )
+        db.close()
+
+    print(f"Строк в results: {args.rows}")
+    print("Способ            строк      мс   пик, МБ")
+    for name, (count, elapsed, peak) in (("список", full), ("итератор", streamed)):
+        print(f"{name:<12} {count:>9} {elapsed:>8.1f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
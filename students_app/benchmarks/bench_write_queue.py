@@ -0,0 +1,75 @@
+"""
+Бенчмарк групповой фиксации результатов тестов
+
+Имитирует конец занятия: threads студентов одновременно сохраняют
+результаты. Сравнивает синхронный save_test_result (транзакция и fsync на
+каждый результат) с очередью отложенной записи в режимах full и normal.
+
+Запуск: python -m benchmarks.bench_write_queue [--threads 30] [--results 20]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from database.db_manager import DatabaseManager
+
+
+def run(db_path: str, threads: int, results: int, durability: str = "") -> tuple:
+    """Сохранение threads * results результатов: сохранений/с и число пакетов"""
+    db = DatabaseManager(db_path, pool_size=threads + 1)
+    for station in range(threads):
+        db.add_user(f"station{station}", "pwd", "ИУ7-51Б")
+    queue = db.start_write_queue(durability=durability) if durability else None
+
+    # С очередью рабочий поток только ставит результат в очередь и сразу
+    # свободен; ожидание фиксации переносится на Future
+    save = db.submit_test_result if queue else db.save_test_result
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(save, station + 1, 1, 80, 100, 600)
+            for station in range(threads)
+            for _ in range(results)
+        ]
+        outcomes = [future.result() for future in futures]
+        if queue:
+            outcomes = [outcome.result() for outcome in outcomes]
+        saved = sum(1 for outcome in outcomes if outcome)
+    elapsed = time.perf_counter() - started
+
+    batches = queue.stats()["batches"] if queue else saved
+    db.close()
+    return saved / elapsed, batches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=30)
+    parser.add_argument("--results", type=int, default=20)
+    args = parser.parse_args()
+
+    logger.disable("database")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, durability in (
+            ("синхронно", ""),
+            ("очередь, full", "full"),
+            ("очередь, normal", "normal"),
+        ):
+            db_path = os.path.join(tmp_dir, f"{durability or 'sync'}.db")
+            rows.append((name, *run(db_path, args.threads, args.results, durability)))
+
+    baseline = rows[0][1]
+    print(f"Результатов: {args.threads * args.results} из {args.threads} потоков")
+    print("Способ             сохранений/с   транзакций   ускорение")
+    for name, rate, batches in rows:
+        print(f"{name:<18} {rate:>12.1f} {batches:>12} {rate / baseline:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
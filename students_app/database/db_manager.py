@@ -1,160 +1,308 @@
 """Модуль для работы с базой данных"""
 
 import sqlite3
-from typing import Any, Dict, List, Optional
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager, nullcontext
+from datetime import date, timedelta
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple, Type
 
 from loguru import logger
 
+from database.migrate import upgrade_database
+from database.records import (
+    LabRecord,
+    LabStatusRecord,
+    MonthlySummaryRecord,
+    ResultRecord,
+    ResultScoreRecord,
+    TestResultRecord,
+    UserRecord,
+    row_factory,
+)
+from database.write_queue import QueueClosedError, WriteBehindQueue
+from utils import db_profiler
+from utils.connection_pool import ConnectionPool
+from utils.db_maintenance import MaintenanceScheduler
+
+# Время ожидания записи результата очередью и ее остановки, в секундах
+QUEUE_WAIT_TIMEOUT = 10.0
+
+# Добавление только что вставленного результата в сводную таблицу за месяц
+ROLLUP_ADD_RESULT_QUERY = """
+    INSERT INTO monthly_results_rollup (
+        year, month, group_number, lab_number,
+        result_count, score_sum, score_min, score_max
+    )
+    SELECT
+        CAST(strftime('%Y', tr.completed_at) AS INTEGER),
+        CAST(strftime('%m', tr.completed_at) AS INTEGER),
+        COALESCE(u.group_number, ''),
+        tr.lab_number,
+        1,
+        tr.score,
+        tr.score,
+        tr.score
+    FROM test_results tr
+    LEFT JOIN users u ON u.id = tr.user_id
+    WHERE tr.id = ?
+    ON CONFLICT (year, month, group_number, lab_number) DO UPDATE SET
+        result_count = result_count + 1,
+        score_sum = score_sum + excluded.score_sum,
+        score_min = MIN(score_min, excluded.score_min),
+        score_max = MAX(score_max, excluded.score_max)
+"""
+
+# Последний результат из results для каждой пары (user_id, lab_id)
+LATEST_LAB_STATUS_QUERY = """
+    SELECT user_id, lab_id, status, points, submission_date
+    FROM (
+        SELECT
+            user_id,
+            lab_id,
+            status,
+            points,
+            submission_date,
+            ROW_NUMBER() OVER (
+                PARTITION BY user_id, lab_id
+                ORDER BY submission_date DESC, id DESC
+            ) AS position
+        FROM results
+        WHERE user_id IS NOT NULL AND lab_id IS NOT NULL
+    )
+    WHERE position = 1
+"""
+
+# Страницы результатов: {key_filter} - нижняя граница по ключу (дата, id)
+TEST_RESULTS_PAGE_QUERY = """
+    SELECT
+        u.username,
+        u.group_number,
+        tr.lab_number,
+        tr.score,
+        tr.max_score,
+        tr.time_spent,
+        tr.completed_at,
+        tr.id
+    FROM test_results tr
+    JOIN users u ON tr.user_id = u.id
+    WHERE tr.completed_at >= ?
+    AND tr.completed_at < ?
+    {key_filter}
+    ORDER BY tr.completed_at {order}, tr.id {order}
+    LIMIT ?
+"""
+
+RESULTS_PAGE_QUERY = """
+    SELECT
+        u.username,
+        u.group_number,
+        l.title,
+        r.points,
+        r.status,
+        r.submission_date,
+        r.id
+    FROM results r
+    JOIN users u ON r.user_id = u.id
+    JOIN labs l ON r.lab_id = l.id
+    WHERE r.submission_date >= ?
+    AND r.submission_date < ?
+    {key_filter}
+    AND u.role = 'student'
+    ORDER BY r.submission_date {order}, r.id {order}
+    LIMIT ?
+"""
+
+# Ключ страницы: (дата, id) последней выданной строки
+PageKey = Tuple[str, int]
+
+
+def _write_test_result(cursor: sqlite3.Cursor, result: Tuple[int, ...]) -> int:
+    """
+    Запись результата теста через курсор вызывающего без фиксации транзакции
+
+    Args:
+        cursor: Курсор открытой транзакции
+        result: (user_id, lab_number, score, max_score, time_spent)
+
+    Returns:
+        id добавленной строки test_results
+    """
+    user_id, lab_number, score, max_score, time_spent = result
+
+    # Сохраняем результат теста
+    cursor.execute(
+        """
+        INSERT INTO test_results (user_id, lab_number, score, max_score, time_spent)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+        (user_id, lab_number, score, max_score, time_spent),
+    )
+    result_id = cursor.lastrowid
+
+    # Учитываем результат в сводной таблице за месяц
+    cursor.execute(ROLLUP_ADD_RESULT_QUERY, (result_id,))
+
+    # Обновляем статус лабораторной работы в user_labs
+    cursor.execute(
+        """
+        UPDATE user_labs
+        SET status = 'completed',
+            grade = ?,
+            submission_date = CURRENT_TIMESTAMP
+        WHERE user_id = ? AND lab_id = ?
+    """,
+        (score, user_id, lab_number),
+    )
+    return result_id
+
+
+def _month_range(month: int, year: int) -> Tuple[str, str]:
+    """Границы месяца в виде полуинтервала [начало месяца, начало следующего)"""
+    start = date(year, month, 1)
+    end = date(year + month // 12, month % 12 + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+def _period_range(start_date: str, end_date: str) -> Tuple[str, str]:
+    """Полуинтервал для периода, заданного датами включительно"""
+    try:
+        # Конец периода - дата без времени, поэтому граница - следующий день
+        end = (date.fromisoformat(end_date) + timedelta(days=1)).isoformat()
+    except ValueError:
+        end = end_date
+    return start_date, end
+
 
 class DatabaseManager:
     """Менеджер базы данных"""
 
-    def __init__(self, db_path: str):
-        """Инициализация менеджера базы данных"""
-        self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
-        self.create_tables()
-        self.initialize_test_data()  # Добавляем инициализацию тестовых данных
-
-    def create_tables(self):
-        """Создание необходимых таблиц"""
-        # Таблица пользователей
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password TEXT NOT NULL,
-                group_number TEXT,
-                role TEXT DEFAULT 'student'
-            )
+    def __init__(self, db_path: str, pool_size: int = 0, busy_timeout: int = 5000):
         """
-        )
+        Инициализация менеджера базы данных
 
-        # Таблица лабораторных работ
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS labs (
-                id INTEGER PRIMARY KEY,
-                title TEXT NOT NULL,
-                description TEXT,
-                max_score INTEGER
-            )
+        Args:
+            db_path: Путь к файлу базы данных
+            pool_size: Размер пула соединений; 0 - одно общее соединение
+            busy_timeout: Время ожидания блокировки в миллисекундах (для пула)
         """
-        )
-
-        # Таблица вопросов
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                lab_id INTEGER,
-                question_number INTEGER,
-                text TEXT,
-                type TEXT,
-                FOREIGN KEY (lab_id) REFERENCES labs (id)
+        self.db_path = db_path
+        self.closed = False
+        self.write_queue: Optional[WriteBehindQueue] = None
+        self.maintenance: Optional[MaintenanceScheduler] = None
+        self.pool: Optional[ConnectionPool] = None
+        self.conn: Optional[sqlite3.Connection] = None
+        self.cursor: Optional[sqlite3.Cursor] = None
+        if pool_size > 0:
+            # Пул: соединение из пула на время вызова, WAL-журнал и ожидание
+            # блокировок
+            self.pool = ConnectionPool(
+                db_path, max_size=pool_size, busy_timeout=busy_timeout
             )
-        """
-        )
+        else:
+            self.conn = db_profiler.connect(db_path)
+            self.cursor = self.conn.cursor()
+        self.create_tables()
+        self.initialize_test_data()  # Добавляем инициализацию тестовых данных
 
-        # Таблица ответов
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS answers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                question_id INTEGER,
-                answer_number INTEGER,
-                text TEXT,
-                is_correct BOOLEAN,
-                FOREIGN KEY (question_id) REFERENCES questions (id)
-            )
-        """
-        )
+    def _connection(self) -> sqlite3.Connection:
+        """Соединение для текущего потока"""
+        if self.pool is not None:
+            return self.pool.connection()
+        return self.conn
 
-        # Таблица результатов тестов
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS test_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                lab_number INTEGER,
-                score INTEGER,
-                max_score INTEGER,
-                time_spent INTEGER,
-                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
+    @contextmanager
+    def _cursor(
+        self, write: bool = False, record: Optional[Type[NamedTuple]] = None
+    ) -> Iterator[sqlite3.Cursor]:
         """
-        )
+        Отдельный курсор на время вызова с фиксацией или откатом транзакции
 
-        # Таблица для пользовательских лабораторных работ
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS user_labs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                lab_id INTEGER,
-                status TEXT,
-                grade INTEGER,
-                submission_date TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (lab_id) REFERENCES labs (id)
-            )
+        Args:
+            write: Курсор для записи (в режиме пула берется блокировка писателя)
+            record: Тип записи, в который курсор превращает строки результата
         """
-        )
+        # Соединение, уже закрепленное за потоком (вложенный вызов или
+        # явный _connection()), остается за ним; иначе оно возвращается в пул
+        # после вызова, и потоков может быть больше, чем соединений
+        pinned = self.pool is None or self.pool.holds_connection()
+        conn = self._connection()
+        use_lock = write and self.pool is not None
+        try:
+            with self.pool.write_lock if use_lock else nullcontext():
+                cursor = conn.cursor()
+                if record is not None:
+                    cursor.row_factory = row_factory(record)
+                changes = conn.total_changes
+                try:
+                    yield cursor
+                    if conn.in_transaction:
+                        conn.commit()
+                    if write and self.maintenance is not None:
+                        self.maintenance.note_writes(conn.total_changes - changes)
+                except Exception:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    raise
+                finally:
+                    cursor.close()
+        finally:
+            if not pinned and not conn.in_transaction:
+                self.pool.release()
 
-        self.conn.commit()
+    def create_tables(self):
+        """Создание и обновление таблиц через миграции схемы"""
+        upgrade_database(self.db_path)
 
     def initialize_test_data(self):
         """Инициализация тестовых данных"""
         try:
-            # Проверяем, есть ли уже лабораторные работы
-            self.cursor.execute("SELECT COUNT(*) FROM labs")
-            count = self.cursor.fetchone()[0]
-
-            if count == 0:
-                # Добавляем тестовую лабораторную работу
-                self.cursor.execute(
-                    """
-                    INSERT INTO labs (id, title, description, max_score)
-                    VALUES (1, 'Изучение базовых конструкций языка Python',
-                           'Изучение основных конструкций языка Python: переменные, типы данных, операторы, функции', 100)
-                """
-                )
-
-                # Добавляем тестовые вопросы
-                questions = [
-                    (1, 1, "Что такое переменная в Python?", "text"),
-                    (1, 2, "Какие основные типы данных есть в Python?", "text"),
-                    (1, 3, "Как объявить функцию в Python?", "text"),
-                ]
-
-                self.cursor.executemany(
-                    """
-                    INSERT INTO questions (lab_id, question_number, text, type)
-                    VALUES (?, ?, ?, ?)
-                """,
-                    questions,
-                )
-
-                # Добавляем тестовые ответы
-                answers = [
-                    (1, 1, "Область памяти для хранения данных", True),
-                    (1, 2, "int, float, str, bool, list, dict, tuple", True),
-                    (1, 3, "def function_name():", True),
-                ]
-
-                self.cursor.executemany(
+            with self._cursor(write=True) as cursor:
+                # Проверяем, есть ли уже лабораторные работы
+                cursor.execute("SELECT COUNT(*) FROM labs")
+                count = cursor.fetchone()[0]
+
+                if count == 0:
+                    # Добавляем тестовую лабораторную работу
+                    cursor.execute(
+                        """
+                        INSERT INTO labs (id, title, description, max_score)
+                        VALUES (1, 'Изучение базовых конструкций языка Python',
+                               'Изучение основных конструкций языка Python: переменные, типы данных, операторы, функции', 100)
                     """
-                    INSERT INTO answers (question_id, answer_number, text, is_correct)
-                    VALUES (?, ?, ?, ?)
-                """,
-                    answers,
-                )
-
-                self.conn.commit()
-                logger.info("Тестовые данные успешно добавлены")
+                    )
+
+                    # Добавляем тестовые вопросы
+                    questions = [
+                        (1, 1, "Что такое переменная в Python?", "text"),
+                        (1, 2, "Какие основные типы данных есть в Python?", "text"),
+                        (1, 3, "Как объявить функцию в Python?", "text"),
+                    ]
+
+                    cursor.executemany(
+                        """
+                        INSERT INTO questions (lab_id, question_number, text, type)
+                        VALUES (?, ?, ?, ?)
+                    """,
+                        questions,
+                    )
+
+                    # Добавляем тестовые ответы
+                    answers = [
+                        (1, 1, "Область памяти для хранения данных", True),
+                        (1, 2, "int, float, str, bool, list, dict, tuple", True),
+                        (1, 3, "def function_name():", True),
+                    ]
+
+                    cursor.executemany(
+                        """
+                        INSERT INTO answers (question_id, answer_number, text, is_correct)
+                        VALUES (?, ?, ?, ?)
+                    """,
+                        answers,
+                    )
+
+                    logger.info("Тестовые данные успешно добавлены")
 
         except Exception as e:
             logger.error(f"Ошибка при инициализации тестовых данных: {e}")
@@ -164,15 +312,15 @@ class DatabaseManager:
     ) -> bool:
         """Добавление нового пользователя"""
         try:
-            self.cursor.execute(
-                """
-                INSERT INTO users (username, password, group_number, role)
-                VALUES (?, ?, ?, ?)
-            """,
-                (username, password, group_number, role),
-            )
-            self.conn.commit()
-            return True
+            with self._cursor(write=True) as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO users (username, password, group_number, role)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    (username, password, group_number, role),
+                )
+                return True
         except sqlite3.IntegrityError:
             logger.error(f"Пользователь {username} уже существует")
             return False
@@ -180,310 +328,573 @@ class DatabaseManager:
             logger.error(f"Ошибка при добавлении пользователя: {e}")
             return False
 
-    def verify_user(self, username: str) -> Optional[Dict[str, Any]]:
+    def verify_user(self, username: str) -> Optional[UserRecord]:
         """Проверка существования пользователя"""
         try:
-            self.cursor.execute(
-                """
-                SELECT id, username, group_number, role
-                FROM users
-                WHERE username = ?
-            """,
-                (username,),
-            )
-            user = self.cursor.fetchone()
-            if user:
-                return {
-                    "id": user[0],
-                    "username": user[1],
-                    "group_number": user[2],
-                    "role": user[3],
-                }
-            return None
+            with self._cursor(record=UserRecord) as cursor:
+                cursor.execute(
+                    """
+                    SELECT id, username, group_number, role
+                    FROM users
+                    WHERE username = ?
+                """,
+                    (username,),
+                )
+                return cursor.fetchone()
         except Exception as e:
             logger.error(f"Ошибка при проверке пользователя: {e}")
             return None
 
-    def get_all_labs(self) -> List[Dict[str, Any]]:
+    def get_all_labs(self) -> List[LabRecord]:
         """Получение списка всех лабораторных работ"""
         try:
-            self.cursor.execute(
+            with self._cursor(record=LabRecord) as cursor:
+                cursor.execute(
+                    """
+                    SELECT id, title, description, max_score
+                    FROM labs
+                    ORDER BY id
                 """
-                SELECT id, title, description, max_score
-                FROM labs
-                ORDER BY id
-            """
-            )
-            labs = self.cursor.fetchall()
-            return [
-                {
-                    "id": lab[0],
-                    "title": lab[1],
-                    "description": lab[2],
-                    "max_score": lab[3],
-                }
-                for lab in labs
-            ]
+                )
+                return cursor.fetchall()
         except Exception as e:
             logger.error(f"Ошибка при получении списка лабораторных работ: {e}")
             return []
 
-    def get_student_info(self, student_id: int) -> Dict[str, Any]:
+    def get_student_info(self, student_id: int) -> Optional[UserRecord]:
         """Получение информации о студенте"""
         try:
-            self.cursor.execute(
-                """
-                SELECT username, group_number
-                FROM users
-                WHERE id = ? AND role = 'student'
-            """,
-                (student_id,),
-            )
-            student = self.cursor.fetchone()
-            if student:
-                return {"name": student[0], "group": student[1]}
-            return {}
+            with self._cursor(record=UserRecord) as cursor:
+                cursor.execute(
+                    """
+                    SELECT id, username, group_number, role
+                    FROM users
+                    WHERE id = ? AND role = 'student'
+                """,
+                    (student_id,),
+                )
+                return cursor.fetchone()
         except Exception as e:
             logger.error(f"Ошибка при получении информации о студенте: {e}")
-            return {}
+            return None
 
-    def get_lab_info(self, lab_id: int) -> Dict[str, Any]:
+    def get_lab_info(self, lab_id: int) -> Optional[LabRecord]:
         """Получение информации о лабораторной работе"""
         try:
-            self.cursor.execute(
-                """
-                SELECT title, description, max_score
-                FROM labs
-                WHERE id = ?
-            """,
-                (lab_id,),
-            )
-            lab = self.cursor.fetchone()
-            if lab:
-                return {"name": lab[0], "description": lab[1], "max_score": lab[2]}
-            return {}
+            with self._cursor(record=LabRecord) as cursor:
+                cursor.execute(
+                    """
+                    SELECT id, title, description, max_score
+                    FROM labs
+                    WHERE id = ?
+                """,
+                    (lab_id,),
+                )
+                return cursor.fetchone()
         except Exception as e:
             logger.error(f"Ошибка при получении информации о лабораторной работе: {e}")
-            return {}
+            return None
 
-    def get_test_result_by_id(self, result_id: int) -> Dict[str, Any]:
+    def get_test_result_by_id(self, result_id: int) -> Optional[ResultScoreRecord]:
         """Получение результатов теста"""
         try:
-            self.cursor.execute(
-                """
-                SELECT points, status
-                FROM results
-                WHERE id = ?
-            """,
-                (result_id,),
-            )
-            result = self.cursor.fetchone()
-            if result:
-                total_questions = 10  # Предполагаем, что всего 10 вопросов в тесте
-                correct_answers = int(result[0] / 10)  # Каждый вопрос стоит 10 баллов
-                return {
-                    "score": result[0],
-                    "status": result[1],
-                    "correct_answers": correct_answers,
-                    "total_questions": total_questions,
-                }
-            return {}
+            with self._cursor(record=ResultScoreRecord) as cursor:
+                # Предполагаем, что в тесте 10 вопросов по 10 баллов
+                cursor.execute(
+                    """
+                    SELECT points, status, points / 10, 10
+                    FROM results
+                    WHERE id = ?
+                """,
+                    (result_id,),
+                )
+                return cursor.fetchone()
         except Exception as e:
             logger.error(f"Ошибка при получении результатов теста: {e}")
-            return {}
+            return None
 
-    def get_monthly_report(self, month: int, year: int) -> List[Dict[str, Any]]:
-        """Получение отчета о прохождении лабораторных работ за указанный месяц"""
+    def get_monthly_report(self, month: int, year: int) -> List[ResultRecord]:
+        """
+        Получение отчета о прохождении лабораторных работ за указанный месяц
+
+        Отчет построчный: по строке на каждую сдачу работы из results, со
+        статусом и баллами за работу. Сводная таблица monthly_results_rollup
+        его не заменяет: она хранит агрегаты попыток тестов из test_results
+        (см. get_monthly_summary). Это разные источники, и их числа не обязаны
+        совпадать. Работа может быть сдана без попытки теста и наоборот, а
+        на одну сдачу в results может приходиться несколько попыток.
+        """
+        start, end = _month_range(month, year)
         try:
-            # Формируем SQL запрос с фильтрацией по месяцу и году
-            query = """
-                SELECT
-                    u.username,
-                    u.group_number,
-                    l.title as lab_title,
-                    r.points,
-                    r.status,
-                    r.submission_date
-                FROM results r
-                JOIN users u ON r.user_id = u.id
-                JOIN labs l ON r.lab_id = l.id
-                WHERE strftime('%m', r.submission_date) = ?
-                AND strftime('%Y', r.submission_date) = ?
-                AND u.role = 'student'
-                ORDER BY u.group_number, u.username, l.title
-            """
-
-            # Преобразуем месяц и год в нужный формат
-            month_str = str(month).zfill(2)
-            year_str = str(year)
-
-            self.cursor.execute(query, (month_str, year_str))
-
-            # Получаем результаты
-            results = []
-            for row in self.cursor.fetchall():
-                results.append(
-                    {
-                        "student_name": row[0],
-                        "group": row[1],
-                        "lab_title": row[2],
-                        "points": row[3],
-                        "status": row[4],
-                        "submission_date": row[5],
-                    }
-                )
-
-            return results
-
+            return self._get_results_in_range(start, end)
         except Exception as e:
             logger.error(f"Ошибка при получении месячного отчета: {e}")
             return []
 
     def get_results_by_period(
         self, start_date: str, end_date: str
-    ) -> List[Dict[str, Any]]:
-        """Получение результатов за указанный период"""
+    ) -> List[ResultRecord]:
+        """Получение результатов за указанный период (обе даты включительно)"""
+        start, end = _period_range(start_date, end_date)
         try:
+            return self._get_results_in_range(start, end)
+        except Exception as e:
+            logger.error(f"Ошибка при получении результатов за период: {e}")
+            return []
+
+    def _get_results_in_range(self, start: str, end: str) -> List[ResultRecord]:
+        """Результаты студентов с submission_date в полуинтервале [start, end)"""
+        with self._cursor(record=ResultRecord) as cursor:
+            # Сравнение самого столбца с границами позволяет использовать
+            # покрывающий индекс ix_results_submission_date_covering
             query = """
                 SELECT
-                    u.username as student_name,
-                    u.group_number as group,
+                    u.username,
+                    u.group_number,
                     l.title as lab_title,
                     r.points,
                     r.status,
-                    r.submission_date
+                    r.submission_date,
+                    r.id
                 FROM results r
                 JOIN users u ON r.user_id = u.id
                 JOIN labs l ON r.lab_id = l.id
-                WHERE r.submission_date BETWEEN ? AND ?
+                WHERE r.submission_date >= ?
+                AND r.submission_date < ?
                 AND u.role = 'student'
                 ORDER BY u.group_number, u.username, l.title
             """
-            self.cursor.execute(query, (start_date, end_date))
-            results = self.cursor.fetchall()
-
-            return [
-                {
-                    "student_name": result[0],
-                    "group": result[1],
-                    "lab_title": result[2],
-                    "points": result[3],
-                    "status": result[4],
-                    "submission_date": result[5],
-                }
-                for result in results
-            ]
-
-        except Exception as e:
-            logger.error(f"Ошибка при получении результатов за период: {e}")
-            return []
+            cursor.execute(query, (start, end))
+            return cursor.fetchall()
 
     def save_test_result(
         self, user_id: int, lab_number: int, score: int, max_score: int, time_spent: int
     ) -> bool:
         """Сохранение результата теста"""
+        result = (user_id, lab_number, score, max_score, time_spent)
         try:
-            # Сохраняем результат теста
-            self.cursor.execute(
-                """
-                INSERT INTO test_results (user_id, lab_number, score, max_score, time_spent)
-                VALUES (?, ?, ?, ?, ?)
-            """,
-                (user_id, lab_number, score, max_score, time_spent),
-            )
+            if self.write_queue is not None and self._save_through_queue(result):
+                return True
+            with self._cursor(write=True) as cursor:
+                _write_test_result(cursor, result)
+                return True
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении результата теста: {e}")
+            return False
 
-            # Обновляем статус лабораторной работы в user_labs
-            self.cursor.execute(
-                """
-                UPDATE user_labs
-                SET status = 'completed',
-                    grade = ?,
-                    submission_date = CURRENT_TIMESTAMP
-                WHERE user_id = ? AND lab_id = ?
-            """,
-                (score, user_id, lab_number),
-            )
+    def _save_through_queue(self, result: Tuple[int, ...]) -> bool:
+        """
+        Запись результата через очередь с ожиданием фиксации пакета
 
-            self.conn.commit()
+        Returns:
+            True, если результат записан; False, если очередь остановлена
+            или не ответила и результат нужно записать напрямую
+
+        Raises:
+            TimeoutError: Очередь не ответила, но уже пишет результат, так что
+                повторная запись дала бы дубликат
+        """
+        try:
+            future = self._submit_to_queue(result)
+            future.result(timeout=QUEUE_WAIT_TIMEOUT)
             return True
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении результата теста: {e}")
+        except QueueClosedError as e:
+            logger.warning(f"Очередь записи недоступна, запись напрямую: {e}")
+            return False
+        except FutureTimeoutError:
+            if not future.cancel():
+                raise TimeoutError("Очередь записи не зафиксировала результат")
+            logger.warning("Очередь записи не ответила, запись напрямую")
             return False
 
-    def get_test_results(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        """Получение результатов тестов за период"""
+    def submit_test_result(
+        self, user_id: int, lab_number: int, score: int, max_score: int, time_spent: int
+    ) -> Future:
+        """
+        Сохранение результата теста без ожидания записи
+
+        Returns:
+            Future с id строки test_results; при включенной очереди записи
+            выполняется после фиксации пакета, иначе - сразу
+        """
+        result = (user_id, lab_number, score, max_score, time_spent)
+        if self.write_queue is not None:
+            return self._submit_to_queue(result)
+
+        future: Future = Future()
         try:
-            self.cursor.execute(
+            with self._cursor(write=True) as cursor:
+                future.set_result(_write_test_result(cursor, result))
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении результата теста: {e}")
+            future.set_exception(e)
+        return future
+
+    def _submit_to_queue(self, result: Tuple[int, ...]) -> Future:
+        """Постановка результата в очередь записи с учетом для обслуживания"""
+        future = self.write_queue.submit(*result)
+        if self.maintenance is not None:
+            maintenance = self.maintenance
+
+            def note_write(done: Future) -> None:
+                if not done.cancelled() and done.exception() is None:
+                    maintenance.note_writes()
+
+            future.add_done_callback(note_write)
+        return future
+
+    def start_write_queue(
+        self,
+        batch_size: int = 50,
+        flush_interval: float = 0.005,
+        durability: str = "full",
+    ) -> WriteBehindQueue:
+        """
+        Включение отложенной записи результатов тестов с групповой фиксацией
+
+        Args:
+            batch_size: Максимальное количество результатов в одной транзакции
+            flush_interval: Максимальное ожидание пополнения пакета в секундах
+            durability: Режим надежности: full, normal или off
+
+        Returns:
+            Запущенная очередь записи
+        """
+        if self.write_queue is None:
+            self.write_queue = WriteBehindQueue(
+                self.db_path,
+                _write_test_result,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                durability=durability,
+            )
+            logger.info(
+                f"Очередь записи результатов запущена: пакет до {batch_size}, "
+                f"интервал {flush_interval * 1000:.0f} мс, режим {durability}"
+            )
+        return self.write_queue
+
+    def stop_write_queue(self) -> None:
+        """Запись оставшихся результатов и возврат к синхронной записи"""
+        if self.write_queue is not None:
+            # Результаты, которые поток не успел записать, завершаются ошибкой
+            self.write_queue.close(timeout=QUEUE_WAIT_TIMEOUT)
+            self.write_queue = None
+
+    def start_maintenance(self, **options: Any) -> MaintenanceScheduler:
+        """
+        Запуск планового обслуживания базы в фоновом потоке
+
+        Args:
+            **options: Параметры MaintenanceScheduler (write_threshold,
+                idle_seconds, vacuum_budget и другие)
+
+        Returns:
+            Запущенный планировщик
+        """
+        if self.maintenance is None:
+            self.maintenance = MaintenanceScheduler(self.db_path, **options)
+            self.maintenance.start()
+            logger.info("Плановое обслуживание базы данных запущено")
+        return self.maintenance
+
+    def stop_maintenance(self) -> None:
+        """Остановка планового обслуживания"""
+        if self.maintenance is not None:
+            self.maintenance.stop()
+            self.maintenance = None
+
+    def rebuild_monthly_rollup(self) -> int:
+        """Пересчет сводной таблицы по всем накопленным результатам"""
+        with self._cursor(write=True) as cursor:
+            cursor.execute("DELETE FROM monthly_results_rollup")
+            cursor.execute(
                 """
+                INSERT INTO monthly_results_rollup
                 SELECT
-                    u.username,
-                    u.group_number,
+                    CAST(strftime('%Y', tr.completed_at) AS INTEGER),
+                    CAST(strftime('%m', tr.completed_at) AS INTEGER),
+                    COALESCE(u.group_number, ''),
                     tr.lab_number,
-                    tr.score,
-                    tr.max_score,
-                    tr.time_spent,
-                    tr.completed_at
+                    COUNT(*),
+                    COALESCE(SUM(tr.score), 0),
+                    MIN(tr.score),
+                    MAX(tr.score)
                 FROM test_results tr
-                JOIN users u ON tr.user_id = u.id
-                WHERE tr.completed_at BETWEEN ? AND ?
-                ORDER BY tr.completed_at DESC
-            """,
-                (start_date, end_date),
+                LEFT JOIN users u ON u.id = tr.user_id
+                GROUP BY 1, 2, 3, 4
+            """
             )
+            rows = cursor.rowcount
+        logger.info(f"Сводная таблица результатов пересчитана: {rows} строк")
+        return rows
+
+    def rebuild_lab_status(self) -> int:
+        """Пересчет user_lab_status по таблице results"""
+        with self._cursor(write=True) as cursor:
+            cursor.execute("DELETE FROM user_lab_status")
+            cursor.execute(f"INSERT INTO user_lab_status {LATEST_LAB_STATUS_QUERY}")
+            rows = cursor.rowcount
+        logger.info(f"Статусы лабораторных работ пересчитаны: {rows} строк")
+        return rows
+
+    def get_monthly_summary(self, month: int, year: int) -> List[MonthlySummaryRecord]:
+        """
+        Сводка результатов тестов за месяц по группам и лабораторным работам
 
-            results = []
-            for row in self.cursor.fetchall():
-                results.append(
-                    {
-                        "username": row[0],
-                        "group_number": row[1],
-                        "lab_number": row[2],
-                        "score": row[3],
-                        "max_score": row[4],
-                        "time_spent": row[5],
-                        "completed_at": row[6],
-                    }
+        Читает O(групп x работ) строк из monthly_results_rollup, которую
+        save_test_result обновляет вместе с test_results. Это агрегаты
+        попыток тестов; сдачи работ из results в сводку не входят (см.
+        get_monthly_report).
+        """
+        try:
+            with self._cursor(record=MonthlySummaryRecord) as cursor:
+                cursor.execute(
+                    """
+                    SELECT group_number, lab_number, result_count,
+                           CAST(score_sum AS REAL) / result_count,
+                           score_min, score_max
+                    FROM monthly_results_rollup
+                    WHERE year = ? AND month = ?
+                    ORDER BY group_number, lab_number
+                """,
+                    (year, month),
                 )
-            return results
+                return cursor.fetchall()
         except Exception as e:
-            logger.error(f"Ошибка при получении результатов тестов: {e}")
+            logger.error(f"Ошибка при получении сводки за месяц: {e}")
             return []
 
-    def get_labs_with_results(self, user_id: int) -> list:
-        """Получение списка лабораторных работ с результатами для пользователя"""
+    def get_test_results(
+        self, start_date: str, end_date: str
+    ) -> List[TestResultRecord]:
+        """Получение результатов тестов за период"""
         try:
-            self.cursor.execute(
-                """
-                SELECT
-                    l.id as lab_number,
-                    l.title,
-                    COALESCE(r.status, 'not_started') as status,
-                    r.submission_date,
-                    r.points
-                FROM labs l
-                LEFT JOIN results r ON l.id = r.lab_id AND r.user_id = ?
-                ORDER BY l.id
-            """,
-                (user_id,),
+            with self._cursor(record=TestResultRecord) as cursor:
+                cursor.execute(
+                    """
+                    SELECT
+                        u.username,
+                        u.group_number,
+                        tr.lab_number,
+                        tr.score,
+                        tr.max_score,
+                        tr.time_spent,
+                        tr.completed_at,
+                        tr.id
+                    FROM test_results tr
+                    JOIN users u ON tr.user_id = u.id
+                    WHERE tr.completed_at BETWEEN ? AND ?
+                    ORDER BY tr.completed_at DESC
+                """,
+                    (start_date, end_date),
+                )
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка при получении результатов тестов: {e}")
+            return []
+
+    def page_test_results(
+        self,
+        start_date: str,
+        end_date: str,
+        after: Optional[PageKey] = None,
+        limit: int = 500,
+        descending: bool = False,
+    ) -> Tuple[List[TestResultRecord], Optional[PageKey]]:
+        """
+        Страница результатов тестов за период в порядке (completed_at, id)
+
+        Args:
+            start_date: Начало периода
+            end_date: Конец периода (включительно)
+            after: Ключ, возвращенный предыдущей страницей; None - первая страница
+            limit: Максимальное количество строк на странице
+            descending: Обратный порядок, от новых результатов к старым
+
+        Returns:
+            Записи результатов и ключ следующей страницы
+            (None, если страница последняя)
+        """
+        start, end = _period_range(start_date, end_date)
+        return self._fetch_page(
+            TEST_RESULTS_PAGE_QUERY,
+            TestResultRecord,
+            "tr.completed_at",
+            "tr.id",
+            start,
+            end,
+            after,
+            limit,
+            descending,
+        )
+
+    def page_results(
+        self,
+        start_date: str,
+        end_date: str,
+        after: Optional[PageKey] = None,
+        limit: int = 500,
+    ) -> Tuple[List[ResultRecord], Optional[PageKey]]:
+        """
+        Страница результатов студентов из results в порядке (submission_date, id)
+
+        Args:
+            start_date: Начало периода
+            end_date: Конец периода (включительно)
+            after: Ключ, возвращенный предыдущей страницей; None - первая страница
+            limit: Максимальное количество строк на странице
+
+        Returns:
+            Записи отчета и ключ следующей страницы
+        """
+        start, end = _period_range(start_date, end_date)
+        return self._fetch_page(
+            RESULTS_PAGE_QUERY,
+            ResultRecord,
+            "r.submission_date",
+            "r.id",
+            start,
+            end,
+            after,
+            limit,
+        )
+
+    def iter_test_results(
+        self,
+        start_date: str,
+        end_date: str,
+        batch_size: int = 500,
+        descending: bool = False,
+    ) -> Iterator[TestResultRecord]:
+        """Потоковое чтение результатов тестов за период"""
+        after = None
+        while True:
+            rows, after = self.page_test_results(
+                start_date, end_date, after, batch_size, descending
+            )
+            yield from rows
+            if after is None:
+                return
+
+    def iter_results_by_period(
+        self, start_date: str, end_date: str, batch_size: int = 500
+    ) -> Iterator[ResultRecord]:
+        """Потоковое чтение результатов студентов за период"""
+        after = None
+        while True:
+            rows, after = self.page_results(start_date, end_date, after, batch_size)
+            yield from rows
+            if after is None:
+                return
+
+    def iter_monthly_report(
+        self, month: int, year: int, batch_size: int = 500
+    ) -> Iterator[ResultRecord]:
+        """Потоковое чтение месячного отчета в порядке сдачи работ"""
+        start, end = _month_range(month, year)
+        after = None
+        while True:
+            rows, after = self._fetch_page(
+                RESULTS_PAGE_QUERY,
+                ResultRecord,
+                "r.submission_date",
+                "r.id",
+                start,
+                end,
+                after,
+                batch_size,
             )
+            yield from rows
+            if after is None:
+                return
+
+    def _fetch_page(
+        self,
+        query: str,
+        record: Type[NamedTuple],
+        date_column: str,
+        id_column: str,
+        start: str,
+        end: str,
+        after: Optional[PageKey],
+        limit: int,
+        descending: bool = False,
+    ) -> Tuple[List[NamedTuple], Optional[PageKey]]:
+        """Чтение одной страницы по ключу (дата, id) в полуинтервале [start, end)"""
+        key_filter, params = "", []
+        if after is not None:
+            # Продолжаем сразу после последней строки: без OFFSET и без
+            # повторного чтения уже выданных страниц
+            operator = "<" if descending else ">"
+            key_filter = f"AND ({date_column}, {id_column}) {operator} (?, ?)"
+            params = list(after)
 
-            labs = []
-            for row in self.cursor.fetchall():
-                lab = {
-                    "lab_number": row[0],
-                    "title": row[1],
-                    "status": row[2],
-                    "submission_date": row[3] if row[3] else "",
-                    "points": row[4] if row[4] else 0,
-                }
-                labs.append(lab)
+        try:
+            with self._cursor(record=record) as cursor:
+                cursor.execute(
+                    query.format(
+                        key_filter=key_filter, order="DESC" if descending else "ASC"
+                    ),
+                    (start, end, *params, limit),
+                )
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка при постраничном чтении результатов: {e}")
+            raise
 
-            return labs
+        if len(rows) < limit:
+            return rows, None
+        return rows, (rows[-1][-2], rows[-1][-1])
 
+    def get_labs_with_results(self, user_id: int) -> List[LabStatusRecord]:
+        """Получение списка лабораторных работ с результатами для пользователя"""
+        try:
+            with self._cursor(record=LabStatusRecord) as cursor:
+                cursor.execute(
+                    """
+                    SELECT
+                        l.id as lab_number,
+                        l.title,
+                        COALESCE(s.status, 'not_started') as status,
+                        COALESCE(s.submission_date, '') as submission_date,
+                        COALESCE(s.points, 0) as points
+                    FROM labs l
+                    LEFT JOIN user_lab_status s
+                        ON s.user_id = ? AND s.lab_id = l.id
+                    ORDER BY l.id
+                """,
+                    (user_id,),
+                )
+                return cursor.fetchall()
         except Exception as e:
             logger.error(f"Ошибка при получении списка лабораторных работ: {e}")
             return []
 
+    def close(self) -> None:
+        """Закрытие соединений с базой данных"""
+        if self.closed:
+            return
+        self.stop_write_queue()
+        self.stop_maintenance()
+        # Соединение знает, какие таблицы использовались в запросах, и
+        # PRAGMA optimize обновляет статистику только там, где она устарела.
+        # Пул выполняет ее на соединениях, которые уже держит, не дожидаясь
+        # освобождения занятых
+        if self.pool is not None:
+            self.pool.close(optimize=True)
+        elif self.conn is not None:
+            try:
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.warning(f"Не удалось выполнить PRAGMA optimize: {e}")
+            self.conn.close()
+        self.closed = True
+
     def __del__(self):
         """Закрытие соединения при удалении объекта"""
-        self.conn.close()
+        if hasattr(self, "conn"):
+            try:
+                self.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Ошибка при закрытии базы данных: {e}")
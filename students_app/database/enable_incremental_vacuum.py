@@ -0,0 +1,43 @@
+"""Перевод student_app.db в режим auto_vacuum=INCREMENTAL
+
+Выполняет полный VACUUM, который блокирует базу на все время работы.
+Запускать, когда приложение и другие процессы с базой остановлены. После
+перевода плановое обслуживание возвращает свободные страницы шагами.
+
+Запуск из каталога students_app:
+python -m database.enable_incremental_vacuum [--db путь]
+"""
+
+import argparse
+import os
+
+from utils import db_profiler
+from utils.db_maintenance import enable_incremental_vacuum
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "student_app.db"
+)
+
+
+def main() -> None:
+    """Перевод указанной базы данных в режим auto_vacuum=INCREMENTAL"""
+    parser = argparse.ArgumentParser(
+        description="Перевод базы в режим auto_vacuum=INCREMENTAL (полный VACUUM)"
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Путь к student_app.db")
+    args = parser.parse_args()
+
+    # VACUUM нельзя выполнять внутри транзакции
+    conn = db_profiler.connect(args.db, isolation_level=None)
+    try:
+        converted = enable_incremental_vacuum(conn)
+    finally:
+        conn.close()
+    if converted:
+        print(f"База {args.db} переведена в режим auto_vacuum=INCREMENTAL")
+    else:
+        print(f"База {args.db} уже в режиме auto_vacuum=INCREMENTAL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Применение миграций схемы student_app.db"""
+
+import os
+import sqlite3
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from loguru import logger
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from utils import db_profiler
+from utils.db_maintenance import enable_incremental_vacuum
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def get_config(db_path: str) -> Config:
+    """Конфигурация alembic для указанного файла базы данных"""
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{db_path}")
+    return config
+
+
+def head_revision() -> Optional[str]:
+    """Последняя ревизия среди миграций"""
+    return ScriptDirectory(MIGRATIONS_DIR).get_current_head()
+
+
+def current_revision(db_path: str) -> Optional[str]:
+    """Текущая ревизия схемы базы данных"""
+    engine = create_engine(f"sqlite:///{db_path}", poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            return MigrationContext.configure(connection).get_current_revision()
+    finally:
+        engine.dispose()
+
+
+def prepare_new_database(db_path: str) -> bool:
+    """
+    Перевод еще пустой базы в режим auto_vacuum=INCREMENTAL
+
+    До первой таблицы VACUUM для перевода ничего не стоит; у базы с
+    таблицами режим не меняется (см. database.enable_incremental_vacuum).
+
+    Returns:
+        True, если база была пустой и переведена в этот раз
+    """
+    # VACUUM нельзя выполнять внутри транзакции
+    conn = db_profiler.connect(db_path, isolation_level=None)
+    try:
+        if conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+            return False
+        return enable_incremental_vacuum(conn)
+    except sqlite3.Error as e:
+        logger.warning(f"Не удалось включить auto_vacuum для {db_path}: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def upgrade_database(db_path: str, revision: str = "head") -> None:
+    """Обновление схемы базы данных до указанной ревизии"""
+    current = current_revision(db_path)
+    if revision == "head" and current == head_revision():
+        return
+
+    if current is None:
+        prepare_new_database(db_path)
+
+    logger.info(f"Обновление схемы {db_path}: {current} -> {revision}")
+    command.upgrade(get_config(db_path), revision)
@@ -0,0 +1,136 @@
+"""Исходная схема student_app.db
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-12-09 12:00:00.000000
+
+Повторяет таблицы, которые раньше создавал DatabaseManager.create_tables,
+и таблицу results из уже развёрнутых баз. Все запросы идемпотентны, поэтому
+существующие базы без alembic_version просто получают отметку о версии.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Таблица пользователей
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            group_number TEXT,
+            role TEXT DEFAULT 'student'
+        )
+    """
+    )
+
+    # Таблица лабораторных работ
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS labs (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            max_score INTEGER
+        )
+    """
+    )
+
+    # Таблица вопросов
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lab_id INTEGER,
+            question_number INTEGER,
+            text TEXT,
+            type TEXT,
+            FOREIGN KEY (lab_id) REFERENCES labs (id)
+        )
+    """
+    )
+
+    # Таблица ответов
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question_id INTEGER,
+            answer_number INTEGER,
+            text TEXT,
+            is_correct BOOLEAN,
+            FOREIGN KEY (question_id) REFERENCES questions (id)
+        )
+    """
+    )
+
+    # Таблица результатов тестов
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS test_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            lab_number INTEGER,
+            score INTEGER,
+            max_score INTEGER,
+            time_spent INTEGER,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """
+    )
+
+    # Таблица для пользовательских лабораторных работ
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_labs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            lab_id INTEGER,
+            status TEXT,
+            grade INTEGER,
+            submission_date TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (lab_id) REFERENCES labs (id)
+        )
+    """
+    )
+
+    # Таблица результатов по лабораторным работам (отчеты и список работ)
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            lab_id INTEGER,
+            points INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'not_started',
+            submission_date TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (lab_id) REFERENCES labs (id)
+        )
+    """
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        "results",
+        "user_labs",
+        "test_results",
+        "answers",
+        "questions",
+        "labs",
+        "users",
+    ):
+        op.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,54 @@
+"""Индексы для частых запросов
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-12-09 12:30:00.000000
+
+- test_results.completed_at: отбор по периоду и сортировка в get_test_results
+- test_results.user_id: результаты конкретного студента
+- user_labs(user_id, lab_id): UPDATE в save_test_result
+- results(user_id, lab_id): LEFT JOIN в get_labs_with_results
+
+users.username уже покрыт автоматическим индексом ограничения UNIQUE.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_test_results_completed_at",
+        "test_results",
+        ["completed_at"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_test_results_user_id", "test_results", ["user_id"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_user_labs_user_id_lab_id",
+        "user_labs",
+        ["user_id", "lab_id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_results_user_id_lab_id",
+        "results",
+        ["user_id", "lab_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_results_user_id_lab_id", table_name="results")
+    op.drop_index("ix_user_labs_user_id_lab_id", table_name="user_labs")
+    op.drop_index("ix_test_results_user_id", table_name="test_results")
+    op.drop_index("ix_test_results_completed_at", table_name="test_results")
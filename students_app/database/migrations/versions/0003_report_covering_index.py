@@ -0,0 +1,33 @@
+"""Покрывающий индекс для отчетов по периоду
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-12-10 10:00:00.000000
+
+get_monthly_report и get_results_by_period отбирают results по диапазону
+submission_date и читают user_id, lab_id, points и status. Индекс содержит все
+эти столбцы, поэтому строки таблицы results при построении отчета не читаются.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_results_submission_date_covering",
+        "results",
+        ["submission_date", "user_id", "lab_id", "points", "status"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_results_submission_date_covering", table_name="results")
@@ -0,0 +1,60 @@
+"""Сводная таблица результатов тестов по месяцам
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-12-12 09:00:00.000000
+
+Строка на (год, месяц, группа, лабораторная работа) с количеством результатов,
+суммой, минимумом и максимумом баллов. save_test_result обновляет её в той же
+транзакции, что и вставку результата; здесь она заполняется по уже
+накопленным данным.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS monthly_results_rollup (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            group_number TEXT NOT NULL,
+            lab_number INTEGER NOT NULL,
+            result_count INTEGER NOT NULL DEFAULT 0,
+            score_sum INTEGER NOT NULL DEFAULT 0,
+            score_min INTEGER,
+            score_max INTEGER,
+            PRIMARY KEY (year, month, group_number, lab_number)
+        ) WITHOUT ROWID
+    """
+    )
+    op.execute(
+        """
+        INSERT OR REPLACE INTO monthly_results_rollup
+        SELECT
+            CAST(strftime('%Y', tr.completed_at) AS INTEGER),
+            CAST(strftime('%m', tr.completed_at) AS INTEGER),
+            COALESCE(u.group_number, ''),
+            tr.lab_number,
+            COUNT(*),
+            COALESCE(SUM(tr.score), 0),
+            MIN(tr.score),
+            MAX(tr.score)
+        FROM test_results tr
+        LEFT JOIN users u ON u.id = tr.user_id
+        GROUP BY 1, 2, 3, 4
+    """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS monthly_results_rollup")
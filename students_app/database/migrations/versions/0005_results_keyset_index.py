@@ -0,0 +1,38 @@
+"""Порядок (submission_date, id) в покрывающем индексе results
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-12-14 11:00:00.000000
+
+Постраничное чтение отчетов идет по ключу (submission_date, id). Когда id стоит
+в индексе сразу после даты, каждая страница читается с места остановки без
+сортировки, а индекс по-прежнему покрывает все столбцы отчета.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_results_submission_date_covering", table_name="results")
+    op.create_index(
+        "ix_results_submission_date_covering",
+        "results",
+        ["submission_date", "id", "user_id", "lab_id", "points", "status"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_results_submission_date_covering", table_name="results")
+    op.create_index(
+        "ix_results_submission_date_covering",
+        "results",
+        ["submission_date", "user_id", "lab_id", "points", "status"],
+    )
@@ -0,0 +1,110 @@
+"""Проекция статуса лабораторных работ пользователя
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-12-16 10:00:00.000000
+
+user_lab_status хранит последний результат из results для каждой пары
+(user_id, lab_id): статус, баллы и дату сдачи. Триггеры на results
+пересчитывают затронутую пару при каждой вставке, изменении и удалении,
+поэтому список работ пользователя читается по диапазону первичного ключа
+без соединения со всей таблицей results.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Пересчет одной пары (user_id, lab_id): {row} - NEW или OLD
+REFRESH_PAIR = """
+    DELETE FROM user_lab_status
+    WHERE user_id = {row}.user_id AND lab_id = {row}.lab_id;
+    INSERT INTO user_lab_status (user_id, lab_id, status, points, submission_date)
+    SELECT user_id, lab_id, status, points, submission_date
+    FROM results
+    WHERE user_id = {row}.user_id AND lab_id = {row}.lab_id
+    ORDER BY submission_date DESC, id DESC
+    LIMIT 1;
+"""
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_lab_status (
+            user_id INTEGER NOT NULL,
+            lab_id INTEGER NOT NULL,
+            status TEXT,
+            points INTEGER,
+            submission_date TIMESTAMP,
+            PRIMARY KEY (user_id, lab_id)
+        ) WITHOUT ROWID
+    """
+    )
+
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS results_lab_status_insert
+        AFTER INSERT ON results
+        BEGIN
+            {REFRESH_PAIR.format(row="NEW")}
+        END
+    """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS results_lab_status_update
+        AFTER UPDATE ON results
+        BEGIN
+            {REFRESH_PAIR.format(row="OLD")}
+            {REFRESH_PAIR.format(row="NEW")}
+        END
+    """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS results_lab_status_delete
+        AFTER DELETE ON results
+        BEGIN
+            {REFRESH_PAIR.format(row="OLD")}
+        END
+    """
+    )
+
+    op.execute(
+        """
+        INSERT OR REPLACE INTO user_lab_status
+        SELECT user_id, lab_id, status, points, submission_date
+        FROM (
+            SELECT
+                user_id,
+                lab_id,
+                status,
+                points,
+                submission_date,
+                ROW_NUMBER() OVER (
+                    PARTITION BY user_id, lab_id
+                    ORDER BY submission_date DESC, id DESC
+                ) AS position
+            FROM results
+            WHERE user_id IS NOT NULL AND lab_id IS NOT NULL
+        )
+        WHERE position = 1
+    """
+    )
+
+
+def downgrade() -> None:
+    for trigger in (
+        "results_lab_status_insert",
+        "results_lab_status_update",
+        "results_lab_status_delete",
+    ):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS user_lab_status")
@@ -0,0 +1,35 @@
+"""Пересчет производных таблиц: сводки по месяцам и статусов работ
+
+Запуск из каталога students_app: python -m database.rebuild_rollup [--db путь]
+"""
+
+import argparse
+import os
+
+from database.db_manager import DatabaseManager
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "student_app.db"
+)
+
+
+def main() -> None:
+    """Пересчет производных таблиц для указанной базы данных"""
+    parser = argparse.ArgumentParser(
+        description="Пересчет monthly_results_rollup и user_lab_status"
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Путь к student_app.db")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    try:
+        rollup_rows = db.rebuild_monthly_rollup()
+        status_rows = db.rebuild_lab_status()
+    finally:
+        db.close()
+    print(f"Сводная таблица пересчитана: {rollup_rows} строк")
+    print(f"Статусы лабораторных работ пересчитаны: {status_rows} строк")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Типизированные записи строк базы данных"""
+
+import sqlite3
+from typing import Callable, NamedTuple, Optional, Type
+
+
+class UserRecord(NamedTuple):
+    """Пользователь"""
+
+    id: int
+    username: str
+    group_number: Optional[str]
+    role: str
+
+
+class LabRecord(NamedTuple):
+    """Лабораторная работа"""
+
+    id: int
+    title: str
+    description: Optional[str]
+    max_score: int
+
+
+class LabStatusRecord(NamedTuple):
+    """Лабораторная работа с результатом конкретного пользователя"""
+
+    lab_number: int
+    title: str
+    status: str
+    submission_date: str
+    points: int
+
+
+class TestResultRecord(NamedTuple):
+    """Результат прохождения теста из test_results"""
+
+    username: str
+    group_number: Optional[str]
+    lab_number: int
+    score: int
+    max_score: int
+    time_spent: int
+    completed_at: str
+    id: int
+
+
+class ResultRecord(NamedTuple):
+    """Строка отчета по сданным работам из results"""
+
+    student_name: str
+    group: Optional[str]
+    lab_title: str
+    points: int
+    status: str
+    submission_date: str
+    id: int
+
+
+class ResultScoreRecord(NamedTuple):
+    """Баллы и статус сданной работы из results"""
+
+    score: int
+    status: str
+    correct_answers: int
+    total_questions: int
+
+
+class MonthlySummaryRecord(NamedTuple):
+    """Сводка результатов за месяц по группе и лабораторной работе"""
+
+    group: str
+    lab_number: int
+    attempts: int
+    average_score: float
+    min_score: int
+    max_score: int
+
+
+def row_factory(
+    record_type: Type[NamedTuple],
+) -> Callable[[sqlite3.Cursor, tuple], NamedTuple]:
+    """
+    row_factory для sqlite3, создающая записи указанного типа
+
+    Кортеж строки передается в конструктор записи без промежуточного словаря,
+    поэтому порядок столбцов в запросе должен совпадать с порядком полей.
+    """
+    make = tuple.__new__
+
+    def factory(cursor: sqlite3.Cursor, row: tuple) -> NamedTuple:
+        return make(record_type, row)
+
+    return factory
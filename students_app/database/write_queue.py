@@ -0,0 +1,259 @@
+"""Очередь отложенной записи с групповой фиксацией транзакций"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from utils import db_profiler
+
+# Режимы надежности: значение PRAGMA synchronous для соединения писателя.
+# full - пакет записан на диск к моменту выполнения future;
+# normal - в WAL-журнале последний пакет может потеряться при сбое питания,
+#          но не при падении приложения;
+# off - без fsync, только для тестов и импорта данных
+DURABILITY_MODES = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+
+_STOP = object()
+
+WriteFunc = Callable[[sqlite3.Cursor, Tuple[Any, ...]], Any]
+
+
+class QueueClosedError(RuntimeError):
+    """Очередь закрыта или ее поток-писатель остановлен до записи элемента"""
+
+
+class WriteBehindQueue:
+    """
+    Очередь записей, которые отдельный поток пишет пакетами
+
+    Поток-писатель берет первую запись из очереди, ждет следующие не дольше
+    flush_interval секунд или до batch_size записей и фиксирует весь пакет
+    одной транзакцией. Вызывающий получает Future с результатом write_func
+    или с исключением, если запись не удалась.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        write_func: WriteFunc,
+        batch_size: int = 50,
+        flush_interval: float = 0.005,
+        durability: str = "full",
+        busy_timeout: int = 5000,
+    ) -> None:
+        """
+        Инициализация и запуск потока-писателя
+
+        Args:
+            db_path: Путь к файлу базы данных
+            write_func: Функция записи одного элемента через переданный курсор
+            batch_size: Максимальное количество записей в одной транзакции
+            flush_interval: Максимальное ожидание пополнения пакета в секундах
+            durability: Режим надежности: full, normal или off
+            busy_timeout: Время ожидания блокировки SQLite в миллисекундах
+        """
+        if durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"Неизвестный режим надежности {durability!r}, "
+                f"допустимы: {', '.join(DURABILITY_MODES)}"
+            )
+        if batch_size < 1:
+            raise ValueError("Размер пакета должен быть положительным")
+
+        self.db_path = db_path
+        self.write_func = write_func
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.durability = durability
+        self.busy_timeout = busy_timeout
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "written": 0, "failed": 0, "batches": 0}
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind-queue", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, *args: Any) -> Future:
+        """Постановка записи в очередь; Future выполнится после фиксации пакета"""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise QueueClosedError("Очередь записи закрыта")
+            self._stats["submitted"] += 1
+            self._queue.put((args, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание записи всех поставленных в очередь элементов"""
+        marker: Future = Future()
+        with self._lock:
+            if self._closed:
+                return not self._thread.is_alive()
+            self._queue.put((None, marker))
+        try:
+            marker.result(timeout)
+            return True
+        except FutureTimeoutError:
+            return False
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Запись оставшихся элементов и остановка потока-писателя
+
+        Если поток не успел за timeout секунд, элементы, которые он еще не
+        взял из очереди, завершаются с QueueClosedError.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            self._fail_pending(QueueClosedError("Очередь записи остановлена"))
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики поставленных, записанных и неудачных записей"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Соединение писателя с ручным управлением транзакциями"""
+        conn = db_profiler.connect(
+            self.db_path, timeout=self.busy_timeout / 1000, isolation_level=None
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {DURABILITY_MODES[self.durability]}")
+        return conn
+
+    def _next_batch(self) -> Tuple[List[tuple], bool]:
+        """Очередной пакет и признак остановки"""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[tuple]) -> None:
+        """Запись пакета одной транзакцией; ошибка элемента откатывает только его"""
+        markers = [future for args, future in batch if args is None]
+        items = [
+            (args, future)
+            for args, future in batch
+            if args is not None and future.set_running_or_notify_cancel()
+        ]
+
+        done, failed = [], []
+        if items:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                for args, future in items:
+                    cursor.execute("SAVEPOINT write_item")
+                    try:
+                        result = self.write_func(cursor, args)
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO write_item")
+                        failed.append((future, e))
+                    else:
+                        done.append((future, result))
+                    cursor.execute("RELEASE write_item")
+                cursor.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка при фиксации пакета записей: {e}")
+                if conn.in_transaction:
+                    conn.rollback()
+                # Пакет не зафиксирован: ошибку получают все его элементы
+                rejected = {id(future) for future, _ in failed}
+                failed.extend(
+                    (future, e) for _, future in items if id(future) not in rejected
+                )
+                done = []
+            finally:
+                cursor.close()
+
+        with self._lock:
+            self._stats["written"] += len(done)
+            self._stats["failed"] += len(failed)
+            self._stats["batches"] += 1 if items else 0
+
+        for future, result in done:
+            future.set_result(result)
+        for future, error in failed:
+            future.set_exception(error)
+        for marker in markers:
+            marker.set_result(True)
+
+    def _run(self) -> None:
+        """Цикл потока-писателя"""
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            logger.error(f"Очередь записи не смогла открыть базу данных: {e}")
+            self._fail_pending(e)
+            return
+
+        batch: List[tuple] = []
+        try:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    self._write_batch(conn, batch)
+        except Exception as e:
+            logger.error(f"Поток записи остановлен из-за ошибки: {e}")
+            self._fail_items(batch, e)
+        finally:
+            conn.close()
+            # Элементы, поставленные после остановки или оставшиеся после
+            # ошибки, не должны ждать вечно
+            self._fail_pending(QueueClosedError("Поток записи остановлен"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        """Закрытие очереди и завершение ожидающих Future с ошибкой"""
+        with self._lock:
+            self._closed = True
+        items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                items.append(item)
+        self._fail_items(items, error)
+
+    @staticmethod
+    def _fail_items(items: List[tuple], error: Exception) -> None:
+        """Завершение еще не выполненных Future элементов с ошибкой"""
+        for args, future in items:
+            if future.done():
+                continue
+            if args is None:
+                future.set_result(False)
+            elif future.running() or future.set_running_or_notify_cancel():
+                future.set_exception(error)
@@ -3,6 +3,7 @@
 """
 
 import sys
+import atexit
 import platform
 import argparse
 from contextlib import contextmanager
@@ -17,6 +18,8 @@ from ui.login_window import LoginWindow
 from ui.window_manager import WindowManager
 from utils.styles import STYLES
 from utils.logger import setup_logger
+from utils import db_profiler
+import models
 from loguru import logger
 from database.db_manager import DatabaseManager
 
@@ -25,7 +28,15 @@ def parse_arguments() -> argparse.Namespace:
     """Обработка аргументов командной строки"""
     parser = argparse.ArgumentParser(description="Student Application")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode")
-    return parser.parse_args()
+    parser.add_argument(
+        "--profile-db",
+        action="store_true",
+        help="Collect SQL timings and print a report on exit "
+             "(with --debug also EXPLAIN QUERY PLAN for full scans)"
+    )
+    # Остальные аргументы (например, параметры Qt) передаются QApplication
+    args, _ = parser.parse_known_args()
+    return args
 
 
 def cleanup(app: QApplication) -> None:
@@ -90,13 +101,23 @@ def qt_message_handler(mode: QtMsgType,
 def main() -> None:
     """Главная функция приложения"""
     try:
+        args = parse_arguments()
+
+        # Профилирование включается до открытия соединений с базой данных
+        if args.profile_db:
+            db_profiler.enable(explain=args.debug)
+            atexit.register(db_profiler.dump_report)
+
         # Создаем приложение
         app = QApplication.instance()
         if app is None:
             app = QApplication(sys.argv)
 
         # Инициализация логгера
-        setup_logger()
+        setup_logger(debug_mode=args.debug)
+
+        # SQL моделей выводится в лог только в режиме отладки
+        models.configure(echo=args.debug)
 
         # Информация о версиях
         logger.info(f"Qt version: {QT_VERSION_STR}")
@@ -107,6 +128,8 @@ def main() -> None:
         db_path = os.path.join(os.path.dirname(__file__), "database", "student_app.db")
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         db_manager = DatabaseManager(db_path)
+        # ANALYZE после заметного объема записей и очистка в простое
+        db_manager.start_maintenance()
 
         # Создаем менеджер окон
         window_manager = WindowManager()
@@ -1,31 +1,26 @@
 """
 Инициализация моделей данных
-"""
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+Импорт пакета не открывает базу данных: движок и фабрика сессий создаются
+при первом обращении (см. models.session), таблицы - в bootstrap_schema.
+"""
 
 from .base import Base
 from .user import User, UserRole
 from .test import (Test, Question, QuestionOption, TestAttempt, UserAnswer,
                   QuestionType)
+from .snapshot import (SNAPSHOT_CACHE, OptionSnapshot, QuestionSnapshot,
+                       TestSnapshot)
+from .session import (SCHEMA_VERSION, SessionLocal, bootstrap_schema, configure,
+                      dispose, get_db, get_engine, get_session_factory)
 
-# Создаем движок базы данных
-engine = create_engine('sqlite:///questions.db', echo=True)
-
-# Создаем фабрику сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Создаем все таблицы
-Base.metadata.create_all(bind=engine)
+def __getattr__(name: str):
+    """Совместимость: models.engine создается при первом обращении"""
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def get_db():
-    """Получает сессию базы данных"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # Экспортируем все модели
 __all__ = [
@@ -38,5 +33,16 @@ __all__ = [
     'TestAttempt',
     'UserAnswer',
     'QuestionType',
+    'OptionSnapshot',
+    'QuestionSnapshot',
+    'TestSnapshot',
+    'SNAPSHOT_CACHE',
+    'SCHEMA_VERSION',
+    'SessionLocal',
+    'bootstrap_schema',
+    'configure',
+    'dispose',
     'get_db',
+    'get_engine',
+    'get_session_factory',
 ]
@@ -0,0 +1,327 @@
+"""
+Векторная проверка ответов на тесты
+
+Ключ ответов строится из снимка теста (models.snapshot) в виде массивов
+NumPy по позициям вопросов. Пакет ответов проверяется целиком: маски
+выбранных вариантов (UserAnswer.selected_options) сравниваются с масками
+правильных вариантов одной операцией для всего пакета, числовые ответы - с
+допуском numeric_tolerance, текстовые - с правильными вариантами после
+нормализации.
+Баллы вопросов (Question.points) начисляются за полностью верный ответ,
+итог попытки (TestAttempt.score) - сумма баллов ее ответов.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .repository import TestRepository
+from .snapshot import TestSnapshot
+from .test import (
+    MAX_OPTIONS,
+    QuestionType,
+    TestAttempt,
+    UserAnswer,
+    ordinals_to_mask,
+)
+
+# Количество ответов, проверяемых и записываемых за один пакет
+DEFAULT_BATCH_SIZE = 5000
+
+# Коды типов вопросов в массиве ключа
+TYPE_CODES = {
+    QuestionType.SINGLE_CHOICE.value: 0,
+    QuestionType.MULTIPLE_CHOICE.value: 1,
+    QuestionType.TEXT.value: 2,
+    QuestionType.NUMERIC.value: 3,
+}
+_SINGLE, _MULTIPLE, _TEXT, _NUMERIC = range(4)
+
+# Запись баллов через executemany по таблицам, минуя пакетное обновление
+# ORM, которое для каждой строки заново собирает параметры
+_ANSWERS = UserAnswer.__table__
+_ATTEMPTS = TestAttempt.__table__
+_UPDATE_POINTS = (
+    update(_ANSWERS)
+    .where(_ANSWERS.c.id == bindparam("answer_id"))
+    .values(points_earned=bindparam("points"), updated_at=bindparam("now"))
+)
+_UPDATE_SCORE = (
+    update(_ATTEMPTS)
+    .where(_ATTEMPTS.c.id == bindparam("attempt_id"))
+    .values(score=bindparam("score"), updated_at=bindparam("now"))
+)
+
+# Запас на погрешность представления чисел с плавающей точкой
+NUMERIC_EPSILON = 1e-9
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Текстовый ответ без различий в регистре и пробелах"""
+    return " ".join((text or "").split()).casefold()
+
+
+class AnswerRow(NamedTuple):
+    """Ответ пользователя, подготовленный к проверке"""
+
+    id: int
+    attempt_id: int
+    question_id: int
+    selected_options: Optional[int]
+    text_answer: Optional[str]
+    numeric_answer: Optional[float]
+
+
+class AnswerKey:
+    """Ключ ответов теста в виде массивов по позициям вопросов"""
+
+    def __init__(self, snapshot: TestSnapshot) -> None:
+        questions = snapshot.questions
+        self.test_id = snapshot.id
+        self.positions = {question.id: i for i, question in enumerate(questions)}
+        self.types = np.array(
+            [TYPE_CODES.get(question.type, -1) for question in questions], dtype=np.int8
+        )
+        self.points = np.array([question.points for question in questions], dtype=float)
+        self.numeric = np.array(
+            [
+                np.nan if q.correct_numeric_answer is None else q.correct_numeric_answer
+                for q in questions
+            ],
+            dtype=float,
+        )
+        self.tolerance = np.array(
+            [q.numeric_tolerance or 0.0 for q in questions], dtype=float
+        )
+
+        # Маска правильных вариантов: бит i - i-й вариант вопроса
+        correct = []
+        self.texts: List[frozenset] = []
+        for question in questions:
+            if len(question.options) > MAX_OPTIONS:
+                raise ValueError(
+                    f"В вопросе {question.id} больше {MAX_OPTIONS} вариантов ответа"
+                )
+            correct.append(
+                ordinals_to_mask(
+                    i for i, option in enumerate(question.options) if option.is_correct
+                )
+            )
+            self.texts.append(
+                frozenset(
+                    normalize_text(o.text) for o in question.options if o.is_correct
+                )
+            )
+        self.correct_masks = np.array(correct, dtype=np.int64)
+
+    def grade(self, answers: Sequence[AnswerRow]) -> np.ndarray:
+        """
+        Баллы за каждый ответ пакета
+
+        Returns:
+            Массив баллов в порядке answers; ответы на вопросы не из этого
+            теста получают 0
+        """
+        count = len(answers)
+        if count == 0:
+            return np.zeros(0)
+        positions = np.fromiter(
+            (self.positions.get(a.question_id, -1) for a in answers), np.int64, count
+        )
+        known = positions >= 0
+        q = np.where(known, positions, 0)
+        types = np.where(known, self.types[q], -1)
+
+        masks = np.fromiter((a.selected_options or 0 for a in answers), np.int64, count)
+        choice_ok = (
+            ((types == _SINGLE) | (types == _MULTIPLE))
+            & (masks != 0)
+            & (masks == self.correct_masks[q])
+        )
+
+        values = np.fromiter(
+            (np.nan if a.numeric_answer is None else a.numeric_answer for a in answers),
+            float,
+            count,
+        )
+        with np.errstate(invalid="ignore"):
+            numeric_ok = (types == _NUMERIC) & (
+                np.abs(values - self.numeric[q]) <= self.tolerance[q] + NUMERIC_EPSILON
+            )
+
+        text_rows = np.flatnonzero(types == _TEXT)
+        text_ok = np.zeros(count, dtype=bool)
+        text_ok[text_rows] = [
+            normalize_text(answers[i].text_answer) in self.texts[q[i]]
+            for i in text_rows
+        ]
+
+        return np.where(choice_ok | numeric_ok | text_ok, self.points[q], 0.0)
+
+
+def attempt_totals(
+    attempt_ids: np.ndarray, points: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Суммы баллов по попыткам: (id попыток, суммы)"""
+    attempts, inverse = np.unique(attempt_ids, return_inverse=True)
+    return attempts, np.bincount(inverse, weights=points, minlength=len(attempts))
+
+
+async def _grade_answers(
+    session: AsyncSession,
+    key: AnswerKey,
+    attempt_ids: Sequence[int],
+    batch_size: int,
+) -> Dict[int, float]:
+    """
+    Проверка ответов попыток пакетами по возрастанию id
+
+    Баллы ответов записываются пакетным UPDATE по первичному ключу, без
+    фиксации транзакции.
+
+    Returns:
+        Сумма баллов по id попытки
+    """
+    totals = dict.fromkeys(attempt_ids, 0.0)
+    columns = (
+        UserAnswer.id,
+        UserAnswer.attempt_id,
+        UserAnswer.question_id,
+        UserAnswer.selected_options,
+        UserAnswer.text_answer,
+        UserAnswer.numeric_answer,
+    )
+    # Попытки передаются в запрос частями, чтобы не упереться в лимит
+    # параметров SQLite
+    chunks = [
+        list(attempt_ids[i : i + batch_size])
+        for i in range(0, len(attempt_ids), batch_size)
+    ]
+    for chunk in chunks:
+        last_id = 0
+        while True:
+            result = await session.execute(
+                select(*columns)
+                .where(UserAnswer.attempt_id.in_(chunk), UserAnswer.id > last_id)
+                .order_by(UserAnswer.id)
+                .limit(batch_size)
+            )
+            answers = [AnswerRow(*row) for row in result]
+            if not answers:
+                break
+            last_id = answers[-1].id
+
+            points = key.grade(answers)
+            now = datetime.utcnow()
+            await session.execute(
+                _UPDATE_POINTS,
+                [
+                    {"answer_id": answer.id, "points": earned, "now": now}
+                    for answer, earned in zip(answers, points.tolist())
+                ],
+            )
+            attempts, sums = attempt_totals(
+                np.fromiter((a.attempt_id for a in answers), np.int64, len(answers)),
+                points,
+            )
+            for attempt_id, total in zip(attempts.tolist(), sums.tolist()):
+                totals[attempt_id] += total
+    return totals
+
+
+async def _write_scores(session: AsyncSession, totals: Dict[int, float]) -> None:
+    """Пакетная запись итогов попыток"""
+    if totals:
+        now = datetime.utcnow()
+        await session.execute(
+            _UPDATE_SCORE,
+            [
+                {"attempt_id": attempt_id, "score": score, "now": now}
+                for attempt_id, score in totals.items()
+            ],
+        )
+
+
+async def grade_attempts(
+    session: AsyncSession,
+    attempt_ids: Iterable[int],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[int, float]:
+    """
+    Проверка ответов указанных попыток и запись баллов
+
+    Args:
+        session: Асинхронная сессия
+        attempt_ids: id попыток (могут относиться к разным тестам)
+        batch_size: Количество ответов в одном пакете
+
+    Returns:
+        Итоговый балл по id попытки
+    """
+    try:
+        result = await session.execute(
+            select(TestAttempt.id, TestAttempt.test_id).where(
+                TestAttempt.id.in_(list(attempt_ids))
+            )
+        )
+        by_test: Dict[int, List[int]] = {}
+        for attempt_id, test_id in result:
+            by_test.setdefault(test_id, []).append(attempt_id)
+
+        tests = TestRepository(session)
+        scores: Dict[int, float] = {}
+        for test_id, ids in by_test.items():
+            snapshot = await tests.get_snapshot(test_id)
+            if snapshot is None:
+                continue
+            totals = await _grade_answers(
+                session, AnswerKey(snapshot), sorted(ids), batch_size
+            )
+            await _write_scores(session, totals)
+            scores.update(totals)
+        await session.commit()
+        return scores
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error(f"Error grading attempts: {e}")
+        raise
+
+
+async def regrade_test(
+    session: AsyncSession, test_id: int, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """
+    Повторная проверка всех попыток теста по текущему ключу ответов
+
+    Вся перепроверка выполняется одной транзакцией.
+
+    Returns:
+        Количество перепроверенных попыток
+    """
+    try:
+        # Ключ читается из базы: снимок в кеше может быть старше исправления
+        snapshot = await TestRepository(session).get_snapshot(test_id, refresh=True)
+        if snapshot is None:
+            raise ValueError(f"Тест {test_id} не найден")
+        result = await session.execute(
+            select(TestAttempt.id)
+            .where(TestAttempt.test_id == test_id)
+            .order_by(TestAttempt.id)
+        )
+        attempt_ids = list(result.scalars())
+        totals = await _grade_answers(
+            session, AnswerKey(snapshot), attempt_ids, batch_size
+        )
+        await _write_scores(session, totals)
+        await session.commit()
+        logger.info(f"Тест {test_id} перепроверен: {len(attempt_ids)} попыток")
+        return len(attempt_ids)
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.error(f"Error regrading test {test_id}: {e}")
+        raise
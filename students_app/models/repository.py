@@ -1,15 +1,35 @@
 """
 Базовый класс репозитория для работы с данными
 """
-from typing import TypeVar, Generic, Optional, List, Type
+from datetime import datetime
+from itertools import islice
+from typing import (Any, AsyncIterator, Dict, Generic, Iterable, Iterator, List,
+                    Optional, Sequence, Type, TypeVar)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update
+from sqlalchemy import insert, select, delete, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 from loguru import logger
 from models.base import Base
+from models.snapshot import SNAPSHOT_CACHE, SnapshotCache, TestSnapshot, build_snapshot
+from models.test import Question, Test
 
 T = TypeVar('T', bound=Base)
 
+# Количество строк в одном пакетном запросе
+DEFAULT_BATCH_SIZE = 500
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Разбиение строк на пакеты по size штук"""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
 class Repository(Generic[T]):
     def __init__(self, session: AsyncSession, model: Type[T]):
         self.session = session
@@ -47,6 +67,121 @@ class Repository(Generic[T]):
             logger.error(f"Error adding {self.model.__name__}: {e}")
             raise
 
+    async def add_many(self, rows: Iterable[Dict[str, Any]],
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Добавить много объектов одной транзакцией
+
+        Каждый пакет отправляется одним INSERT через executemany, значения по
+        умолчанию колонок подставляются как при add.
+
+        Args:
+            rows: Словари значений колонок
+            batch_size: Количество строк в одном запросе
+
+        Returns:
+            Количество добавленных строк
+        """
+        count = 0
+        try:
+            for batch in _batches(rows, batch_size):
+                await self.session.execute(insert(self.model), batch)
+                count += len(batch)
+            await self.session.commit()
+            return count
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error adding {self.model.__name__}s: {e}")
+            raise
+
+    async def upsert_many(self, rows: Iterable[Dict[str, Any]],
+                          index_elements: Sequence[str] = ('id',),
+                          update_columns: Optional[Sequence[str]] = None,
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Добавить или обновить объекты через INSERT ... ON CONFLICT DO UPDATE
+
+        Args:
+            rows: Словари значений колонок
+            index_elements: Колонки уникального ключа, по которому ищется конфликт
+            update_columns: Обновляемые при конфликте колонки; по умолчанию все
+                переданные, кроме ключа
+            batch_size: Количество строк в одном запросе
+
+        Returns:
+            Количество обработанных строк
+        """
+        table = self.model.__table__
+        count = 0
+        try:
+            for batch in _batches(rows, batch_size):
+                stmt = sqlite_insert(table)
+                columns = update_columns or [
+                    key for key in batch[0] if key not in index_elements
+                ]
+                set_ = {column: stmt.excluded[column] for column in columns}
+                # onupdate колонок не применяется к ON CONFLICT DO UPDATE
+                if 'updated_at' in table.c and 'updated_at' not in set_:
+                    set_['updated_at'] = datetime.utcnow()
+                stmt = (
+                    stmt.on_conflict_do_update(index_elements=list(index_elements), set_=set_)
+                    if set_ else stmt.on_conflict_do_nothing(index_elements=list(index_elements))
+                )
+                await self.session.execute(stmt, batch)
+                count += len(batch)
+            await self.session.commit()
+            return count
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error upserting {self.model.__name__}s: {e}")
+            raise
+
+    async def bulk_update(self, rows: Iterable[Dict[str, Any]],
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Обновить много объектов по первичному ключу одной транзакцией
+
+        Args:
+            rows: Словари значений колонок, в каждом есть первичный ключ
+            batch_size: Количество строк в одном запросе
+
+        Returns:
+            Количество обработанных строк
+        """
+        has_updated_at = 'updated_at' in self.model.__table__.c
+        count = 0
+        try:
+            for batch in _batches(rows, batch_size):
+                if has_updated_at:
+                    now = datetime.utcnow()
+                    batch = [{'updated_at': now, **row} for row in batch]
+                await self.session.execute(update(self.model), batch)
+                count += len(batch)
+            await self.session.commit()
+            return count
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error bulk updating {self.model.__name__}s: {e}")
+            raise
+
+    async def stream_all(self, batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[T]:
+        """
+        Перебрать все объекты, читая их из базы пакетами
+
+        В памяти одновременно находится не больше batch_size строк результата.
+        """
+        try:
+            result = await self.session.stream_scalars(
+                select(self.model)
+                .order_by(self.model.id)
+                .execution_options(yield_per=batch_size)
+            )
+            async for item in result:
+                yield item
+        except SQLAlchemyError as e:
+            logger.error(f"Error streaming {self.model.__name__}s: {e}")
+            raise
+
     async def update(self, id: int, values: dict) -> Optional[T]:
         """Обновить объект"""
         try:
@@ -86,3 +221,54 @@ class Repository(Generic[T]):
         except SQLAlchemyError as e:
             logger.error(f"Error checking existence of {self.model.__name__} {id}: {e}")
             raise
+
+
+class TestRepository(Repository[Test]):
+    """Репозиторий тестов со снимками для прохождения"""
+
+    def __init__(self, session: AsyncSession, cache: SnapshotCache = SNAPSHOT_CACHE):
+        super().__init__(session, Test)
+        self.cache = cache
+
+    async def load_graph(self, test_id: int, refresh: bool = False) -> Optional[Test]:
+        """
+        Загрузить тест с вопросами и вариантами ответов
+
+        selectinload загружает граф тремя запросами независимо от количества
+        вопросов, вместо отдельного запроса на каждый вопрос. С refresh
+        объекты, уже загруженные в сессию, перечитываются из базы.
+        """
+        try:
+            result = await self.session.execute(
+                select(Test)
+                .where(Test.id == test_id)
+                .options(selectinload(Test.questions).selectinload(Question.options))
+                .execution_options(populate_existing=refresh)
+            )
+            return result.scalar_one_or_none()
+        except SQLAlchemyError as e:
+            logger.error(f"Error loading test graph {test_id}: {e}")
+            raise
+
+    async def get_snapshot(self, test_id: int,
+                           refresh: bool = False) -> Optional[TestSnapshot]:
+        """
+        Снимок теста из кеша; при промахе граф загружается из базы
+
+        Args:
+            test_id: ID теста
+            refresh: Загрузить граф из базы мимо кеша и заменить им снимок
+                в кеше (например, перед перепроверкой по исправленному ключу)
+        """
+        if refresh:
+            self.cache.invalidate([test_id])
+        else:
+            snapshot = self.cache.get(test_id)
+            if snapshot is not None:
+                return snapshot
+
+        generation = self.cache.generation(test_id)
+        test = await self.load_graph(test_id, refresh)
+        if test is None:
+            return None
+        return self.cache.put(build_snapshot(test), generation)
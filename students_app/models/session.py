@@ -0,0 +1,189 @@
+"""
+Ленивое подключение моделей к базе данных
+
+Движок и фабрика сессий создаются при первом обращении, а не при импорте
+пакета models. Таблицы создаются отдельным шагом bootstrap_schema, который
+выполняет DDL только если версия схемы в PRAGMA user_version отличается от
+SCHEMA_VERSION.
+"""
+
+import json
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from loguru import logger
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .base import Base
+from .test import options_to_mask
+
+DEFAULT_DATABASE_URL = "sqlite:///questions.db"
+
+# Версия схемы моделей: увеличивается при изменении таблиц
+# 1 - начальная схема
+# 2 - useranswer.selected_options: INTEGER-маска вместо JSON-списка id вариантов
+SCHEMA_VERSION = 2
+
+_lock = threading.RLock()
+_database_url = DEFAULT_DATABASE_URL
+_echo = False
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_bootstrapped = False
+
+
+def configure(database_url: Optional[str] = None, echo: Optional[bool] = None) -> None:
+    """
+    Настройка подключения до первого обращения к базе
+
+    Args:
+        database_url: URL базы данных
+        echo: Выводить SQL-запросы в лог (включается флагом --debug)
+    """
+    global _database_url, _echo
+    with _lock:
+        if database_url is not None and database_url != _database_url:
+            dispose()
+            _database_url = database_url
+        if echo is not None:
+            _echo = echo
+            if _engine is not None:
+                _engine.echo = echo
+
+
+def get_engine() -> Engine:
+    """Движок базы данных; создается при первом вызове"""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = create_engine(_database_url, echo=_echo)
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """Фабрика сессий; создается при первом вызове"""
+    global _session_factory
+    if _session_factory is None:
+        with _lock:
+            if _session_factory is None:
+                _session_factory = sessionmaker(
+                    autocommit=False, autoflush=False, bind=get_engine()
+                )
+    return _session_factory
+
+
+def bootstrap_schema(force: bool = False) -> bool:
+    """
+    Создание таблиц моделей, если схема базы устарела
+
+    Версия схемы хранится в PRAGMA user_version, поэтому DDL выполняется один
+    раз на версию, а не при каждом запуске приложения.
+
+    Args:
+        force: Выполнить create_all независимо от версии
+
+    Returns:
+        True, если таблицы создавались
+    """
+    global _bootstrapped
+    with _lock:
+        if _bootstrapped and not force:
+            return False
+        engine = get_engine()
+        with engine.begin() as connection:
+            version = connection.execute(text("PRAGMA user_version")).scalar()
+            created = force or version != SCHEMA_VERSION
+            if created:
+                Base.metadata.create_all(bind=connection)
+                _convert_selected_options(connection)
+                connection.execute(text(f"PRAGMA user_version = {int(SCHEMA_VERSION)}"))
+                logger.info(
+                    f"Схема моделей обновлена: версия {version} -> {SCHEMA_VERSION}"
+                )
+        _bootstrapped = True
+        return created
+
+
+def _convert_selected_options(connection: Connection) -> int:
+    """
+    Перевод useranswer.selected_options из JSON в INTEGER-маску
+
+    Ранее столбец хранил JSON-список id выбранных вариантов. Маска строится
+    по порядку вариантов вопроса (по id), как в Question.selection_mask;
+    столбец пересоздается с типом INTEGER.
+
+    Returns:
+        Количество преобразованных ответов
+    """
+    columns = {
+        row[1]: row[2].upper()
+        for row in connection.execute(text("PRAGMA table_info(useranswer)"))
+    }
+    if columns.get("selected_options", "INTEGER") == "INTEGER":
+        return 0
+
+    option_ids: Dict[int, List[int]] = {}
+    for question_id, option_id in connection.execute(
+        text("SELECT question_id, id FROM questionoption ORDER BY question_id, id")
+    ):
+        option_ids.setdefault(question_id, []).append(option_id)
+
+    masks = []
+    for answer_id, question_id, value in connection.execute(
+        text(
+            "SELECT id, question_id, selected_options FROM useranswer "
+            "WHERE selected_options IS NOT NULL"
+        )
+    ):
+        selected = json.loads(value) if isinstance(value, str) else value
+        if isinstance(selected, int):
+            selected = [selected]
+        ordered = option_ids.get(question_id, [])
+        known = [option_id for option_id in selected if option_id in ordered]
+        if len(known) != len(selected):
+            logger.warning(
+                f"Ответ {answer_id}: варианты {sorted(set(selected) - set(known))} "
+                f"не относятся к вопросу {question_id} и отброшены"
+            )
+        masks.append({"id": answer_id, "mask": options_to_mask(known, ordered)})
+
+    connection.execute(text("ALTER TABLE useranswer ADD COLUMN selected_mask INTEGER"))
+    if masks:
+        connection.execute(
+            text("UPDATE useranswer SET selected_mask = :mask WHERE id = :id"), masks
+        )
+    connection.execute(text("ALTER TABLE useranswer DROP COLUMN selected_options"))
+    connection.execute(
+        text("ALTER TABLE useranswer RENAME COLUMN selected_mask TO selected_options")
+    )
+    logger.info(f"Ответы переведены на маски выбранных вариантов: {len(masks)}")
+    return len(masks)
+
+
+def SessionLocal() -> Session:
+    """Новая сессия; при первом вызове подготавливает схему"""
+    bootstrap_schema()
+    return get_session_factory()()
+
+
+def get_db() -> Iterator[Session]:
+    """Получает сессию базы данных"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def dispose() -> None:
+    """Закрытие движка; следующее обращение создаст его заново"""
+    global _engine, _session_factory, _bootstrapped
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
+        _bootstrapped = False
@@ -0,0 +1,218 @@
+"""
+Неизменяемые снимки тестов и их кеш
+
+Снимок содержит тест со всеми вопросами и вариантами ответов в виде
+вложенных NamedTuple: его можно отдавать всем студентам одновременно и
+сериализовать в JSON через to_dict. Кеш хранит снимок по id теста и
+сбрасывает его, когда тест, его вопросы или варианты меняются через ORM.
+Пакетные INSERT, UPDATE и DELETE этих таблиц (методы Repository) идут
+мимо flush, поэтому они сбрасывают все снимки: при выполнении запроса и
+еще раз при фиксации или откате транзакции.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .test import Question, QuestionOption, Test
+
+
+class OptionSnapshot(NamedTuple):
+    """Вариант ответа"""
+
+    id: int
+    text: str
+    is_correct: bool
+
+
+class QuestionSnapshot(NamedTuple):
+    """Вопрос с вариантами ответов"""
+
+    id: int
+    text: str
+    type: str
+    points: float
+    correct_numeric_answer: Optional[float]
+    numeric_tolerance: Optional[float]
+    options: Tuple[OptionSnapshot, ...]
+
+
+class TestSnapshot(NamedTuple):
+    """Тест со всеми вопросами"""
+
+    id: int
+    title: str
+    description: Optional[str]
+    duration_minutes: int
+    passing_score: float
+    questions: Tuple[QuestionSnapshot, ...]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Словарь для сериализации в JSON"""
+        data = self._asdict()
+        data["questions"] = [
+            {**question._asdict(), "options": [o._asdict() for o in question.options]}
+            for question in self.questions
+        ]
+        return data
+
+
+def build_snapshot(test: Test) -> TestSnapshot:
+    """Снимок теста с уже загруженными вопросами и вариантами"""
+    return TestSnapshot(
+        id=test.id,
+        title=test.title,
+        description=test.description,
+        duration_minutes=test.duration_minutes,
+        passing_score=test.passing_score,
+        questions=tuple(
+            QuestionSnapshot(
+                id=question.id,
+                text=question.text,
+                type=getattr(question.type, "value", question.type),
+                points=question.points,
+                correct_numeric_answer=question.correct_numeric_answer,
+                numeric_tolerance=question.numeric_tolerance,
+                options=tuple(
+                    OptionSnapshot(option.id, option.text, option.is_correct)
+                    for option in sorted(question.options, key=lambda o: o.id)
+                ),
+            )
+            for question in sorted(test.questions, key=lambda q: q.id)
+        ),
+    )
+
+
+# Все кеши снимков: изменения через ORM сбрасывают каждый из них
+_CACHES: "weakref.WeakSet[SnapshotCache]" = weakref.WeakSet()
+
+
+class SnapshotCache:
+    """Кеш снимков тестов по id"""
+
+    def __init__(self) -> None:
+        self._snapshots: Dict[int, TestSnapshot] = {}
+        # Поколение растет при каждом сбросе: снимок, загрузка которого
+        # началась до сброса, в кеш не попадает
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        _CACHES.add(self)
+
+    def get(self, test_id: int) -> Optional[TestSnapshot]:
+        """Снимок из кеша"""
+        with self._lock:
+            return self._snapshots.get(test_id)
+
+    def generation(self, test_id: int) -> Tuple[int, int]:
+        """Метка состояния кеша для теста перед загрузкой снимка"""
+        with self._lock:
+            return self._epoch, self._generations.get(test_id, 0)
+
+    def put(
+        self, snapshot: TestSnapshot, generation: Optional[Tuple[int, int]] = None
+    ) -> TestSnapshot:
+        """
+        Сохранение снимка
+
+        Args:
+            snapshot: Снимок теста
+            generation: Метка, полученная до загрузки; если тест с тех пор
+                сбрасывался, снимок устарел и не сохраняется
+
+        Returns:
+            Снимок из кеша (уже сохраненный другим вызовом или переданный)
+        """
+        with self._lock:
+            current = (self._epoch, self._generations.get(snapshot.id, 0))
+            if generation is not None and generation != current:
+                return snapshot
+            return self._snapshots.setdefault(snapshot.id, snapshot)
+
+    def invalidate(self, test_ids: Iterable[int]) -> None:
+        """Сброс снимков указанных тестов"""
+        with self._lock:
+            for test_id in test_ids:
+                self._snapshots.pop(test_id, None)
+                self._generations[test_id] = self._generations.get(test_id, 0) + 1
+
+    def clear(self) -> None:
+        """Сброс всех снимков"""
+        with self._lock:
+            self._snapshots.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._snapshots)
+
+
+SNAPSHOT_CACHE = SnapshotCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_tests(session: Session, flush_context: Any) -> None:
+    """Сброс снимков тестов, измененных в сессии"""
+    test_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Test):
+            test_ids.add(obj.id)
+        elif isinstance(obj, Question):
+            test_ids.add(obj.test_id)
+            # Вопрос мог перейти из другого теста
+            test_ids.update(inspect(obj).attrs.test_id.history.deleted or ())
+        elif isinstance(obj, QuestionOption):
+            question = obj.__dict__.get("question")
+            if question is None:
+                # Тест варианта неизвестен без запроса к базе
+                for cache in list(_CACHES):
+                    cache.clear()
+                return
+            test_ids.add(question.test_id)
+    if test_ids:
+        for cache in list(_CACHES):
+            cache.invalidate(test_ids)
+
+
+# Таблицы, из которых строятся снимки
+_SNAPSHOT_TABLES = frozenset(
+    model.__tablename__ for model in (Test, Question, QuestionOption)
+)
+
+# Флаг в Session.info: в транзакции были пакетные изменения этих таблиц
+_BULK_WRITE_KEY = "snapshot_bulk_write"
+
+
+def _clear_caches() -> None:
+    for cache in list(_CACHES):
+        cache.clear()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state: Any) -> None:
+    """Сброс снимков при пакетном изменении тестов, вопросов или вариантов"""
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if getattr(table, "name", None) not in _SNAPSHOT_TABLES:
+        return
+    _clear_caches()
+    # До фиксации другие сессии еще читают прежние данные и могут снова
+    # положить в кеш старый снимок
+    orm_execute_state.session.info[_BULK_WRITE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_after_bulk_write(session: Session) -> None:
+    """Повторный сброс снимков по завершении транзакции с пакетной записью"""
+    if session.info.pop(_BULK_WRITE_KEY, False):
+        _clear_caches()
@@ -3,11 +3,11 @@
 """
 
 from enum import Enum
-from typing import List
+from typing import Iterable, List, Optional, Sequence
 
-from sqlalchemy import (Column, Enum as SQLEnum, ForeignKey, Integer, String,
-                       Text, Float)
-from sqlalchemy.orm import relationship
+from sqlalchemy import (Boolean, Column, DateTime, Enum as SQLEnum,
+                        ForeignKey, Integer, String, Text, Float)
+from sqlalchemy.orm import relationship, validates
 
 from .base import Base
 
@@ -20,6 +20,47 @@ class QuestionType(str, Enum):
     NUMERIC = "numeric"  # Числовой ответ с погрешностью
 
 
+# Максимальное количество вариантов в вопросе: биты 0..62 маски выбора
+# помещаются в знаковое 64-битное INTEGER SQLite
+MAX_OPTIONS = 63
+
+
+def ordinals_to_mask(ordinals: Iterable[int]) -> int:
+    """Битовая маска по порядковым номерам вариантов (с нуля)"""
+    mask = 0
+    for ordinal in ordinals:
+        if not 0 <= ordinal < MAX_OPTIONS:
+            raise ValueError(f"Номер варианта вне диапазона 0..{MAX_OPTIONS - 1}: {ordinal}")
+        mask |= 1 << ordinal
+    return mask
+
+
+def mask_to_ordinals(mask: Optional[int]) -> List[int]:
+    """Порядковые номера вариантов, отмеченных в маске"""
+    return [ordinal for ordinal in range(MAX_OPTIONS) if (mask or 0) >> ordinal & 1]
+
+
+def options_to_mask(option_ids: Iterable[int], ordered_ids: Sequence[int]) -> int:
+    """
+    Битовая маска выбранных вариантов
+
+    Args:
+        option_ids: id выбранных вариантов
+        ordered_ids: id всех вариантов вопроса в порядке Question.options
+    """
+    positions = {option_id: ordinal for ordinal, option_id in enumerate(ordered_ids)}
+    try:
+        return ordinals_to_mask(positions[option_id] for option_id in option_ids)
+    except KeyError as e:
+        raise ValueError(f"Вариант {e.args[0]} не относится к вопросу") from None
+
+
+def mask_to_options(mask: Optional[int], ordered_ids: Sequence[int]) -> List[int]:
+    """id вариантов, отмеченных в маске"""
+    return [ordered_ids[ordinal] for ordinal in mask_to_ordinals(mask)
+            if ordinal < len(ordered_ids)]
+
+
 class Test(Base):
     """Модель теста"""
 
@@ -49,7 +90,17 @@ class Question(Base):
 
     # Отношения
     test = relationship("Test", back_populates="questions")
-    options = relationship("QuestionOption", back_populates="question", cascade="all, delete-orphan")
+    # Порядок вариантов задает номера битов в UserAnswer.selected_options
+    options = relationship("QuestionOption", back_populates="question", cascade="all, delete-orphan",
+                           order_by="QuestionOption.id")
+
+    def selection_mask(self, option_ids: Iterable[int]) -> int:
+        """Маска выбора по id вариантов этого вопроса"""
+        return options_to_mask(option_ids, [option.id for option in self.options])
+
+    def selected_option_ids(self, mask: Optional[int]) -> List[int]:
+        """id вариантов этого вопроса, отмеченных в маске"""
+        return mask_to_options(mask, [option.id for option in self.options])
 
 
 class QuestionOption(Base):
@@ -87,8 +138,9 @@ class UserAnswer(Base):
     attempt_id = Column(Integer, ForeignKey('testattempt.id'), nullable=False)
     question_id = Column(Integer, ForeignKey('question.id'), nullable=False)
 
-    # Для вопросов с выбором
-    selected_options = Column(ARRAY(Integer), nullable=True)  # ID выбранных вариантов
+    # Для вопросов с выбором: битовая маска по порядковым номерам вариантов
+    # вопроса (бит i - вариант Question.options[i])
+    selected_options = Column(Integer, nullable=True)
 
     # Для текстовых и числовых вопросов
     text_answer = Column(Text, nullable=True)
@@ -99,3 +151,10 @@ class UserAnswer(Base):
     # Отношения
     attempt = relationship("TestAttempt", back_populates="answers")
     question = relationship("Question")
+
+    @validates('selected_options')
+    def validate_selected_options(self, key: str, mask: Optional[int]) -> Optional[int]:
+        """Проверяет, что маска выбора помещается в MAX_OPTIONS бит"""
+        if mask is not None and not 0 <= mask < 1 << MAX_OPTIONS:
+            raise ValueError("Некорректная маска выбранных вариантов")
+        return mask
@@ -0,0 +1,121 @@
+"""Тесты резервного копирования базы данных"""
+
+import asyncio
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from utils.backup import backup_database, restore_gzip_backup
+from utils.db import DatabaseManager
+
+
+class TestBackupDatabase(unittest.TestCase):
+    """Тесты копирования через backup API"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.tmp_dir, "results.db")
+        conn = sqlite3.connect(self.source)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.executemany(
+            "INSERT INTO results (payload) VALUES (?)",
+            [("x" * 500,) for _ in range(2000)],
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def count_rows(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_progress_by_steps(self):
+        """Копирование идет шагами и сообщает о ходе"""
+        steps = []
+        target = backup_database(
+            self.source,
+            os.path.join(self.tmp_dir, "copy.db"),
+            pages=16,
+            pause=0,
+            progress=steps.append,
+        )
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(
+            [step.copied for step in steps], sorted(s.copied for s in steps)
+        )
+        self.assertEqual(steps[-1].copied, steps[-1].total)
+        self.assertEqual(steps[-1].percent, 100.0)
+        self.assertEqual(self.count_rows(target), 2000)
+        self.assertFalse(os.path.exists(target + ".part"))
+
+    def test_writers_are_not_blocked(self):
+        """Писатель фиксирует транзакции во время копирования"""
+        written = []
+        stop = threading.Event()
+
+        def writer():
+            conn = sqlite3.connect(self.source, timeout=1)
+            while not stop.is_set():
+                conn.execute("INSERT INTO results (payload) VALUES ('new')")
+                conn.commit()
+                written.append(1)
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            target = backup_database(
+                self.source, os.path.join(self.tmp_dir, "copy.db"), pages=8
+            )
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertTrue(written)
+        # Копия согласована: в ней исходные строки и часть новых целиком
+        self.assertGreaterEqual(self.count_rows(target), 2000)
+
+    def test_gzip_output(self):
+        """Сжатая копия распаковывается в рабочую базу"""
+        target = backup_database(
+            self.source, os.path.join(self.tmp_dir, "copy.db"), compress=True
+        )
+        self.assertTrue(target.endswith(".db.gz"))
+        with gzip.open(target, "rb") as packed:
+            self.assertEqual(packed.read(16), b"SQLite format 3\x00")
+        restored = restore_gzip_backup(target, os.path.join(self.tmp_dir, "r.db"))
+        self.assertEqual(self.count_rows(restored), 2000)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir))[:2], ["copy.db.gz", "r.db"])
+
+    def test_missing_source(self):
+        """Отсутствующая база не создается пустой копией"""
+        with self.assertRaises(FileNotFoundError):
+            backup_database(
+                os.path.join(self.tmp_dir, "missing.db"),
+                os.path.join(self.tmp_dir, "copy.db"),
+            )
+
+    def test_database_manager_backup(self):
+        """DatabaseManager.create_backup использует backup API"""
+        manager = DatabaseManager(f"sqlite+aiosqlite:///{self.source}")
+        backup_dir = os.path.join(self.tmp_dir, "backups")
+        path = asyncio.run(manager.create_backup(backup_dir, compress=True))
+        self.assertTrue(path.startswith(backup_dir) and path.endswith(".db.gz"))
+        self.assertEqual(os.listdir(backup_dir), [os.path.basename(path)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Тесты соединений SQLite, закрепленных за потоками"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from utils import connection_manager
+from utils.connection_manager import ConnectionManager, get_manager
+from utils.database import Database
+from utils.student_db import StudentDB
+
+
+class TestConnectionManager(unittest.TestCase):
+    """Тесты менеджера соединений"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "app.db")
+        self.manager = ConnectionManager(self.db_path)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.manager.close_all()
+        connection_manager.close_all()
+        shutil.rmtree(self.tmp_dir)
+
+    def _in_thread(self, func):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(func()))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_connection_per_thread(self):
+        """Поток получает одно и то же соединение, другой поток - свое"""
+        conn = self.manager.get()
+        self.assertIs(self.manager.get(), conn)
+        self.assertIsNot(self._in_thread(self.manager.get), conn)
+
+    def test_pragmas(self):
+        """Новое соединение настраивается"""
+        conn = self.manager.get()
+
+        def pragma(name):
+            return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+        self.assertEqual(pragma("journal_mode"), "wal")
+        self.assertEqual(pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(pragma("temp_store"), 2)  # MEMORY
+        self.assertEqual(pragma("cache_size"), -8000)
+        self.assertEqual(pragma("busy_timeout"), 5000)
+
+    def test_dead_threads_closed(self):
+        """Соединения завершившихся потоков закрываются"""
+        conn = self._in_thread(self.manager.get)
+        self.manager.get()
+        self.assertEqual(self.manager.stats(), {"open": 1, "opened": 2})
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    def test_close(self):
+        """После close_all соединения закрыты, а менеджер открывает новые"""
+        conn = self.manager.get()
+        self.manager.close_all()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        self.assertEqual(self.manager.get().execute("SELECT 1").fetchone(), (1,))
+
+        self.manager.close_thread()
+        self.assertEqual(self.manager.stats()["open"], 0)
+
+    def test_with_block(self):
+        """Блок with фиксирует или откатывает транзакцию, не закрывая соединение"""
+        with self.manager.get() as conn:
+            conn.execute("CREATE TABLE items (value INTEGER)")
+            conn.execute("INSERT INTO items VALUES (1)")
+        with self.assertRaises(ZeroDivisionError):
+            with self.manager.get() as conn:
+                conn.execute("INSERT INTO items VALUES (2)")
+                1 / 0
+        count = self.manager.get().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_shared_manager(self):
+        """Классы доступа к базе используют общий менеджер файла"""
+        students = StudentDB(self.db_path)
+        self.assertIs(students.connections, get_manager(self.db_path))
+        for _ in range(5):
+            students.find_student("Иван", "Иванов", "ПС4-51")
+        self.assertEqual(students.connections.stats()["opened"], 1)
+
+        database = Database(os.path.join(self.tmp_dir, "visits.db"))
+        database.add_student("ПС4-51", "Иван Иванов", "2024-01-01")
+        self.assertEqual(len(database.get_all_students()), 1)
+        self.assertEqual(database.connections.stats()["opened"], 1)
+
+    def test_instance_close_keeps_shared_connections(self):
+        """Закрытие одного объекта не закрывает соединения других"""
+        first = StudentDB(self.db_path)
+        second = StudentDB(self.db_path)
+        opened = threading.Event()
+        closed = threading.Event()
+        errors = []
+
+        def query():
+            try:
+                conn = second.get_connection()
+                second.find_student("Иван", "Иванов", "ПС4-51")
+                opened.set()
+                closed.wait(5)
+                self.assertIs(second.get_connection(), conn)
+                second.find_student("Иван", "Иванов", "ПС4-51")
+            except Exception as e:
+                errors.append(e)
+                opened.set()
+
+        thread = threading.Thread(target=query)
+        thread.start()
+        opened.wait(5)
+        try:
+            first.close()
+        finally:
+            closed.set()
+            thread.join()
+        self.assertEqual(errors, [])
+
+        # Объект в том же потоке получает новое соединение
+        self.assertIsNone(second.find_student("Иван", "Иванов", "ПС4-51"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -72,6 +72,7 @@ class TestCore(unittest.TestCase):
     def tearDown(self):
         """Очистка после тестов"""
         self.db.clear_all()
+        self.db.close()
         # Удаляем тестовую базу данных
         if os.path.exists('test.db'):
             os.remove('test.db')
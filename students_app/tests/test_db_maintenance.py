@@ -0,0 +1,180 @@
+"""Тесты планового обслуживания базы данных"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from database.db_manager import DatabaseManager as ResultsDatabaseManager
+from utils.db import DatabaseManager
+from utils.db_maintenance import AUTO_VACUUM_INCREMENTAL, MaintenanceScheduler
+
+
+class TestMaintenanceScheduler(unittest.TestCase):
+    """Тесты ANALYZE и инкрементальной очистки"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "maintenance.db")
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY, payload TEXT)")
+        self.conn.execute("CREATE INDEX ix_results_payload ON results (payload)")
+        self.fill(3000)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.conn.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def fill(self, count):
+        self.conn.executemany(
+            "INSERT INTO results (payload) VALUES (?)",
+            [(f"{i:06d}" + "x" * 400,) for i in range(count)],
+        )
+        self.conn.commit()
+
+    def pragma(self, name):
+        # Заголовок базы перечитывается соединением при следующем чтении
+        self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        return self.conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def scheduler(self, **options):
+        scheduler = MaintenanceScheduler(self.db_path, **options)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def test_analyze_after_write_threshold(self):
+        """ANALYZE выполняется только после заметного объема записей"""
+        scheduler = self.scheduler(write_threshold=100, idle_seconds=3600)
+        scheduler.note_writes(60)
+        self.assertEqual(scheduler.run_pending(), [])
+
+        scheduler.note_writes(60)
+        records = scheduler.run_pending()
+        self.assertEqual([record.task for record in records], ["analyze"])
+        self.assertGreaterEqual(records[0].duration_ms, 0)
+        stat = self.conn.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE idx = 'ix_results_payload'"
+        ).fetchone()
+        self.assertIsNotNone(stat)
+        self.assertEqual(scheduler.stats()["pending_writes"], 0)
+
+    def test_incremental_vacuum_in_steps(self):
+        """База переводится в INCREMENTAL явно и в простое очищается шагами"""
+        scheduler = self.scheduler(
+            idle_seconds=0, vacuum_pages=8, vacuum_budget=10, min_free_pages=1
+        )
+        # Полный VACUUM для перевода планировщик сам не выполняет
+        self.conn.execute("DELETE FROM results WHERE id > 2500")
+        self.conn.commit()
+        self.assertEqual(scheduler.run_pending(), [])
+        self.assertEqual(self.pragma("auto_vacuum"), 0)
+        self.assertGreater(self.pragma("freelist_count"), 0)
+
+        record = scheduler.enable_incremental_vacuum()
+        self.assertEqual(record.task, "enable_incremental_vacuum")
+        self.assertIsNone(scheduler.enable_incremental_vacuum())
+        self.assertEqual(self.pragma("auto_vacuum"), AUTO_VACUUM_INCREMENTAL)
+
+        self.conn.execute("DELETE FROM results WHERE id > 500")
+        self.conn.commit()
+        free_pages = self.pragma("freelist_count")
+        page_count = self.pragma("page_count")
+        self.assertGreater(free_pages, 16)
+
+        records = scheduler.run_pending()
+        self.assertGreater(len(records), 1)
+        self.assertTrue(all(r.task == "incremental_vacuum" for r in records))
+        self.assertTrue(all(r.pages <= 8 for r in records))
+        self.assertEqual(sum(r.pages for r in records), free_pages)
+        self.assertEqual(self.pragma("freelist_count"), 0)
+        self.assertEqual(self.pragma("page_count"), page_count - free_pages)
+        self.assertEqual(scheduler.history()[-len(records) :], records)
+        self.assertIn("incremental_vacuum", scheduler.stats()["duration_ms"])
+
+    def test_vacuum_waits_for_idle_and_budget(self):
+        """Очистка не идет во время записи и ограничена по времени"""
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.conn.execute("VACUUM")
+        self.conn.execute("DELETE FROM results WHERE id > 500")
+        self.conn.commit()
+        free_pages = self.pragma("freelist_count")
+
+        busy = self.scheduler(idle_seconds=3600, write_threshold=10**6)
+        busy.note_writes(1)
+        self.assertEqual(busy.run_pending(), [])
+
+        scheduler = self.scheduler(idle_seconds=0, vacuum_pages=8)
+        self.assertEqual(scheduler.incremental_vacuum(budget=0), [])
+        self.assertEqual(self.pragma("freelist_count"), free_pages)
+        self.assertEqual(len(scheduler.incremental_vacuum(budget=10)[:1]), 1)
+
+    def test_database_manager_counts_writes(self):
+        """Менеджер результатов сообщает планировщику об измененных строках"""
+        db = ResultsDatabaseManager(os.path.join(self.tmp_dir, "student_app.db"))
+        try:
+            scheduler = db.start_maintenance(
+                write_threshold=2, idle_seconds=3600, check_interval=3600
+            )
+            db.add_user("student", "secret", "ИУ7-51Б")
+            db.add_user("student2", "secret", "ИУ7-51Б")
+            self.assertGreaterEqual(scheduler.stats()["pending_writes"], 2)
+            self.assertEqual(
+                [record.task for record in scheduler.run_pending()], ["analyze"]
+            )
+        finally:
+            db.close()
+        self.assertIsNone(db.maintenance)
+
+    def test_new_database_vacuumed_in_steps(self):
+        """Новая student_app.db сразу в INCREMENTAL, и простой освобождает страницы"""
+        db_path = os.path.join(self.tmp_dir, "student_app.db")
+        db = ResultsDatabaseManager(db_path)
+        try:
+            db.add_user("student", "secret", "ИУ7-51Б")
+            user_id = db.verify_user("student").id
+            for score in range(300):
+                db.save_test_result(user_id, 1, score, 100, 60)
+        finally:
+            db.close()
+
+        conn = sqlite3.connect(db_path)
+        self.addCleanup(conn.close)
+        self.assertEqual(
+            conn.execute("PRAGMA auto_vacuum").fetchone()[0], AUTO_VACUUM_INCREMENTAL
+        )
+        conn.execute("DELETE FROM test_results")
+        conn.commit()
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        self.assertGreater(free_pages, 0)
+
+        scheduler = MaintenanceScheduler(
+            db_path, idle_seconds=0, vacuum_budget=10, min_free_pages=1
+        )
+        self.addCleanup(scheduler.stop)
+        records = scheduler.run_pending()
+        self.assertEqual(sum(r.pages for r in records), free_pages)
+        self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+
+    def test_async_vacuum_outside_transaction(self):
+        """DatabaseManager.vacuum не выполняется внутри транзакции сессии"""
+        self.conn.execute("DELETE FROM results WHERE id > 500")
+        self.conn.commit()
+        manager = DatabaseManager(f"sqlite+aiosqlite:///{self.db_path}")
+
+        async def vacuum():
+            try:
+                await manager.vacuum()
+            finally:
+                await manager.close()
+
+        asyncio.run(vacuum())
+        self.assertEqual(self.pragma("freelist_count"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
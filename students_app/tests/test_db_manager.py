@@ -0,0 +1,700 @@
+"""Тесты для менеджера базы данных результатов"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from database import records
+from database.db_manager import DatabaseManager
+from database.migrate import current_revision, head_revision, upgrade_database
+from database.records import LabStatusRecord, UserRecord
+from database.write_queue import QueueClosedError, WriteBehindQueue
+from utils.connection_pool import ConnectionPool, PoolExhaustedError
+
+
+class TestDatabaseManagerPool(unittest.TestCase):
+    """Тесты режима пула соединений"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "student_app.db")
+        self.db = DatabaseManager(self.db_path, pool_size=4)
+        self.db.add_user("student", "secret", "ИУ7-51Б")
+        self.user_id = self.db.verify_user("student").id
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_wal_journal(self):
+        """Пул переводит базу в режим WAL"""
+        mode = self.db._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_connection_per_thread(self):
+        """Каждый поток получает собственное соединение"""
+        main_conn = self.db._connection()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.db._connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(main_conn, other[0])
+        self.assertIs(main_conn, self.db._connection())
+
+    def test_concurrent_save_test_result(self):
+        """Параллельное сохранение результатов без потерь"""
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            saved = list(
+                executor.map(
+                    lambda i: self.db.save_test_result(self.user_id, 1, i, 100, 60),
+                    range(40),
+                )
+            )
+        self.assertTrue(all(saved))
+        count = (
+            sqlite3.connect(self.db_path)
+            .execute("SELECT COUNT(*) FROM test_results")
+            .fetchone()[0]
+        )
+        self.assertEqual(count, 40)
+
+    def test_pool_is_bounded(self):
+        """Пул не открывает больше соединений, чем разрешено"""
+        pool = ConnectionPool(self.db_path, max_size=1, acquire_timeout=0.1)
+        pool.connection()
+        errors = []
+
+        def acquire():
+            try:
+                pool.connection()
+            except PoolExhaustedError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+
+        # После завершения потока его соединение возвращается в пул
+        pool.release()
+        thread = threading.Thread(target=pool.connection)
+        thread.start()
+        thread.join()
+        self.assertEqual(pool.stats()["created"], 1)
+        pool.close()
+
+    def test_more_workers_than_connections(self):
+        """Потоков больше, чем соединений: каждый результат сохраняется"""
+        self.db.close()
+        self.db = DatabaseManager(self.db_path, pool_size=2)
+        self.db.pool.acquire_timeout = 2.0
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            saved = list(
+                executor.map(
+                    lambda i: self.db.save_test_result(self.user_id, 1, i, 100, 60),
+                    range(40),
+                )
+            )
+        self.assertTrue(all(saved))
+        self.assertEqual(self.db.pool.stats()["in_use"], 0)
+        self.assertLessEqual(self.db.pool.stats()["created"], 2)
+
+    def test_dead_owner_reclaimed_while_waiting(self):
+        """Соединение завершившегося потока достается ждущему без acquire_timeout"""
+        pool = ConnectionPool(self.db_path, max_size=1, acquire_timeout=30.0)
+        acquired = threading.Event()
+        finish = threading.Event()
+
+        def hold():
+            pool.connection()
+            acquired.set()
+            finish.wait()
+
+        owner = threading.Thread(target=hold)
+        owner.start()
+        acquired.wait()
+        timer = threading.Timer(0.1, finish.set)
+        timer.start()
+
+        started = time.monotonic()
+        pool.connection()
+        self.assertLess(time.monotonic() - started, 5.0)
+        self.assertEqual(pool.stats()["created"], 1)
+        owner.join()
+        timer.join()
+        pool.close()
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    """Тесты миграций схемы и планов запросов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "student_app.db")
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def explain(self, db, call):
+        """Планы всех запросов, выполненных при вызове метода"""
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        call()
+        db.conn.set_trace_callback(None)
+
+        plans = {}
+        for sql in statements:
+            if sql.lstrip().upper().startswith(("SELECT", "UPDATE", "INSERT")):
+                rows = db.conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+                plans[sql] = [row[3] for row in rows]
+        self.assertTrue(plans)
+        return plans
+
+    def assertNoFullScan(self, plans, table):
+        """Проверка, что таблица читается только через индекс"""
+        for sql, details in plans.items():
+            for detail in details:
+                if detail.startswith(f"SCAN {table}") and "INDEX" not in detail:
+                    self.fail(f"Полный просмотр {table}: {detail}\n{sql}")
+
+    def test_upgrade_existing_database(self):
+        """Обновление базы, созданной до появления миграций"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "username TEXT NOT NULL UNIQUE, password TEXT NOT NULL, "
+            "group_number TEXT, role TEXT DEFAULT 'student')"
+        )
+        conn.execute(
+            "INSERT INTO users (username, password, group_number) "
+            "VALUES ('old', 'pwd', 'ИУ7-51Б')"
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(self.db_path)
+        self.assertEqual(db.verify_user("old").group_number, "ИУ7-51Б")
+        self.assertEqual(current_revision(self.db_path), head_revision())
+        indexes = {
+            row[0]
+            for row in db.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        self.assertIn("ix_test_results_completed_at", indexes)
+        self.assertIn("ix_user_labs_user_id_lab_id", indexes)
+        db.close()
+
+        # Повторный запуск не меняет схему
+        upgrade_database(self.db_path)
+        self.assertEqual(current_revision(self.db_path), head_revision())
+
+    def test_query_plans_use_indexes(self):
+        """Частые запросы не просматривают таблицы целиком"""
+        db = DatabaseManager(self.db_path)
+        db.add_user("student", "pwd", "ИУ7-51Б")
+        user_id = db.verify_user("student").id
+
+        self.assertNoFullScan(
+            self.explain(db, lambda: db.verify_user("student")), "users"
+        )
+        self.assertNoFullScan(
+            self.explain(db, lambda: db.get_test_results("2024-01-01", "2024-02-01")),
+            "test_results",
+        )
+        self.assertNoFullScan(
+            self.explain(db, lambda: db.save_test_result(user_id, 1, 5, 10, 60)),
+            "user_labs",
+        )
+        lab_plans = self.explain(db, lambda: db.get_labs_with_results(user_id))
+        self.assertNoFullScan(lab_plans, "user_lab_status")
+        self.assertNotIn(" results", " ".join(sum(lab_plans.values(), [])))
+        db.close()
+
+
+class TestPeriodReports(unittest.TestCase):
+    """Тесты отчетов за месяц и период"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "student_app.db"))
+        self.db.add_user("ivanov", "pwd", "ИУ7-51Б")
+        self.db.add_user("teacher", "pwd", "", role="teacher")
+        student_id = self.db.verify_user("ivanov").id
+        teacher_id = self.db.verify_user("teacher").id
+        self.db.conn.executemany(
+            "INSERT INTO results (user_id, lab_id, points, status, submission_date) "
+            "VALUES (?, 1, ?, 'completed', ?)",
+            [
+                (student_id, 10, "2024-11-30 23:59:59"),
+                (student_id, 20, "2024-12-01 00:00:00"),
+                (student_id, 30, "2024-12-31 23:59:59"),
+                (student_id, 40, "2025-01-01 00:00:00"),
+                (teacher_id, 50, "2024-12-15 12:00:00"),
+            ],
+        )
+        self.db.conn.commit()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_monthly_report_bounds(self):
+        """Месячный отчет включает весь месяц и только студентов"""
+        report = self.db.get_monthly_report(12, 2024)
+        self.assertEqual(sorted(row.points for row in report), [20, 30])
+        self.assertEqual(report[0].student_name, "ivanov")
+        self.assertEqual(
+            [row.points for row in self.db.get_monthly_report(1, 2025)], [40]
+        )
+
+    def test_period_end_date_inclusive(self):
+        """Последний день периода входит в отчет целиком"""
+        report = self.db.get_results_by_period("2024-12-01", "2024-12-31")
+        self.assertEqual(sorted(row.points for row in report), [20, 30])
+
+    def test_report_uses_covering_index(self):
+        """Отчет читает results только через покрывающий индекс"""
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+        self.db.get_monthly_report(12, 2024)
+        self.db.conn.set_trace_callback(None)
+        plan = " ".join(
+            row[3]
+            for row in self.db.conn.execute(f"EXPLAIN QUERY PLAN {statements[-1]}")
+        )
+        self.assertIn("COVERING INDEX ix_results_submission_date_covering", plan)
+
+
+class TestMonthlyRollup(unittest.TestCase):
+    """Тесты сводной таблицы результатов по месяцам"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "student_app.db"))
+        for name, group in (
+            ("ivanov", "ИУ7-51Б"),
+            ("petrov", "ИУ7-51Б"),
+            ("sidorov", "ИУ7-52Б"),
+        ):
+            self.db.add_user(name, "pwd", group)
+        self.ids = {
+            name: self.db.verify_user(name).id
+            for name in ("ivanov", "petrov", "sidorov")
+        }
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def rollup_rows(self):
+        """Содержимое сводной таблицы"""
+        return self.db.conn.execute(
+            "SELECT * FROM monthly_results_rollup ORDER BY 1, 2, 3, 4"
+        ).fetchall()
+
+    def test_save_updates_rollup(self):
+        """Каждый сохраненный результат сразу попадает в сводку"""
+        self.db.save_test_result(self.ids["ivanov"], 1, 60, 100, 600)
+        self.db.save_test_result(self.ids["petrov"], 1, 90, 100, 600)
+        self.db.save_test_result(self.ids["sidorov"], 1, 70, 100, 600)
+        self.db.save_test_result(self.ids["ivanov"], 2, 80, 100, 600)
+
+        year, month = self.db.conn.execute(
+            "SELECT CAST(strftime('%Y', 'now') AS INTEGER), "
+            "CAST(strftime('%m', 'now') AS INTEGER)"
+        ).fetchone()
+        summary = self.db.get_monthly_summary(month, year)
+        self.assertEqual(
+            [(row.group, row.lab_number, row.attempts) for row in summary],
+            [("ИУ7-51Б", 1, 2), ("ИУ7-51Б", 2, 1), ("ИУ7-52Б", 1, 1)],
+        )
+        self.assertEqual(summary[0].average_score, 75)
+        self.assertEqual((summary[0].min_score, summary[0].max_score), (60, 90))
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчет по истории совпадает с инкрементальным обновлением"""
+        for score in (10, 50, 30):
+            self.db.save_test_result(self.ids["ivanov"], 1, score, 100, 60)
+        self.db.conn.execute(
+            "INSERT INTO test_results (user_id, lab_number, score, max_score, "
+            "time_spent, completed_at) VALUES (?, 3, 40, 100, 60, '2023-05-10 10:00:00')",
+            (self.ids["sidorov"],),
+        )
+        self.db.conn.commit()
+        incremental = self.rollup_rows()
+
+        self.assertEqual(self.db.rebuild_monthly_rollup(), 2)
+        rebuilt = self.rollup_rows()
+        self.assertEqual(rebuilt[0], (2023, 5, "ИУ7-52Б", 3, 1, 40, 40, 40))
+        self.assertEqual(rebuilt[1:], incremental)
+
+
+class TestKeysetPagination(unittest.TestCase):
+    """Тесты постраничного чтения результатов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "student_app.db"))
+        self.db.add_user("ivanov", "pwd", "ИУ7-51Б")
+        user_id = self.db.verify_user("ivanov").id
+        # Несколько строк с одинаковым временем проверяют разбор ключа по id
+        dates = ["2024-12-01 10:00:00"] * 5 + [
+            f"2024-12-{day:02d} 12:00:00" for day in range(2, 22)
+        ]
+        self.db.conn.executemany(
+            "INSERT INTO test_results (user_id, lab_number, score, max_score, "
+            "time_spent, completed_at) VALUES (?, 1, ?, 100, 60, ?)",
+            [(user_id, score, date) for score, date in enumerate(dates)],
+        )
+        self.db.conn.executemany(
+            "INSERT INTO results (user_id, lab_id, points, status, submission_date) "
+            "VALUES (?, 1, ?, 'completed', ?)",
+            [(user_id, points, date) for points, date in enumerate(dates)],
+        )
+        self.db.conn.commit()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_pages_cover_period_once(self):
+        """Страницы идут подряд, без пропусков и повторов"""
+        pages = []
+        after = None
+        while True:
+            rows, after = self.db.page_test_results(
+                "2024-12-01", "2024-12-31", after=after, limit=10
+            )
+            pages.append(rows)
+            if after is None:
+                break
+        self.assertEqual([len(rows) for rows in pages], [10, 10, 5])
+        scores = [row.score for rows in pages for row in rows]
+        self.assertEqual(scores, list(range(25)))
+
+    def test_iterators(self):
+        """Итераторы выдают все строки периода в порядке сдачи"""
+        streamed = list(self.db.iter_test_results("2024-12-01", "2024-12-10", 3))
+        self.assertEqual([row.score for row in streamed], list(range(14)))
+        newest_first = self.db.iter_test_results(
+            "2024-12-01", "2024-12-10", 3, descending=True
+        )
+        self.assertEqual([row.score for row in newest_first], list(range(13, -1, -1)))
+
+        report = list(self.db.iter_results_by_period("2024-12-05", "2024-12-31", 4))
+        self.assertEqual([row.points for row in report], list(range(8, 25)))
+
+        monthly = list(self.db.iter_monthly_report(12, 2024, batch_size=7))
+        self.assertEqual(len(monthly), 25)
+        self.assertEqual(
+            (monthly[0].student_name, monthly[0].group), ("ivanov", "ИУ7-51Б")
+        )
+
+    def test_page_reads_index_in_order(self):
+        """Следующая страница читается по индексу без сортировки"""
+        _, after = self.db.page_results("2024-12-01", "2024-12-31", limit=5)
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+        self.db.page_results("2024-12-01", "2024-12-31", after=after, limit=5)
+        self.db.conn.set_trace_callback(None)
+        plan = " ".join(
+            row[3]
+            for row in self.db.conn.execute(f"EXPLAIN QUERY PLAN {statements[-1]}")
+        )
+        self.assertIn("COVERING INDEX ix_results_submission_date_covering", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class TestRowRecords(unittest.TestCase):
+    """Тесты типизированных записей строк"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "student_app.db"))
+        self.db.add_user("ivanov", "pwd", "ИУ7-51Б")
+        self.user = self.db.verify_user("ivanov")
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_user_record(self):
+        """Пользователь возвращается записью с именованными полями"""
+        self.assertIsInstance(self.user, UserRecord)
+        self.assertEqual(
+            (self.user.username, self.user.group_number, self.user.role),
+            ("ivanov", "ИУ7-51Б", "student"),
+        )
+        self.assertIsNone(self.db.verify_user("nobody"))
+
+    def test_records_have_no_instance_dict(self):
+        """Записи не хранят словарь атрибутов на каждую строку"""
+        self.db.save_test_result(self.user.id, 1, 80, 100, 600)
+        result = self.db.get_test_results("2000-01-01", "2100-01-01")[0]
+        self.assertIsInstance(result, records.TestResultRecord)
+        self.assertEqual((result.lab_number, result.score), (1, 80))
+        self.assertFalse(hasattr(result, "__dict__"))
+
+    def test_info_records(self):
+        """Сведения о студенте, работе и результате возвращаются записями"""
+        self.assertEqual(self.db.get_student_info(self.user.id), self.user)
+        self.assertIsNone(self.db.get_student_info(10**6))
+
+        lab = self.db.get_all_labs()[0]
+        self.assertEqual(self.db.get_lab_info(lab.id), lab)
+        self.assertIsNone(self.db.get_lab_info(10**6))
+
+        self.db.conn.execute(
+            "INSERT INTO results (user_id, lab_id, points, status) "
+            "VALUES (?, ?, 70, 'completed')",
+            (self.user.id, lab.id),
+        )
+        self.db.conn.commit()
+        result_id = self.db.conn.execute("SELECT MAX(id) FROM results").fetchone()[0]
+        self.assertEqual(
+            self.db.get_test_result_by_id(result_id),
+            records.ResultScoreRecord(70, "completed", 7, 10),
+        )
+        self.assertIsNone(self.db.get_test_result_by_id(10**6))
+
+    def test_labs_without_results(self):
+        """Для несданных работ дата пустая, а баллы равны нулю"""
+        labs = self.db.get_labs_with_results(self.user.id)
+        self.assertTrue(labs)
+        self.assertIsInstance(labs[0], LabStatusRecord)
+        self.assertEqual(
+            (labs[0].status, labs[0].submission_date, labs[0].points),
+            ("not_started", "", 0),
+        )
+        self.assertEqual(
+            [lab.id for lab in self.db.get_all_labs()],
+            [lab.lab_number for lab in labs],
+        )
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """Тесты отложенной записи результатов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "student_app.db")
+        self.db = DatabaseManager(self.db_path)
+        self.db.add_user("ivanov", "pwd", "ИУ7-51Б")
+        self.user_id = self.db.verify_user("ivanov").id
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def count_results(self):
+        return self.db.conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0]
+
+    def current_month(self):
+        completed_at = self.db.conn.execute(
+            "SELECT completed_at FROM test_results LIMIT 1"
+        ).fetchone()[0]
+        return int(completed_at[5:7]), int(completed_at[:4])
+
+    def test_concurrent_results_share_transactions(self):
+        """Результаты из разных потоков фиксируются общими пакетами"""
+        queue = self.db.start_write_queue(batch_size=20, flush_interval=0.05)
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            saved = list(
+                executor.map(
+                    lambda score: self.db.save_test_result(
+                        self.user_id, 1, score, 100, 60
+                    ),
+                    range(60),
+                )
+            )
+        self.assertTrue(all(saved))
+        self.assertEqual(self.count_results(), 60)
+        stats = queue.stats()
+        self.assertEqual((stats["written"], stats["failed"]), (60, 0))
+        self.assertLess(stats["batches"], 60)
+
+        summary = self.db.get_monthly_summary(*self.current_month())
+        self.assertEqual(summary[0].attempts, 60)
+
+    def test_submit_returns_future(self):
+        """Future выполняется id записанной строки, close дописывает очередь"""
+        self.db.start_write_queue(flush_interval=1.0, durability="normal")
+        futures = [
+            self.db.submit_test_result(self.user_id, 2, score, 100, 60)
+            for score in range(5)
+        ]
+        self.db.stop_write_queue()
+        ids = [future.result(timeout=5) for future in futures]
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(self.count_results(), 5)
+
+    def test_synchronous_submit(self):
+        """Без очереди submit_test_result пишет сразу"""
+        future = self.db.submit_test_result(self.user_id, 1, 50, 100, 60)
+        self.assertTrue(future.done())
+        self.assertEqual(self.count_results(), 1)
+
+    def test_failed_item_does_not_break_batch(self):
+        """Ошибка одной записи откатывает только ее"""
+
+        def write(cursor, args):
+            if args[0] < 0:
+                raise ValueError("отрицательный балл")
+            cursor.execute(
+                "INSERT INTO test_results (user_id, lab_number, score, max_score, "
+                "time_spent) VALUES (?, 1, ?, 100, 60)",
+                (self.user_id, args[0]),
+            )
+
+        queue = WriteBehindQueue(self.db_path, write, flush_interval=0.5)
+        futures = [queue.submit(score) for score in (10, -1, 20)]
+        self.assertTrue(queue.flush(timeout=5))
+        queue.close()
+
+        self.assertIsNone(futures[0].result())
+        self.assertIsInstance(futures[1].exception(), ValueError)
+        self.assertEqual(self.count_results(), 2)
+        self.assertEqual(queue.stats()["batches"], 1)
+        with self.assertRaises(RuntimeError):
+            queue.submit(30)
+
+    def test_close_fails_unwritten_items(self):
+        """Элементы, не записанные до остановки, завершаются ошибкой"""
+        started, release = threading.Event(), threading.Event()
+
+        def write(cursor, args):
+            started.set()
+            release.wait(5)
+
+        queue = WriteBehindQueue(self.db_path, write, batch_size=1)
+        futures = [queue.submit(i) for i in range(3)]
+        self.assertTrue(started.wait(5))
+        queue.close(timeout=0.1)
+        for future in futures[1:]:
+            self.assertIsInstance(future.exception(timeout=1), QueueClosedError)
+        release.set()
+        self.assertIsNone(futures[0].result(timeout=5))
+
+    def test_dead_writer_falls_back_to_direct_write(self):
+        """Если поток записи остановился, результат пишется напрямую"""
+        queue = self.db.start_write_queue(flush_interval=0.01)
+
+        def broken(conn, batch):
+            raise RuntimeError("писатель упал")
+
+        queue._write_batch = broken
+        future = self.db.submit_test_result(self.user_id, 1, 10, 100, 60)
+        self.assertIsInstance(future.exception(timeout=5), RuntimeError)
+        queue._thread.join(5)
+
+        self.assertTrue(self.db.save_test_result(self.user_id, 1, 20, 100, 60))
+        self.assertEqual(self.count_results(), 1)
+        with self.assertRaises(QueueClosedError):
+            queue.submit(self.user_id, 1, 30, 100, 60)
+
+    def test_unknown_durability(self):
+        """Неизвестный режим надежности отклоняется"""
+        with self.assertRaises(ValueError):
+            self.db.start_write_queue(durability="paranoid")
+        self.assertIsNone(self.db.write_queue)
+
+
+class TestUserLabStatus(unittest.TestCase):
+    """Тесты проекции статусов лабораторных работ"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "student_app.db"))
+        self.db.add_user("ivanov", "pwd", "ИУ7-51Б")
+        self.db.add_user("petrov", "pwd", "ИУ7-52Б")
+        self.ivanov = self.db.verify_user("ivanov").id
+        self.petrov = self.db.verify_user("petrov").id
+        self.db.conn.execute(
+            "INSERT OR IGNORE INTO labs (id, title, max_score) "
+            "VALUES (2, 'Лабораторная работа №2', 100)"
+        )
+        self.db.conn.commit()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def add_result(self, user_id, lab_id, points, status, date):
+        cursor = self.db.conn.execute(
+            "INSERT INTO results (user_id, lab_id, points, status, submission_date) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, lab_id, points, status, date),
+        )
+        self.db.conn.commit()
+        return cursor.lastrowid
+
+    def projection(self):
+        return self.db.conn.execute(
+            "SELECT * FROM user_lab_status ORDER BY user_id, lab_id"
+        ).fetchall()
+
+    def test_latest_result_per_lab(self):
+        """В списке работ одна строка на работу с последним результатом"""
+        self.add_result(self.ivanov, 1, 40, "in_progress", "2024-12-01 10:00:00")
+        self.add_result(self.ivanov, 1, 90, "completed", "2024-12-05 10:00:00")
+        self.add_result(self.petrov, 1, 70, "completed", "2024-12-03 10:00:00")
+
+        labs = self.db.get_labs_with_results(self.ivanov)
+        self.assertEqual([lab.lab_number for lab in labs], [1, 2])
+        self.assertEqual(
+            (labs[0].status, labs[0].points, labs[0].submission_date),
+            ("completed", 90, "2024-12-05 10:00:00"),
+        )
+        self.assertEqual((labs[1].status, labs[1].points), ("not_started", 0))
+
+    def test_triggers_match_rebuild(self):
+        """Проекция после изменений совпадает с пересчетом из results"""
+        first = self.add_result(self.ivanov, 1, 40, "completed", "2024-12-01")
+        second = self.add_result(self.ivanov, 1, 60, "completed", "2024-12-02")
+        self.add_result(self.petrov, 2, 80, "completed", "2024-12-02")
+        self.add_result(self.petrov, 1, 10, "not_started", None)
+
+        self.db.conn.execute("UPDATE results SET points = 65 WHERE id = ?", (second,))
+        self.db.conn.execute(
+            "UPDATE results SET lab_id = 2, submission_date = '2024-12-09' "
+            "WHERE id = ?",
+            (first,),
+        )
+        self.db.conn.commit()
+        self.assertEqual(self.db.get_labs_with_results(self.ivanov)[1].points, 40)
+
+        self.db.conn.execute("DELETE FROM results WHERE id = ?", (second,))
+        self.db.conn.commit()
+        self.assertEqual(
+            self.db.get_labs_with_results(self.ivanov)[0].status, "not_started"
+        )
+
+        maintained = self.projection()
+        self.assertEqual(self.db.rebuild_lab_status(), len(maintained))
+        self.assertEqual(self.projection(), maintained)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Тесты профилирования SQL-запросов"""
+
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from database.db_manager import DatabaseManager
+from utils import db_profiler
+from utils.db_profiler import PROFILER, ProfiledConnection
+from utils.student_db import StudentDB
+
+
+class TestDbProfiler(unittest.TestCase):
+    """Тесты сбора статистики выражений"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        PROFILER.reset()
+        PROFILER.enable()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        PROFILER.disable()
+        PROFILER.explain = False
+        PROFILER.reset()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def stats_for(self, fragment):
+        matches = [item for sql, item in PROFILER.snapshot().items() if fragment in sql]
+        self.assertEqual(len(matches), 1, fragment)
+        return matches[0]
+
+    def test_connect_without_profiling(self):
+        """Без профилирования connect возвращает обычное соединение"""
+        PROFILER.disable()
+        conn = db_profiler.connect(":memory:")
+        self.assertNotIsInstance(conn, ProfiledConnection)
+        conn.close()
+
+    def test_counts_and_rows(self):
+        """Учитываются выполнения, прочитанные и измененные строки"""
+        conn = db_profiler.connect(":memory:")
+        self.assertIsInstance(conn, ProfiledConnection)
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value INTEGER)")
+        conn.executemany("INSERT INTO t (value) VALUES (?)", [(i,) for i in range(10)])
+        for _ in range(3):
+            conn.execute("SELECT value FROM t WHERE value < ?", (4,)).fetchall()
+        self.assertEqual(len(list(conn.execute("SELECT * FROM t"))), 10)
+        conn.execute("UPDATE t SET value = 0 WHERE value > 7")
+        conn.close()
+
+        select = self.stats_for("WHERE value < ?")
+        self.assertEqual((select["count"], select["rows"]), (3, 12))
+        self.assertEqual(sum(select["histogram"]), 3)
+        self.assertEqual(self.stats_for("INSERT INTO t")["rows"], 10)
+        self.assertEqual(self.stats_for("SELECT * FROM t")["rows"], 10)
+        self.assertEqual(self.stats_for("UPDATE t")["rows"], 2)
+
+    def test_full_scan_plans(self):
+        """В режиме отладки полный просмотр таблицы попадает в отчет"""
+        PROFILER.enable(explain=True)
+        conn = db_profiler.connect(":memory:")
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value INTEGER)")
+        conn.execute("SELECT id FROM t WHERE value = ?", (1,)).fetchall()
+        conn.execute("SELECT value FROM t WHERE id = ?", (1,)).fetchall()
+        conn.close()
+
+        scans = PROFILER.full_scans()
+        self.assertEqual(list(scans), ["SELECT id FROM t WHERE value = ?"])
+        self.assertIn("SCAN t", scans["SELECT id FROM t WHERE value = ?"])
+
+        stream = io.StringIO()
+        PROFILER.dump_report(stream)
+        self.assertIn("Полный просмотр таблиц:", stream.getvalue())
+
+    def test_wrapped_modules(self):
+        """Запросы DatabaseManager и StudentDB проходят через профилировщик"""
+        db = DatabaseManager(os.path.join(self.tmp_dir, "student_app.db"))
+        self.assertIsInstance(db.conn, ProfiledConnection)
+        db.add_user("ivanov", "pwd", "ИУ7-51Б")
+        db.verify_user("ivanov")
+        db.close()
+        self.assertEqual(self.stats_for("FROM users WHERE username = ?")["rows"], 1)
+
+        students = StudentDB(os.path.join(self.tmp_dir, "students.db"))
+        students.find_student("Иван", "Иванов", "ИУ7-51Б")
+        self.assertEqual(
+            self.stats_for("SELECT id, group_id FROM students")["count"], 1
+        )
+
+    def test_failed_statement_is_counted(self):
+        """Ошибочное выражение не оставляет незавершенный учет"""
+        conn = db_profiler.connect(":memory:")
+        with self.assertRaises(sqlite3.OperationalError):
+            conn.execute("SELECT * FROM missing")
+        conn.close()
+        self.assertEqual(self.stats_for("FROM missing")["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""Тесты сбора статистики базы данных"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.db import DatabaseManager
+from utils.db_stats import StatisticsCollector, collect_statistics
+
+
+class TestDbStats(unittest.TestCase):
+    """Тесты статистики таблиц и индексов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "stats.db")
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute(
+            "CREATE TABLE results (id INTEGER PRIMARY KEY, user_id INTEGER, "
+            "payload TEXT)"
+        )
+        self.conn.execute("CREATE INDEX ix_results_user_id ON results (user_id)")
+        self.conn.execute(
+            "CREATE TABLE status (user_id INTEGER, lab_id INTEGER, "
+            "PRIMARY KEY (user_id, lab_id)) WITHOUT ROWID"
+        )
+        self.conn.executemany(
+            "INSERT INTO results (user_id, payload) VALUES (?, ?)",
+            [(i % 40, "x" * 300) for i in range(3000)],
+        )
+        self.conn.executemany(
+            "INSERT INTO status VALUES (?, ?)",
+            [(user, lab) for user in range(200) for lab in range(8)],
+        )
+        self.conn.commit()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        self.conn.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_dbstat_sizes(self):
+        """Страницы и строки таблиц и индексов за один проход"""
+        stats = collect_statistics(self.conn)
+        self.assertEqual(stats["method"], "dbstat")
+
+        results = stats["tables"]["results"]
+        self.assertEqual(results["row_count"], 3000)
+        self.assertGreater(results["pages"], 100)
+        index = results["indexes"]["ix_results_user_id"]
+        self.assertEqual(index["row_count"], 3000)
+        self.assertGreater(index["pages"], 0)
+        self.assertEqual(stats["tables"]["status"]["row_count"], 1600)
+        self.assertEqual(stats["total_rows"], 4600)
+
+        # Размер файла учитывается один раз, страницы объектов в него входят
+        self.assertEqual(stats["total_size"], stats["page_count"] * stats["page_size"])
+        object_pages = sum(
+            table["pages"] + sum(i["pages"] for i in table["indexes"].values())
+            for table in stats["tables"].values()
+        )
+        self.assertEqual(object_pages + stats["free_pages"], stats["page_count"])
+
+    def test_fragmentation_and_free_pages(self):
+        """Удаление строк оставляет свободные страницы"""
+        self.conn.execute("DELETE FROM results WHERE id % 2 = 0")
+        self.conn.execute("DELETE FROM results WHERE id > 2000")
+        self.conn.commit()
+        stats = collect_statistics(self.conn)
+        self.assertGreater(stats["free_pages"], 0)
+        self.assertGreater(stats["free_ratio"], 0)
+        fragmentation = stats["tables"]["results"]["fragmentation"]
+        self.assertGreaterEqual(fragmentation, 0.0)
+        self.assertLessEqual(fragmentation, 1.0)
+
+    def test_stat1_estimates(self):
+        """После ANALYZE количество строк берется из sqlite_stat1"""
+        self.conn.execute("ANALYZE")
+        self.conn.execute(
+            "UPDATE sqlite_stat1 SET stat = '12345 300' "
+            "WHERE idx = 'ix_results_user_id'"
+        )
+        self.conn.commit()
+        stats = collect_statistics(self.conn)
+        self.assertEqual(stats["tables"]["results"]["row_count"], 12345)
+
+    def test_sampling_fallback(self):
+        """Без dbstat размеры оцениваются по выборке"""
+        with mock.patch("utils.db_stats._has_dbstat", return_value=False):
+            stats = collect_statistics(self.conn)
+        self.assertEqual(stats["method"], "sample")
+        results = stats["tables"]["results"]
+        self.assertEqual(results["row_count"], 3000)
+        self.assertGreater(results["size_bytes"], 3000 * 300)
+
+    def test_cache_invalidated_by_data_version(self):
+        """Кеш сбрасывается после фиксации другим соединением"""
+        collector = StatisticsCollector(self.db_path)
+        with mock.patch(
+            "utils.db_stats.collect_statistics", wraps=collect_statistics
+        ) as collect:
+            first = collector.get()
+            self.assertEqual(collector.get(), first)
+            self.assertEqual(collect.call_count, 1)
+
+            self.conn.execute("INSERT INTO status VALUES (999, 1)")
+            self.conn.commit()
+            second = collector.get()
+            self.assertEqual(collect.call_count, 2)
+            self.assertEqual(second["tables"]["status"]["row_count"], 1601)
+            collector.get(force=True)
+            self.assertEqual(collect.call_count, 3)
+        collector.close()
+
+    def test_cached_stats_not_shared(self):
+        """Изменение полученной статистики не портит кеш"""
+        collector = StatisticsCollector(self.db_path)
+        first = collector.get()
+        first["tables"]["status"]["row_count"] = -1
+        del first["tables"]["results"]
+
+        second = collector.get()
+        self.assertIsNot(second, first)
+        self.assertEqual(second["tables"]["status"]["row_count"], 1600)
+        self.assertIn("results", second["tables"])
+        collector.close()
+
+    def test_database_manager_statistics(self):
+        """DatabaseManager.get_statistics возвращает кешированную статистику"""
+        manager = DatabaseManager(f"sqlite+aiosqlite:///{self.db_path}")
+
+        async def collect():
+            try:
+                return await manager.get_statistics(), await manager.get_statistics()
+            finally:
+                await manager.close()
+
+        first, second = asyncio.run(collect())
+        self.assertEqual(first, second)
+        self.assertEqual(first["tables"]["results"]["row_count"], 3000)
+
+
+if __name__ == "__main__":
+    unittest.main()
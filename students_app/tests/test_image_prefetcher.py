@@ -0,0 +1,177 @@
+"""Тесты фоновой загрузки изображений вопросов"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QColor, QImage
+
+from tests.test_base import QtTestCase
+from ui.image_prefetcher import ImagePrefetcher
+from utils import question_bank
+from utils.questions_db import QuestionsDB
+
+
+class TestImagePrefetcher(QtTestCase):
+    """Тесты ImagePrefetcher"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.ready = {}
+        self.failed = {}
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmp_dir)
+
+    def make_image(self, name, width, height):
+        image = QImage(width, height, QImage.Format_RGB32)
+        image.fill(QColor(Qt.darkCyan))
+        path = os.path.join(self.tmp_dir, name)
+        self.assertTrue(image.save(path))
+        return path
+
+    def make_prefetcher(self, **kwargs):
+        prefetcher = ImagePrefetcher(QSize(100, 100), **kwargs)
+        prefetcher.image_ready.connect(
+            lambda index, pixmap: self.ready.__setitem__(index, pixmap)
+        )
+        prefetcher.image_failed.connect(
+            lambda index, error: self.failed.__setitem__(index, error)
+        )
+        self.addCleanup(prefetcher.shutdown)
+        return prefetcher
+
+    def wait(self, prefetcher, timeout=5.0):
+        """Обработка событий, пока не завершатся все загрузки"""
+        deadline = time.monotonic() + timeout
+        while prefetcher.stats()["pending"] and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(prefetcher.stats()["pending"], 0)
+
+    def test_prefetch_lookahead(self):
+        """Загружаются текущий и lookahead следующих вопросов, с масштабированием"""
+        paths = [self.make_image(f"{i}.png", 400, 200) for i in range(5)]
+        prefetcher = self.make_prefetcher(lookahead=2)
+        prefetcher.set_paths(paths)
+
+        self.assertIsNone(prefetcher.pixmap(0))
+        prefetcher.prefetch(0)
+        self.wait(prefetcher)
+
+        self.assertEqual(sorted(self.ready), [0, 1, 2])
+        pixmap = prefetcher.pixmap(1)
+        self.assertEqual((pixmap.width(), pixmap.height()), (100, 50))
+        self.assertIsNone(prefetcher.pixmap(3))
+
+        # Повторный запрос не загружает готовые изображения заново
+        prefetcher.prefetch(1)
+        self.assertEqual(prefetcher.stats()["pending"], 1)
+        self.wait(prefetcher)
+        self.assertEqual(prefetcher.stats()["cached"], 4)
+
+    def test_cache_bounded(self):
+        """Давно не использованные изображения вытесняются сверх max_bytes"""
+        paths = [self.make_image(f"{i}.png", 100, 100) for i in range(4)]
+        prefetcher = self.make_prefetcher(lookahead=0, max_bytes=2 * 100 * 100 * 4)
+        prefetcher.set_paths(paths)
+
+        for index in range(3):
+            prefetcher.prefetch(index)
+            self.wait(prefetcher)
+            if index == 1:
+                # Первое изображение снова показано и становится свежим
+                self.assertIsNotNone(prefetcher.pixmap(0))
+
+        stats = prefetcher.stats()
+        self.assertEqual(stats["cached"], 2)
+        self.assertLessEqual(stats["bytes"], prefetcher.max_bytes)
+        self.assertIsNotNone(prefetcher.pixmap(0))
+        self.assertIsNone(prefetcher.pixmap(1))
+        self.assertIsNotNone(prefetcher.pixmap(2))
+
+    def test_missing_and_empty(self):
+        """Вопросы без изображения пропускаются, ошибки чтения сообщаются"""
+        self.make_image("a.png", 50, 50)
+        prefetcher = self.make_prefetcher(base_dir=self.tmp_dir)
+        prefetcher.set_paths([None, "a.png", "нет.png"])
+
+        self.assertFalse(prefetcher.has_image(0))
+        self.assertTrue(prefetcher.has_image(1))
+        prefetcher.prefetch(0)
+        self.wait(prefetcher)
+
+        self.assertEqual(sorted(self.ready), [1])
+        self.assertEqual(list(self.failed), [2])
+        self.assertEqual(prefetcher.stats()["failed"], 1)
+
+    def test_retry_after_error(self):
+        """Изображение, которое не удалось прочитать, читается снова позже"""
+        prefetcher = self.make_prefetcher(base_dir=self.tmp_dir, retry_seconds=3600)
+        prefetcher.set_paths(["поздно.png"])
+        prefetcher.prefetch(0)
+        self.wait(prefetcher)
+        self.assertEqual(list(self.failed), [0])
+
+        self.make_image("поздно.png", 50, 50)
+        prefetcher.prefetch(0)
+        self.assertEqual(prefetcher.stats()["pending"], 0)
+
+        prefetcher.retry_seconds = 0
+        prefetcher.prefetch(0)
+        self.wait(prefetcher)
+        self.assertEqual(list(self.ready), [0])
+        self.assertEqual(prefetcher.stats()["failed"], 0)
+
+    def test_shutdown(self):
+        """После shutdown кеш пуст и поздние результаты не сохраняются"""
+        paths = [self.make_image(f"{i}.png", 300, 300) for i in range(3)]
+        prefetcher = self.make_prefetcher()
+        prefetcher.set_paths(paths)
+        prefetcher.prefetch(0)
+        prefetcher.shutdown()
+        self.app.processEvents()
+
+        self.assertEqual(prefetcher.stats()["cached"], 0)
+        self.assertEqual(prefetcher.stats()["bytes"], 0)
+        self.assertIsNone(prefetcher.pixmap(0))
+
+
+class TestQuestionImages(unittest.TestCase):
+    """Тесты путей к изображениям вопросов в QuestionsDB"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = QuestionsDB(os.path.join(self.tmp_dir, "questions.db"))
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        question_bank.clear_caches()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_get_question_images(self):
+        """Пути возвращаются в порядке id, None для вопросов без изображения"""
+        with self.db.get_connection() as conn:
+            first = conn.execute(
+                "INSERT INTO questions (lab_id, question_text, correct_answer, image_path) "
+                "VALUES (1, 'С рисунком', 'да', 'images/a.png')"
+            ).lastrowid
+            second = conn.execute(
+                "INSERT INTO questions (lab_id, question_text, correct_answer) "
+                "VALUES (1, 'Без рисунка', 'нет')"
+            ).lastrowid
+
+        self.assertEqual(
+            self.db.get_question_images([second, first, 10**6]),
+            [None, "images/a.png", None],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,601 @@
+"""Тесты пакета моделей"""
+
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import models
+from models import session as models_session
+from models.base import Base
+from models import grading, repository
+from models.repository import Repository
+from models.snapshot import SnapshotCache
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyEngine(unittest.TestCase):
+    """Тесты ленивого создания движка и схемы"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "models.db")
+        models.configure(f"sqlite:///{self.db_path}", echo=False)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        models.configure(models_session.DEFAULT_DATABASE_URL)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_import_does_not_touch_database(self):
+        """Импорт models не создает движок и файл базы"""
+        code = (
+            "import models; from models import session; "
+            "assert session._engine is None"
+        )
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=self.tmp_dir,
+            env=dict(os.environ, PYTHONPATH=APP_DIR),
+            check=True,
+        )
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_engine_created_on_first_use(self):
+        """Движок создается при первом обращении и настраивается до него"""
+        self.assertIsNone(models_session._engine)
+        models.configure(echo=True)
+        engine = models.get_engine()
+        self.assertTrue(engine.echo)
+        self.assertIs(models.engine, engine)
+        models.configure(echo=False)
+        self.assertFalse(engine.echo)
+
+    def test_bootstrap_once_per_schema_version(self):
+        """Таблицы создаются один раз на версию схемы"""
+        self.assertTrue(models.bootstrap_schema())
+        self.assertFalse(models.bootstrap_schema())
+
+        # Новый процесс с той же версией схемы не выполняет DDL
+        models.dispose()
+        self.assertFalse(models.bootstrap_schema())
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            tables = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+        finally:
+            conn.close()
+        self.assertEqual(version, models.SCHEMA_VERSION)
+        self.assertTrue({"user", "test", "question", "useranswer"} <= tables)
+
+    def test_selected_options_converted_to_mask(self):
+        """База версии 1 переводится с JSON-списков id вариантов на маски"""
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(
+            """
+            CREATE TABLE questionoption (
+                id INTEGER PRIMARY KEY, question_id INTEGER NOT NULL,
+                text TEXT NOT NULL, is_correct BOOLEAN NOT NULL
+            );
+            CREATE TABLE useranswer (
+                id INTEGER PRIMARY KEY, attempt_id INTEGER NOT NULL,
+                question_id INTEGER NOT NULL, selected_options JSON,
+                text_answer TEXT, numeric_answer FLOAT, points_earned FLOAT
+            );
+            INSERT INTO questionoption VALUES
+                (5, 1, 'a', 1), (7, 1, 'b', 0), (9, 1, 'c', 1), (11, 2, 'd', 1);
+            INSERT INTO useranswer (id, attempt_id, question_id, selected_options)
+            VALUES (1, 1, 1, '[5, 9]'), (2, 1, 1, '[7]'), (3, 1, 2, '[11, 5]'),
+                   (4, 1, 2, NULL);
+            PRAGMA user_version = 1;
+            """
+        )
+        conn.close()
+
+        self.assertTrue(models.bootstrap_schema())
+        conn = sqlite3.connect(self.db_path)
+        try:
+            column_type = {
+                row[1]: row[2] for row in conn.execute("PRAGMA table_info(useranswer)")
+            }["selected_options"]
+            masks = conn.execute(
+                "SELECT selected_options, typeof(selected_options) "
+                "FROM useranswer ORDER BY id"
+            ).fetchall()
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(column_type, "INTEGER")
+        self.assertEqual(
+            masks,
+            [(0b101, "integer"), (0b010, "integer"), (0b1, "integer"), (None, "null")],
+        )
+        self.assertEqual(version, models.SCHEMA_VERSION)
+
+    def test_session_bootstraps_schema(self):
+        """Первая сессия подготавливает схему"""
+        session = models.SessionLocal()
+        try:
+            self.assertEqual(session.query(models.User).count(), 0)
+        finally:
+            session.close()
+
+
+class TestRepositoryBulk(unittest.TestCase):
+    """Тесты пакетных операций репозитория"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "repository.db")
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_with_repository(self, scenario):
+        """Выполнение сценария с репозиторием тестов на чистой базе"""
+
+        async def run():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{self.db_path}")
+            try:
+                async with engine.begin() as connection:
+                    await connection.run_sync(Base.metadata.create_all)
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    return await scenario(Repository(session, models.Test))
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(run())
+
+    def test_add_many_and_stream_all(self):
+        """add_many пишет пакетами, stream_all читает все строки по порядку"""
+
+        async def scenario(repository):
+            added = await repository.add_many(
+                ({"title": f"Тест {i}"} for i in range(1200)), batch_size=500
+            )
+            titles = [item.title async for item in repository.stream_all(100)]
+            return added, titles
+
+        added, titles = self.run_with_repository(scenario)
+        self.assertEqual(added, 1200)
+        self.assertEqual(len(titles), 1200)
+        self.assertEqual(titles[0], "Тест 0")
+        self.assertEqual(titles[-1], "Тест 1199")
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute(
+                "SELECT duration_minutes, created_at IS NOT NULL FROM test LIMIT 1"
+            ).fetchone()
+        finally:
+            conn.close()
+        # Значения по умолчанию колонок подставлены
+        self.assertEqual(row, (60, 1))
+
+    def test_upsert_many(self):
+        """upsert_many обновляет существующие строки и добавляет новые"""
+
+        async def scenario(repository):
+            await repository.add_many(
+                [{"id": 1, "title": "Старый", "passing_score": 50}]
+            )
+            processed = await repository.upsert_many(
+                [{"id": 1, "title": "Новый"}, {"id": 2, "title": "Второй"}]
+            )
+            items = [item async for item in repository.stream_all()]
+            return processed, [(i.id, i.title, i.passing_score) for i in items]
+
+        processed, items = self.run_with_repository(scenario)
+        self.assertEqual(processed, 2)
+        self.assertEqual(items, [(1, "Новый", 50.0), (2, "Второй", 60.0)])
+
+    def test_bulk_update(self):
+        """bulk_update меняет строки по первичному ключу"""
+
+        async def scenario(repository):
+            await repository.add_many({"title": f"Тест {i}"} for i in range(10))
+            updated = await repository.bulk_update(
+                {"id": i, "duration_minutes": 90} for i in range(1, 6)
+            )
+            items = [item async for item in repository.stream_all()]
+            return updated, [item.duration_minutes for item in items]
+
+        updated, durations = self.run_with_repository(scenario)
+        self.assertEqual(updated, 5)
+        self.assertEqual(durations, [90] * 5 + [60] * 5)
+
+
+class TestSnapshotLoading(unittest.TestCase):
+    """Тесты загрузки графа теста и кеша снимков"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "snapshots.db")
+        self.cache = SnapshotCache()
+        self.statements = []
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def run_scenario(self, scenario):
+        """Сценарий с тестом из 20 вопросов по 4 варианта"""
+
+        async def run():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{self.db_path}")
+            event.listen(
+                engine.sync_engine,
+                "before_cursor_execute",
+                lambda conn, cursor, statement, *args: self.statements.append(
+                    statement
+                ),
+            )
+            try:
+                async with engine.begin() as connection:
+                    await connection.run_sync(Base.metadata.create_all)
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    test = models.Test(title="Основы Python")
+                    for number in range(20):
+                        question = models.Question(
+                            text=f"Вопрос {number}",
+                            type=models.QuestionType.SINGLE_CHOICE,
+                        )
+                        question.options = [
+                            models.QuestionOption(
+                                text=f"Вариант {i}", is_correct=i == 0
+                            )
+                            for i in range(4)
+                        ]
+                        test.questions.append(question)
+                    session.add(test)
+                    await session.commit()
+                    del self.statements[:]
+                    return await scenario(
+                        session, repository.TestRepository(session, self.cache), test.id
+                    )
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(run())
+
+    def test_graph_in_fixed_number_of_queries(self):
+        """Тест со всеми вопросами загружается тремя запросами"""
+
+        async def scenario(session, tests, test_id):
+            session.expunge_all()
+            snapshot = await tests.get_snapshot(test_id)
+            loaded = len(self.statements)
+            cached = await tests.get_snapshot(test_id)
+            return snapshot, cached, loaded
+
+        snapshot, cached, loaded = self.run_scenario(scenario)
+        self.assertEqual(loaded, 3)
+        self.assertIs(cached, snapshot)
+        self.assertEqual(len(self.statements), 3)
+        self.assertEqual(len(snapshot.questions), 20)
+        self.assertEqual(len(snapshot.questions[0].options), 4)
+        self.assertTrue(snapshot.questions[0].options[0].is_correct)
+        self.assertEqual(snapshot.questions[0].type, "single_choice")
+
+        with self.assertRaises(AttributeError):
+            snapshot.title = "Другой"
+        data = json.loads(json.dumps(snapshot.to_dict(), ensure_ascii=False))
+        self.assertEqual(data["questions"][0]["options"][0]["text"], "Вариант 0")
+
+    def test_edit_invalidates_snapshot(self):
+        """Изменение вопроса через ORM сбрасывает снимок его теста"""
+
+        async def scenario(session, tests, test_id):
+            first = await tests.get_snapshot(test_id)
+            question = (await tests.load_graph(test_id)).questions[0]
+            question.text = "Исправленный вопрос"
+            await session.commit()
+            self.assertIsNone(self.cache.get(test_id))
+            second = await tests.get_snapshot(test_id)
+
+            await tests.update(test_id, {"title": "Новое название"})
+            third = await tests.get_snapshot(test_id)
+            return first, second, third
+
+        first, second, third = self.run_scenario(scenario)
+        self.assertEqual(first.questions[0].text, "Вопрос 0")
+        self.assertEqual(second.questions[0].text, "Исправленный вопрос")
+        self.assertEqual(third.title, "Новое название")
+
+    def test_repository_write_invalidates_snapshot(self):
+        """Исправление ключа через Repository сбрасывает снимок"""
+
+        async def scenario(session, tests, test_id):
+            first = await tests.get_snapshot(test_id)
+            question = first.questions[0]
+            options = Repository(session, models.QuestionOption)
+            await options.bulk_update(
+                [
+                    {"id": question.options[0].id, "is_correct": False},
+                    {"id": question.options[1].id, "is_correct": True},
+                ]
+            )
+            self.assertIsNone(self.cache.get(test_id))
+            second = await tests.get_snapshot(test_id)
+
+            await Repository(session, models.Question).update(
+                question.id, {"points": 3.0}
+            )
+            self.assertIsNone(self.cache.get(test_id))
+            third = await tests.get_snapshot(test_id)
+            return first, second, third
+
+        first, second, third = self.run_scenario(scenario)
+        self.assertTrue(first.questions[0].options[0].is_correct)
+        self.assertEqual(
+            [o.is_correct for o in second.questions[0].options],
+            [False, True, False, False],
+        )
+        self.assertEqual(third.questions[0].points, 3.0)
+
+    def test_stale_snapshot_not_cached(self):
+        """Снимок, загруженный до сброса, не попадает в кеш"""
+
+        async def scenario(session, tests, test_id):
+            generation = self.cache.generation(test_id)
+            snapshot = models.snapshot.build_snapshot(await tests.load_graph(test_id))
+            self.cache.invalidate([test_id])
+            self.cache.put(snapshot, generation)
+            return self.cache.get(test_id)
+
+        self.assertIsNone(self.run_scenario(scenario))
+
+
+class TestGrading(unittest.TestCase):
+    """Тесты векторной проверки ответов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "grading.db")
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def snapshot(self):
+        option = models.snapshot.OptionSnapshot
+        question = models.snapshot.QuestionSnapshot
+        return models.snapshot.TestSnapshot(
+            id=1,
+            title="Тест",
+            description=None,
+            duration_minutes=60,
+            passing_score=60.0,
+            questions=(
+                question(
+                    1,
+                    "Один",
+                    "single_choice",
+                    1.0,
+                    None,
+                    None,
+                    (option(11, "a", True), option(12, "b", False)),
+                ),
+                question(
+                    2,
+                    "Несколько",
+                    "multiple_choice",
+                    2.0,
+                    None,
+                    None,
+                    (
+                        option(21, "a", True),
+                        option(22, "b", True),
+                        option(23, "c", False),
+                    ),
+                ),
+                question(
+                    3,
+                    "Текст",
+                    "text",
+                    3.0,
+                    None,
+                    None,
+                    (option(31, "List  Comprehension", True),),
+                ),
+                question(4, "Число", "numeric", 4.0, 3.14, 0.01, ()),
+            ),
+        )
+
+    def test_grade_batch(self):
+        """Все четыре типа вопросов проверяются одним пакетом"""
+        key = grading.AnswerKey(self.snapshot())
+        row = grading.AnswerRow
+        answers = [
+            row(1, 1, 1, 0b1, None, None),
+            row(2, 1, 1, 0b10, None, None),
+            row(3, 1, 2, 0b11, None, None),
+            row(4, 1, 2, 0b1, None, None),
+            row(5, 1, 2, 0b111, None, None),
+            row(6, 2, 3, None, " list comprehension ", None),
+            row(7, 2, 3, None, "генератор", None),
+            row(8, 2, 4, None, None, 3.145),
+            row(9, 2, 4, None, None, 3.2),
+            row(10, 2, 4, None, None, None),
+            row(11, 2, 1, None, None, None),
+            row(12, 2, 99, 0b1, None, None),
+        ]
+        points = key.grade(answers)
+        self.assertEqual(
+            points.tolist(),
+            [1.0, 0.0, 2.0, 0.0, 0.0, 3.0, 0.0, 4.0, 0.0, 0.0, 0.0, 0.0],
+        )
+
+        attempts, sums = grading.attempt_totals(
+            [answer.attempt_id for answer in answers], points
+        )
+        self.assertEqual(attempts.tolist(), [1, 2])
+        self.assertEqual(sums.tolist(), [3.0, 7.0])
+
+    def test_selection_masks(self):
+        """Маска выбора строится по порядку вариантов вопроса"""
+        self.assertEqual(models.test.ordinals_to_mask([0, 2]), 0b101)
+        self.assertEqual(models.test.mask_to_ordinals(0b101), [0, 2])
+        self.assertEqual(models.test.mask_to_ordinals(None), [])
+        self.assertEqual(models.test.options_to_mask([30, 10], [10, 20, 30]), 0b101)
+        self.assertEqual(models.test.mask_to_options(0b110, [10, 20, 30]), [20, 30])
+        with self.assertRaises(ValueError):
+            models.test.options_to_mask([40], [10, 20, 30])
+        with self.assertRaises(ValueError):
+            models.test.ordinals_to_mask([models.test.MAX_OPTIONS])
+        with self.assertRaises(ValueError):
+            models.UserAnswer(selected_options=-1)
+
+        question = models.Question(
+            options=[models.QuestionOption(id=i, text=str(i)) for i in (5, 7, 9)]
+        )
+        self.assertEqual(question.selection_mask([9]), 0b100)
+        self.assertEqual(question.selected_option_ids(0b011), [5, 7])
+
+    def test_grade_and_regrade_in_database(self):
+        """Баллы записываются в базу и пересчитываются по исправленному ключу"""
+
+        async def run():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{self.db_path}")
+            try:
+                async with engine.begin() as connection:
+                    await connection.run_sync(Base.metadata.create_all)
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    return await scenario(session)
+            finally:
+                await engine.dispose()
+
+        async def scenario(session):
+            user = models.User(
+                username="student", password_hash="x", full_name="Студент", group="ИУ7"
+            )
+            test = models.Test(title="Числа")
+            question = models.Question(
+                text="Пи",
+                type=models.QuestionType.NUMERIC,
+                points=5.0,
+                correct_numeric_answer=3.0,
+                numeric_tolerance=0.0,
+            )
+            test.questions.append(question)
+            session.add_all([user, test])
+            await session.flush()
+
+            attempts = []
+            for value in (3.0, 3.14, 3.0, 2.0):
+                attempt = models.TestAttempt(
+                    test_id=test.id, user_id=user.id, start_time=datetime.utcnow()
+                )
+                attempt.answers.append(
+                    models.UserAnswer(question_id=question.id, numeric_answer=value)
+                )
+                attempts.append(attempt)
+            session.add_all(attempts)
+            await session.commit()
+            ids = [attempt.id for attempt in attempts]
+
+            first = await grading.grade_attempts(session, ids, batch_size=2)
+
+            # Исправленный ключ: правильный ответ 3.14 с допуском 0.01
+            question.correct_numeric_answer = 3.14
+            question.numeric_tolerance = 0.01
+            await session.commit()
+            regraded = await grading.regrade_test(session, test.id, batch_size=3)
+
+            rows = await session.execute(
+                select(models.TestAttempt.id, models.TestAttempt.score).order_by(
+                    models.TestAttempt.id
+                )
+            )
+            earned = await session.execute(
+                select(models.UserAnswer.points_earned).order_by(models.UserAnswer.id)
+            )
+            return ids, first, regraded, list(rows), list(earned.scalars())
+
+        ids, first, regraded, rows, earned = asyncio.run(run())
+        self.assertEqual(first, dict(zip(ids, [5.0, 0.0, 5.0, 0.0])))
+        self.assertEqual(regraded, 4)
+        self.assertEqual([score for _, score in rows], [0.0, 5.0, 0.0, 0.0])
+        self.assertEqual(earned, [0.0, 5.0, 0.0, 0.0])
+
+    def test_regrade_reads_current_key(self):
+        """Перепроверка берет ключ из базы, даже если снимок в кеше устарел"""
+        self.addCleanup(models.snapshot.SNAPSHOT_CACHE.clear)
+
+        async def run():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{self.db_path}")
+            try:
+                async with engine.begin() as connection:
+                    await connection.run_sync(Base.metadata.create_all)
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    return await scenario(session)
+            finally:
+                await engine.dispose()
+
+        async def scenario(session):
+            user = models.User(
+                username="student", password_hash="x", full_name="Студент", group="ИУ7"
+            )
+            test = models.Test(title="Числа")
+            question = models.Question(
+                text="e",
+                type=models.QuestionType.NUMERIC,
+                points=2.0,
+                correct_numeric_answer=3.0,
+                numeric_tolerance=0.0,
+            )
+            test.questions.append(question)
+            session.add_all([user, test])
+            await session.flush()
+            attempt = models.TestAttempt(
+                test_id=test.id, user_id=user.id, start_time=datetime.utcnow()
+            )
+            attempt.answers.append(
+                models.UserAnswer(question_id=question.id, numeric_answer=2.72)
+            )
+            session.add(attempt)
+            await session.commit()
+            first = await grading.grade_attempts(session, [attempt.id])
+
+            # Ключ исправлен другим процессом: ни один обработчик сессии не сработал
+            conn = sqlite3.connect(self.db_path)
+            with conn:
+                conn.execute(
+                    "UPDATE question SET correct_numeric_answer = 2.72 WHERE id = ?",
+                    (question.id,),
+                )
+            conn.close()
+            await grading.regrade_test(session, test.id)
+            score = await session.scalar(
+                select(models.TestAttempt.score).where(
+                    models.TestAttempt.id == attempt.id
+                )
+            )
+            return first[attempt.id], score
+
+        self.assertEqual(asyncio.run(run()), (0.0, 2.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
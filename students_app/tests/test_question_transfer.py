@@ -0,0 +1,165 @@
+"""Тесты импорта и экспорта банка вопросов"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils import question_bank
+from utils.question_transfer import RowError, file_format
+from utils.questions_db import QuestionsDB
+
+
+class TestQuestionTransfer(unittest.TestCase):
+    """Тесты потокового импорта и экспорта"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = QuestionsDB(os.path.join(self.tmp_dir, "questions.db"))
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        question_bank.clear_caches()
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def write_csv(self, name, rows):
+        with open(self.path(name), "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["lab", "lab_id", "question_text", "correct_answer", "points"]
+            )
+            writer.writerows(rows)
+        return self.path(name)
+
+    def count(self, db=None):
+        with (db or self.db).get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def test_import_csv(self):
+        """Импорт CSV порциями с отчетом об ошибочных строках"""
+        rows = [
+            ("Кафедра", "", f"Вопрос {i}", f"ответ {i}", 1 + i % 3) for i in range(25)
+        ]
+        rows += [
+            ("", "1", "Вопрос по id", "ответ", ""),
+            ("", "", "Без работы", "ответ", 1),
+            ("Кафедра", "", "", "ответ", 1),
+            ("Кафедра", "", "Вопрос", "ответ", "много"),
+            ("", "99", "Вопрос", "ответ", 1),
+        ]
+        path = self.write_csv("bank.csv", rows)
+        progress = []
+        report = self.db.import_questions(
+            path, chunk_size=10, create_labs=True, progress=progress.append
+        )
+
+        self.assertEqual(report.imported, 26)
+        self.assertEqual(report.skipped, 4)
+        self.assertEqual(
+            report.errors[0], RowError(28, "Не указана работа (lab_id или lab)")
+        )
+        self.assertEqual([e.line for e in report.errors], [28, 29, 30, 31])
+        self.assertEqual([p.rows for p in progress], [10, 20, 30])
+        self.assertEqual(progress[-1].written, 26)
+        self.assertEqual(self.count(), 26)
+
+        # Работа создана один раз, вопросы доступны выборке и поиску
+        labs = [lab for lab in self.db.get_all_labs() if lab[1] == "Кафедра"]
+        self.assertEqual(len(labs), 1)
+        self.assertEqual(len(self.db.get_random_questions(labs[0][0], 100)), 25)
+        self.assertEqual(
+            self.db.search_questions("Вопрос 7")[0]["correct_answer"], "ответ 7"
+        )
+
+    def test_failed_chunk_reported(self):
+        """Неудачная порция попадает в отчет, созданная в ней работа забывается"""
+        with self.db.get_connection() as conn:
+            conn.execute(
+                "CREATE TRIGGER reject_question BEFORE INSERT ON questions "
+                "WHEN NEW.question_text = 'сбой' "
+                "BEGIN SELECT RAISE(ABORT, 'вопрос отклонен'); END"
+            )
+        path = self.write_csv(
+            "bank.csv",
+            [
+                ("Новая", "", "Первый", "да", 1),
+                ("Новая", "", "сбой", "да", 1),
+                ("Новая", "", "", "да", 1),
+                ("Новая", "", "Второй", "да", 1),
+                ("Новая", "", "Третий", "да", 1),
+            ],
+        )
+        report = self.db.import_questions(path, chunk_size=3, create_labs=True)
+
+        self.assertEqual((report.imported, report.skipped), (2, 3))
+        self.assertEqual([e.line for e in report.errors], [2, 3, 4])
+        self.assertTrue(report.errors[0].message.startswith("Ошибка записи порции"))
+        self.assertEqual(report.errors[2].message, "Пустой текст вопроса")
+        with self.db.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT l.name, q.question_text FROM questions q "
+                "JOIN labs l ON l.id = q.lab_id WHERE l.name = 'Новая' ORDER BY q.id"
+            ).fetchall()
+        self.assertEqual(rows, [("Новая", "Второй"), ("Новая", "Третий")])
+
+    def test_unknown_lab_without_create(self):
+        """Без create_labs строки с неизвестной работой пропускаются"""
+        path = self.write_csv("bank.csv", [("Нет такой", "", "Вопрос", "ответ", 1)])
+        report = self.db.import_questions(path)
+        self.assertEqual((report.imported, report.skipped), (0, 1))
+
+    def test_jsonl_round_trip(self):
+        """Экспорт в JSON Lines и импорт в другую базу"""
+        path = self.write_csv(
+            "bank.csv",
+            [("Кафедра", "", f"Вопрос «{i}»", f"ответ {i}", 2) for i in range(15)]
+            + [("", "1", "Вопрос работы 1", "да", 1)],
+        )
+        self.db.import_questions(path, create_labs=True)
+
+        exported = self.path("bank.jsonl")
+        self.assertEqual(self.db.export_questions(exported), 16)
+        with open(exported, encoding="utf-8") as f:
+            first = json.loads(f.readline())
+        self.assertEqual(first["lab"], "Кафедра")
+        self.assertEqual(first["question_text"], "Вопрос «0»")
+
+        other = QuestionsDB(self.path("other.db"))
+        with open(exported, "a", encoding="utf-8") as f:
+            f.write("\n{не json\n")
+        report = other.import_questions(exported, create_labs=True)
+        self.assertEqual(report.imported, 16)
+        self.assertEqual(report.errors[0].line, 18)
+        self.assertTrue(report.errors[0].message.startswith("Некорректный JSON"))
+        self.assertEqual(self.count(other), 16)
+
+    def test_export_csv_by_lab(self):
+        """Экспорт CSV вопросов одной работы"""
+        path = self.write_csv(
+            "bank.csv",
+            [("", "1", "Первая", "да", 1), ("", "2", "Вторая", "нет", 1)],
+        )
+        self.db.import_questions(path)
+        exported = self.path("lab2.csv")
+        self.assertEqual(self.db.export_questions(exported, lab_id=2), 1)
+        with open(exported, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(rows[0]["question_text"], "Вторая")
+        self.assertEqual(rows[0]["lab_id"], "2")
+
+    def test_file_format(self):
+        """Формат определяется по расширению"""
+        self.assertEqual(file_format("bank.CSV"), "csv")
+        self.assertEqual(file_format("bank.ndjson"), "jsonl")
+        with self.assertRaises(ValueError):
+            file_format("bank.xlsx")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,14 @@
 """Тесты для модуля работы с базой данных вопросов"""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
 import unittest
+from unittest import mock
+from utils import question_bank
 from utils.questions_db import QuestionsDB
+from utils.question_sampler import attempt_seed, floyd_sample
 
 class TestQuestionsDB(unittest.TestCase):
     """Тесты для класса QuestionsDB"""
@@ -78,5 +86,427 @@ class TestQuestionsDB(unittest.TestCase):
 
         empty_db.close()
 
+
+class TestQuestionSampling(unittest.TestCase):
+    """Тесты выборки случайных вопросов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = QuestionsDB(os.path.join(self.tmp_dir, 'questions.db'))
+        with self.db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO questions (lab_id, question_text, correct_answer, points) '
+                'VALUES (?, ?, ?, ?)',
+                [(1, f'Вопрос {i}', 'ответ', 1 + i % 3) for i in range(300)]
+                + [(2, f'Вопрос {i}', 'ответ', 1) for i in range(5)]
+            )
+            conn.commit()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        question_bank.clear_caches()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_seed_reproducible(self):
+        """С тем же зерном выборка повторяется"""
+        seed = attempt_seed(1, 1, 7)
+        first = self.db.get_random_questions(1, 10, seed=seed)
+        self.assertEqual(first, self.db.get_random_questions(1, 10, seed=seed))
+        self.assertNotEqual(first, self.db.get_random_questions(1, 10, seed=seed + 1))
+        self.assertEqual(len({row[0] for row in first}), 10)
+        self.assertEqual(len(first[0]), 3)
+
+    def test_small_bank(self):
+        """При нехватке вопросов возвращается весь банк"""
+        questions = self.db.get_random_questions(2, 10, seed=1)
+        self.assertEqual(len(questions), 5)
+        self.assertEqual(self.db.get_random_questions(3, 10), [])
+
+    def test_strata(self):
+        """Стратифицированная выборка по стоимости вопросов"""
+        questions = self.db.get_random_questions(1, strata={1: 4, 3: 2}, seed=5)
+        points = sorted(row[2] for row in questions)
+        self.assertEqual(points, [1, 1, 1, 1, 3, 3])
+
+    def test_bank_version_invalidates_cache(self):
+        """Изменение вопросов работы сбрасывает кеш выборки"""
+        self.db.get_random_questions(2, 10)
+        with self.db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO questions (lab_id, question_text, correct_answer) "
+                "VALUES (2, 'Новый', 'ответ')"
+            )
+            conn.execute("UPDATE questions SET lab_id = 1 WHERE lab_id = 2 AND id = "
+                         "(SELECT MIN(id) FROM questions WHERE lab_id = 2)")
+            conn.commit()
+        texts = {row[1] for row in self.db.get_random_questions(2, 10)}
+        self.assertEqual(len(texts), 5)
+        self.assertIn('Новый', texts)
+
+        with self.db.get_connection() as conn:
+            conn.execute('DELETE FROM questions WHERE lab_id = 2')
+            conn.commit()
+        self.assertEqual(self.db.get_random_questions(2, 10), [])
+
+    def test_sampler_per_instance(self):
+        """Новый экземпляр на том же пути не берет банк прежнего экземпляра"""
+        self.db.get_random_questions(2, 10)
+        question_bank.clear_caches()
+        self.db.close()
+        os.remove(self.db.db_path)
+
+        other = QuestionsDB(self.db.db_path)
+        self.assertIsNot(other.sampler, self.db.sampler)
+        with other.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO questions (lab_id, question_text, correct_answer) "
+                "VALUES (2, 'Единственный', 'ответ')"
+            )
+            conn.commit()
+        self.assertEqual(
+            [row[1] for row in other.get_random_questions(2, 10)], ['Единственный']
+        )
+        other.close()
+
+    def test_floyd_sample(self):
+        """Алгоритм Флойда выбирает k различных элементов"""
+        rng = random.Random(0)
+        population = list(range(100, 200))
+        for k in (0, 1, 50, 100):
+            sample = floyd_sample(population, k, rng)
+            self.assertEqual(len(sample), k)
+            self.assertEqual(len(set(sample)), k)
+            self.assertTrue(set(sample) <= set(population))
+
+
+class TestSubmitAnswers(unittest.TestCase):
+    """Тесты пакетного сохранения ответов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = QuestionsDB(os.path.join(self.tmp_dir, 'questions.db'))
+        with self.db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO questions (id, lab_id, question_text, correct_answer, points) '
+                'VALUES (?, 1, ?, ?, ?)',
+                [(i, f'Вопрос {i}', f'ответ {i}', i) for i in range(1, 5)]
+            )
+            conn.commit()
+        self.result_id = self.db.start_test(1, 1)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        question_bank.clear_caches()
+        shutil.rmtree(self.tmp_dir)
+
+    def _answers(self):
+        with self.db.get_connection() as conn:
+            return conn.execute(
+                'SELECT question_id, answer, points_earned FROM test_answers '
+                'WHERE result_id = ? ORDER BY question_id', (self.result_id,)
+            ).fetchall()
+
+    def test_submit_answers(self):
+        """Ответы и итог записываются через одно соединение"""
+        with mock.patch.object(self.db, 'get_connection',
+                               wraps=self.db.get_connection) as connect:
+            points = self.db.submit_answers(
+                self.result_id, {1: 'ответ 1', 2: 'неверно', 3: 'ответ 3'}
+            )
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(points, 20)
+        self.assertEqual(self._answers(), [
+            (1, 'ответ 1', 1), (2, 'неверно', 2), (3, 'ответ 3', 3)
+        ])
+        with self.db.get_connection() as conn:
+            end_time, total = conn.execute(
+                'SELECT end_time, points FROM test_results WHERE id = ?',
+                (self.result_id,)
+            ).fetchone()
+        self.assertIsNotNone(end_time)
+        self.assertEqual(total, 20)
+
+    def test_matches_submit_answer(self):
+        """Результат совпадает с поштучным сохранением"""
+        self.db.submit_answer(self.result_id, 1, 'ответ 1')
+        self.db.submit_answer(self.result_id, 4, 'нет')
+        expected_points = self.db.finish_test(self.result_id)
+        expected = self._answers()
+
+        self.result_id = self.db.start_test(1, 1)
+        points = self.db.submit_answers(self.result_id, [(1, 'ответ 1'), (4, 'нет')])
+        self.assertEqual(points, expected_points)
+        self.assertEqual(self._answers(), expected)
+
+    def test_unknown_question(self):
+        """Неизвестный вопрос отменяет сохранение всех ответов"""
+        with self.assertRaises(ValueError):
+            self.db.submit_answers(self.result_id, {1: 'ответ 1', 99: 'ответ'})
+        self.assertEqual(self._answers(), [])
+
+    def test_no_answers(self):
+        """Без ответов тест все равно завершается"""
+        self.assertEqual(self.db.submit_answers(self.result_id, {}), 0)
+
+
+class TestScoreTracking(unittest.TestCase):
+    """Тесты итогов попыток, хранимых в test_results"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'questions.db')
+        self.db = QuestionsDB(self.db_path)
+        with self.db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO questions (id, lab_id, question_text, correct_answer, points) '
+                'VALUES (?, 1, ?, ?, ?)',
+                [(i, f'Вопрос {i}', f'ответ {i}', i) for i in range(1, 5)]
+            )
+            conn.commit()
+        self.result_id = self.db.start_test(1, 1)
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        question_bank.clear_caches()
+        shutil.rmtree(self.tmp_dir)
+
+    def _totals(self):
+        with self.db.get_connection() as conn:
+            return conn.execute(
+                'SELECT total_points, correct_answers FROM test_results WHERE id = ?',
+                (self.result_id,)
+            ).fetchone()
+
+    def test_incremental_totals(self):
+        """Итоги меняются при сохранении, замене и удалении ответов"""
+        self.db.submit_answer(self.result_id, 1, 'ответ 1')
+        self.db.submit_answer(self.result_id, 2, 'неверно')
+        self.assertEqual(self._totals(), (3, 1))
+
+        # Повторный ответ заменяет прежний, а не добавляется к нему
+        self.db.submit_answer(self.result_id, 2, 'ответ 2')
+        self.db.submit_answers(self.result_id, {1: 'неверно', 3: 'ответ 3'})
+        self.assertEqual(self._totals(), (6, 2))
+
+        with self.db.get_connection() as conn:
+            conn.execute('DELETE FROM test_answers WHERE question_id = 3')
+            conn.commit()
+        self.assertEqual(self._totals(), (3, 1))
+        self.assertEqual(self.db.finish_test(self.result_id), 10)
+        self.assertEqual(self.db.get_test_results(1)[0][5], 3)
+        self.assertEqual(self.db.check_scores(), [])
+
+    def test_check_scores_repair(self):
+        """Проверка находит и исправляет расхождения"""
+        self.db.submit_answers(self.result_id, {1: 'ответ 1', 2: 'ответ 2'})
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE questions SET correct_answer = 'другой' WHERE id = 2")
+            conn.commit()
+
+        drift = self.db.check_scores()
+        self.assertEqual(len(drift), 1)
+        self.assertEqual(drift[0].result_id, self.result_id)
+        self.assertEqual((drift[0].stored_correct, drift[0].actual_correct), (2, 1))
+        self.assertEqual(self._totals(), (3, 2))
+
+        self.db.check_scores(repair=True)
+        self.assertEqual(self._totals(), (3, 1))
+        self.assertEqual(self.db.check_scores(), [])
+        with self.db.get_connection() as conn:
+            points = conn.execute(
+                'SELECT points FROM test_results WHERE id = ?', (self.result_id,)
+            ).fetchone()[0]
+        self.assertEqual(points, 10)
+
+    def test_backfill_old_schema(self):
+        """В базе без итогов они добавляются и заполняются"""
+        old_path = os.path.join(self.tmp_dir, 'old.db')
+        conn = sqlite3.connect(old_path)
+        conn.executescript('''
+            CREATE TABLE questions (id INTEGER PRIMARY KEY, lab_id INTEGER,
+                question_text TEXT NOT NULL, correct_answer TEXT NOT NULL,
+                points INTEGER DEFAULT 1);
+            CREATE TABLE test_results (id INTEGER PRIMARY KEY, student_id INTEGER,
+                lab_id INTEGER, start_time TEXT, end_time TEXT, points INTEGER DEFAULT 0);
+            CREATE TABLE test_answers (result_id INTEGER, question_id INTEGER,
+                answer TEXT, points_earned INTEGER DEFAULT 0,
+                PRIMARY KEY (result_id, question_id));
+            INSERT INTO questions VALUES (1, 1, 'Вопрос', 'да', 2), (2, 1, 'Вопрос', 'нет', 3);
+            INSERT INTO test_results (id, student_id, lab_id) VALUES (1, 1, 1);
+            INSERT INTO test_answers VALUES (1, 1, 'да', 2), (1, 2, 'да', 3);
+        ''')
+        conn.commit()
+        conn.close()
+
+        db = QuestionsDB(old_path)
+        with db.get_connection() as conn:
+            totals = conn.execute(
+                'SELECT total_points, correct_answers FROM test_results WHERE id = 1'
+            ).fetchone()
+        self.assertEqual(totals, (5, 1))
+        self.assertEqual(db.check_scores(), [])
+
+
+class TestQuestionBankCache(unittest.TestCase):
+    """Тесты кеша банка вопросов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'questions.db')
+        self.db = QuestionsDB(self.db_path)
+        self._execute(
+            'INSERT INTO questions (id, lab_id, question_text, correct_answer, points) '
+            "VALUES (1, 1, 'Вопрос', 'да', 2)"
+        )
+        self.cache = self.db.bank_cache
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        question_bank.clear_caches()
+        shutil.rmtree(self.tmp_dir)
+
+    def _execute(self, query, params=()):
+        with self.db.get_connection() as conn:
+            conn.execute(query, params)
+            conn.commit()
+
+    def test_shared_cache(self):
+        """Экземпляры QuestionsDB одной базы используют общий кеш"""
+        self.assertIs(QuestionsDB(self.db_path).bank_cache, self.cache)
+
+    def test_hits_without_reload(self):
+        """Повторные чтения и запись ответов не перезагружают банк"""
+        labs = self.db.get_all_labs()
+        self.assertEqual(len(labs), 3)
+        self.assertEqual(self.cache.stats(), {'hits': 0, 'misses': 1})
+
+        self.db.get_random_questions(1, 10)
+        result_id = self.db.start_test(1, 1)
+        self.db.submit_answers(result_id, {1: 'да'})
+        self.assertEqual(self.db.get_detailed_results(result_id), [{
+            'question': 'Вопрос', 'student_answer': 'да',
+            'correct_answer': 'да', 'points': 2
+        }])
+        self.assertEqual(self.db.get_all_labs(), labs)
+        stats = self.cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertGreaterEqual(stats['hits'], 3)
+
+    def test_reload_after_bank_change(self):
+        """Изменение вопросов или работ загружает банк заново"""
+        self.assertEqual(len(self.db.get_random_questions(1, 10)), 1)
+        self._execute(
+            'INSERT INTO questions (lab_id, question_text, correct_answer) '
+            "VALUES (1, 'Второй', 'нет')"
+        )
+        self.assertEqual(len(self.db.get_random_questions(1, 10)), 2)
+
+        self._execute("UPDATE labs SET name = 'Новое название' WHERE id = 1")
+        self.assertEqual(self.db.get_all_labs()[0][1], 'Новое название')
+        self.assertEqual(self.cache.stats()['misses'], 3)
+
+    def test_replaced_file(self):
+        """Замена файла базы определяется по stat"""
+        self.db.get_all_labs()
+        other_path = os.path.join(self.tmp_dir, 'other.db')
+        other = QuestionsDB(other_path)
+        with other.get_connection() as conn:
+            conn.execute('DELETE FROM labs WHERE id > 1')
+            conn.commit()
+        # Журналы WAL обеих баз переносятся в файлы, как перед
+        # восстановлением из копии
+        other.close()
+        other.bank_cache.close()
+        self.db.get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.db.close()
+        os.replace(other_path, self.db_path)
+        self.assertEqual(len(self.db.get_all_labs()), 1)
+
+
+class TestQuestionSearch(unittest.TestCase):
+    """Тесты полнотекстового поиска вопросов"""
+
+    def setUp(self):
+        """Подготовка к тестам"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'questions.db')
+        self.db = QuestionsDB(self.db_path)
+        with self.db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO questions (id, lab_id, question_text, correct_answer) '
+                'VALUES (?, ?, ?, ?)',
+                [
+                    (1, 1, 'Сформулируйте закон Ома для участка цепи', 'I = U / R'),
+                    (2, 1, 'Чему равно сопротивление последовательной цепи?', 'Сумме сопротивлений'),
+                    (3, 2, 'Закон Ома для полной цепи; закон Ома в дифференциальной форме', 'I = E / (R + r)'),
+                    (4, 3, 'Единица измерения емкости', 'Фарад'),
+                ]
+            )
+            conn.commit()
+
+    def tearDown(self):
+        """Очистка после тестов"""
+        question_bank.clear_caches()
+        shutil.rmtree(self.tmp_dir)
+
+    def ids(self, *args, **kwargs):
+        return [row['id'] for row in self.db.search_questions(*args, **kwargs)]
+
+    def test_search(self):
+        """Поиск по словам вопроса и ответа без учета регистра"""
+        self.assertEqual(sorted(self.ids('закон ома')), [1, 3])
+        self.assertEqual(self.ids('ФАРАД'), [4])
+        # Слова ищутся как начала: находятся другие формы слова
+        self.assertEqual(sorted(self.ids('сопротивлени')), [2])
+        self.assertEqual(self.ids('закон фарад'), [])
+        self.assertEqual(self.ids('  ;; '), [])
+        # Операторы FTS5 во вводе не ломают запрос
+        self.assertEqual(self.ids('"закон" AND OR NEAR('), [])
+
+    def test_rank_and_snippet(self):
+        """Результаты ранжируются и содержат фрагмент с найденными словами"""
+        results = self.db.search_questions('закон ома')
+        self.assertEqual(results[0]['id'], 3)
+        self.assertLess(results[0]['rank'], results[1]['rank'])
+        self.assertIn('[Закон] [Ома]', results[0]['snippet'])
+        self.assertEqual(results[0]['correct_answer'], 'I = E / (R + r)')
+
+    def test_lab_filter_and_limit(self):
+        """Фильтр по работе и ограничение количества"""
+        self.assertEqual(self.ids('закон', lab_id=1), [1])
+        self.assertEqual(len(self.ids('цепи', limit=1)), 1)
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении вопросов"""
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE questions SET question_text = 'Единица индуктивности', "
+                         "correct_answer = 'Генри' WHERE id = 4")
+            conn.execute('DELETE FROM questions WHERE id = 1')
+            conn.commit()
+        self.assertEqual(self.ids('фарад'), [])
+        self.assertEqual(self.ids('генри'), [4])
+        self.assertEqual(self.ids('закон ома'), [3])
+
+    def test_rebuild_existing_database(self):
+        """Индекс строится для вопросов, сохраненных до его появления"""
+        with self.db.get_connection() as conn:
+            for trigger in ('questions_fts_insert', 'questions_fts_update', 'questions_fts_delete'):
+                conn.execute(f'DROP TRIGGER {trigger}')
+            conn.execute('DROP TABLE questions_fts')
+            conn.commit()
+        self.db = QuestionsDB(self.db_path)
+        self.assertEqual(self.ids('фарад', lab_id=3), [4])
+
+    def test_like_fallback(self):
+        """Без FTS5 поиск выполняется через LIKE"""
+        self.db.fts_enabled = False
+        results = self.db.search_questions('Ома цепи', limit=5)
+        self.assertEqual([row['id'] for row in results], [1, 3])
+        self.assertIsNone(results[0]['rank'])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,210 @@
+"""
+Фоновая загрузка изображений вопросов
+
+Когда список вопросов теста известен, изображения следующих lookahead
+вопросов читаются и масштабируются в отдельном потоке (QImageReader
+декодирует сразу в нужный размер). Готовые изображения переводятся в
+QPixmap в потоке интерфейса и хранятся в кеше, ограниченном по объему:
+при перелистывании окно берет готовый QPixmap и не ждет диска и
+декодирования.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set
+
+from PyQt5.QtCore import QObject, QRunnable, QSize, Qt, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+# Ограничение кеша по объему несжатых изображений
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Через сколько секунд изображение, которое не удалось прочитать, читается снова
+DEFAULT_RETRY_SECONDS = 5.0
+
+
+class _LoaderSignals(QObject):
+    """Сигналы задачи загрузки (QRunnable не может их объявлять)"""
+
+    loaded = pyqtSignal(str, QImage)
+    failed = pyqtSignal(str, str)
+
+
+class _ImageLoader(QRunnable):
+    """Чтение и масштабирование одного изображения в пуле потоков"""
+
+    def __init__(self, path: str, size: QSize, signals: _LoaderSignals) -> None:
+        super().__init__()
+        self.path = path
+        self.size = size
+        self.signals = signals
+
+    def run(self) -> None:
+        reader = QImageReader(self.path)
+        reader.setAutoTransform(True)
+        source = reader.size()
+        if source.isValid():
+            reader.setScaledSize(source.scaled(self.size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            self.signals.failed.emit(self.path, reader.errorString())
+        else:
+            self.signals.loaded.emit(self.path, image)
+
+
+class ImagePrefetcher(QObject):
+    """Предварительная загрузка изображений вопросов теста"""
+
+    # Изображение вопроса с указанным индексом готово
+    image_ready = pyqtSignal(int, QPixmap)
+    # Изображение не удалось прочитать: индекс и текст ошибки
+    image_failed = pyqtSignal(int, str)
+
+    def __init__(
+        self,
+        size: QSize,
+        lookahead: int = 3,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        base_dir: Optional[str] = None,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        """
+        Args:
+            size: Размер, в который вписываются изображения
+            lookahead: Количество следующих вопросов, загружаемых заранее
+            max_bytes: Ограничение объема кеша
+            base_dir: Каталог, от которого отсчитываются относительные пути
+            retry_seconds: Пауза перед повторным чтением после ошибки
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.size = size
+        self.lookahead = lookahead
+        self.max_bytes = max_bytes
+        self.base_dir = base_dir
+        self.retry_seconds = retry_seconds
+
+        self._paths: List[Optional[str]] = []
+        self._cache: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._cache_bytes = 0
+        self._pending: Set[str] = set()
+        # Время ошибки чтения по пути: до истечения retry_seconds путь
+        # не читается снова
+        self._failed: Dict[str, float] = {}
+        self._closed = False
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _LoaderSignals(self)
+        self._signals.loaded.connect(self._on_loaded)
+        self._signals.failed.connect(self._on_failed)
+
+    def _resolve(self, path: Optional[str]) -> Optional[str]:
+        if not path:
+            return None
+        if self.base_dir and not os.path.isabs(path):
+            path = os.path.join(self.base_dir, path)
+        return os.path.normpath(path)
+
+    def set_paths(self, paths: Sequence[Optional[str]]) -> None:
+        """
+        Изображения вопросов теста по индексам (None - вопрос без изображения)
+
+        Загрузки для прежнего списка отменяются; уже готовые изображения
+        остаются в кеше, а пути с ошибками будут прочитаны снова.
+        """
+        self._pool.clear()
+        self._pending.clear()
+        self._failed.clear()
+        self._closed = False
+        self._paths = [self._resolve(path) for path in paths]
+
+    def has_image(self, index: int) -> bool:
+        """Есть ли у вопроса изображение"""
+        return 0 <= index < len(self._paths) and self._paths[index] is not None
+
+    def pixmap(self, index: int) -> Optional[QPixmap]:
+        """Готовое изображение вопроса или None, если оно еще загружается"""
+        path = self._paths[index] if 0 <= index < len(self._paths) else None
+        pixmap = self._cache.get(path) if path else None
+        if pixmap is not None:
+            self._cache.move_to_end(path)
+        return pixmap
+
+    def prefetch(self, index: int) -> None:
+        """Загрузка изображений вопроса index и lookahead следующих"""
+        # Текущий вопрос загружается первым, следующие - по порядку
+        for offset in range(self.lookahead + 1):
+            position = index + offset
+            if position >= len(self._paths):
+                break
+            path = self._paths[position]
+            if path is None or path in self._cache or path in self._pending:
+                continue
+            failed_at = self._failed.get(path)
+            if failed_at is not None:
+                if time.monotonic() - failed_at < self.retry_seconds:
+                    continue
+                del self._failed[path]
+            self._pending.add(path)
+            self._pool.start(
+                _ImageLoader(path, self.size, self._signals),
+                self.lookahead - offset,
+            )
+
+    def _indexes(self, path: str) -> List[int]:
+        return [i for i, item in enumerate(self._paths) if item == path]
+
+    def _on_loaded(self, path: str, image: QImage) -> None:
+        self._pending.discard(path)
+        # Изображения отмененного списка тоже сохраняются: путь тот же
+        if self._closed or path in self._cache:
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._cache[path] = pixmap
+        self._cache_bytes += self._pixmap_bytes(pixmap)
+        self._evict(keep=path)
+        for index in self._indexes(path):
+            self.image_ready.emit(index, pixmap)
+
+    def _on_failed(self, path: str, error: str) -> None:
+        self._pending.discard(path)
+        if self._closed:
+            return
+        self._failed[path] = time.monotonic()
+        for index in self._indexes(path):
+            self.image_failed.emit(index, error)
+
+    def _evict(self, keep: str) -> None:
+        """Вытеснение давно не использованных изображений сверх max_bytes"""
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            path, pixmap = next(iter(self._cache.items()))
+            if path == keep:
+                self._cache.move_to_end(path)
+                continue
+            del self._cache[path]
+            self._cache_bytes -= self._pixmap_bytes(pixmap)
+
+    @staticmethod
+    def _pixmap_bytes(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def stats(self) -> Dict[str, int]:
+        """Состояние кеша"""
+        return {
+            "cached": len(self._cache),
+            "bytes": self._cache_bytes,
+            "pending": len(self._pending),
+            "failed": len(self._failed),
+        }
+
+    def shutdown(self) -> None:
+        """Отмена загрузок, ожидание текущей и очистка кеша"""
+        self._pool.clear()
+        self._pool.waitForDone()
+        self._closed = True
+        self._pending.clear()
+        self._cache.clear()
+        self._cache_bytes = 0
@@ -1,18 +1,68 @@
 """Окно выбора лабораторных работ"""
 import os
 from datetime import datetime
+from itertools import chain
+from typing import Iterable
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QFrame,
     QMessageBox, QDateEdit, QDialog, QLabel)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont, QColor
 from database.db_manager import DatabaseManager
+from database.records import TestResultRecord, UserRecord
 from loguru import logger
 from .lab_test_window import LabTestWindow
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from reportlab.pdfgen import canvas
+
+# Колонки PDF-отчета: заголовок и левая граница колонки в пунктах
+EXPORT_COLUMNS = (('Студент', 40), ('Группа', 150), ('Лаб. работа', 230),
+                  ('Баллы', 300), ('Макс. баллов', 350), ('Время (мин)', 430),
+                  ('Дата', 510))
+EXPORT_ROW_HEIGHT = 16
+EXPORT_MARGIN = 40
+
+
+def write_results_pdf(filename: str, title: str,
+                      results: Iterable[TestResultRecord]) -> int:
+    """
+    Запись результатов тестов в PDF-отчет
+
+    Каждая строка рисуется на странице сразу, как приходит из results, так
+    что отчет не собирается в памяти целиком перед записью.
+
+    Returns:
+        Количество записанных строк
+    """
+    width, height = letter
+    pdf = canvas.Canvas(filename, pagesize=letter)
+
+    def start_page(y: float) -> float:
+        """Заголовок таблицы на новой странице"""
+        pdf.setFont('Helvetica-Bold', 10)
+        for text, x in EXPORT_COLUMNS:
+            pdf.drawString(x, y, text)
+        pdf.line(EXPORT_MARGIN - 5, y - 4, width - EXPORT_MARGIN + 5, y - 4)
+        pdf.setFont('Helvetica', 9)
+        return y - EXPORT_ROW_HEIGHT
+
+    pdf.setFont('Helvetica-Bold', 14)
+    pdf.drawString(EXPORT_MARGIN, height - EXPORT_MARGIN, title)
+    y = start_page(height - EXPORT_MARGIN - 2 * EXPORT_ROW_HEIGHT)
+    count = 0
+    for result in results:
+        if y < EXPORT_MARGIN:
+            pdf.showPage()
+            y = start_page(height - EXPORT_MARGIN)
+        values = (result.username, result.group_number, str(result.lab_number),
+                  str(result.score), str(result.max_score),
+                  str(result.time_spent // 60), result.completed_at.split()[0])
+        for value, (_, x) in zip(values, EXPORT_COLUMNS):
+            pdf.drawString(x, y, value or '')
+        y -= EXPORT_ROW_HEIGHT
+        count += 1
+    pdf.save()
+    return count
 
 class ExportDialog(QDialog):
     """Диалог для выбора периода экспорта"""
@@ -58,10 +108,10 @@ class ExportDialog(QDialog):
 class LabSelectionWindow(QMainWindow):
     """Окно выбора лабораторных работ"""
 
-    def __init__(self, user_data: dict, db_manager: DatabaseManager):
+    def __init__(self, user_data: UserRecord, db_manager: DatabaseManager):
         super().__init__()
-        self.username = user_data.get('username', '')
-        self.group = user_data.get('group_number', '')
+        self.username = user_data.username
+        self.group = user_data.group_number or ''
         self.db_manager = db_manager
         self.user_data = user_data
 
@@ -159,7 +209,7 @@ class LabSelectionWindow(QMainWindow):
         logout_button.clicked.connect(self.logout)
 
         # Добавляем кнопку экспорта для преподавателя
-        if self.user_data.get('role') == 'teacher':
+        if self.user_data.role == 'teacher':
             export_button = QPushButton("Экспорт результатов")
             export_button.clicked.connect(self.export_results)
             export_button.setStyleSheet("""
@@ -274,62 +324,23 @@ class LabSelectionWindow(QMainWindow):
             start_date = dialog.start_date.date().toString("yyyy-MM-dd")
             end_date = dialog.end_date.date().toString("yyyy-MM-dd")
 
-            # Получаем результаты за период
-            results = self.db_manager.get_test_results(start_date, end_date)
-
-            if not results:
+            # Результаты читаются постранично, от новых к старым, и рисуются
+            # в PDF по мере чтения
+            results = self.db_manager.iter_test_results(
+                start_date, end_date, descending=True)
+            first = next(results, None)
+            if first is None:
                 QMessageBox.warning(self, "Предупреждение",
                                   "Нет результатов за выбранный период")
                 return
 
-            # Создаем PDF отчет
             filename = f"results_{start_date}_{end_date}.pdf"
-            doc = SimpleDocTemplate(filename, pagesize=letter)
-            elements = []
-
-            # Заголовок
-            styles = getSampleStyleSheet()
-            elements.append(Paragraph(f"Отчет по результатам тестирования\n"
-                                   f"Период: {start_date} - {end_date}",
-                                   styles['Title']))
-
-            # Данные таблицы
-            data = [['Студент', 'Группа', 'Лаб. работа', 'Баллы', 'Макс. баллов',
-                    'Время (мин)', 'Дата']]
-
-            for result in results:
-                time_minutes = result['time_spent'] // 60
-                data.append([
-                    result['username'],
-                    result['group_number'],
-                    str(result['lab_number']),
-                    str(result['score']),
-                    str(result['max_score']),
-                    str(time_minutes),
-                    result['completed_at'].split()[0]
-                ])
-
-            # Создаем таблицу
-            table = Table(data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            elements.append(table)
-
-            # Генерируем PDF
+            title = (f"Отчет по результатам тестирования. "
+                     f"Период: {start_date} - {end_date}")
+
+            # Создаем PDF отчет
             try:
-                doc.build(elements)
+                write_results_pdf(filename, title, chain([first], results))
                 QMessageBox.information(self, "Успех",
                                       f"Отчет сохранен в файл {filename}")
 
@@ -349,7 +360,7 @@ class LabSelectionWindow(QMainWindow):
         """Обновление списка лабораторных работ"""
         try:
             # Получаем список лабораторных работ
-            labs = self.db_manager.get_labs_with_results(self.user_data['id'])
+            labs = self.db_manager.get_labs_with_results(self.user_data.id)
 
             # Очищаем таблицу
             self.labs_table.setRowCount(0)
@@ -359,12 +370,12 @@ class LabSelectionWindow(QMainWindow):
                 self.labs_table.insertRow(row)
 
                 # Номер лабораторной
-                lab_number = QTableWidgetItem(f"ЛР{lab['lab_number']}")
+                lab_number = QTableWidgetItem(f"ЛР{lab.lab_number}")
                 lab_number.setTextAlignment(Qt.AlignCenter)
                 self.labs_table.setItem(row, 0, lab_number)
 
                 # Название
-                title = QTableWidgetItem(lab['title'])
+                title = QTableWidgetItem(lab.title)
                 title.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
                 self.labs_table.setItem(row, 1, title)
 
@@ -373,15 +384,15 @@ class LabSelectionWindow(QMainWindow):
                     'not_started': 'Не начата',
                     'in_progress': 'В процессе',
                     'completed': 'Завершена'
-                }.get(lab['status'], lab['status'])
+                }.get(lab.status, lab.status)
 
                 status = QTableWidgetItem(status_text)
                 status.setTextAlignment(Qt.AlignCenter)
 
                 # Устанавливаем цвет фона в зависимости от статуса
-                if lab['status'] == 'completed':
+                if lab.status == 'completed':
                     status.setBackground(QColor('#d4edda'))  # Зеленый
-                elif lab['status'] == 'in_progress':
+                elif lab.status == 'in_progress':
                     status.setBackground(QColor('#fff3cd'))  # Желтый
                 else:
                     status.setBackground(QColor('#f8f9fa'))  # Серый
@@ -389,18 +400,16 @@ class LabSelectionWindow(QMainWindow):
                 self.labs_table.setItem(row, 2, status)
 
                 # Дата сдачи
-                submission_date = lab.get('submission_date', '')
-                if submission_date:
-                    date = QTableWidgetItem(submission_date.split()[0])
+                if lab.submission_date:
+                    date = QTableWidgetItem(lab.submission_date.split()[0])
                 else:
                     date = QTableWidgetItem('-')
                 date.setTextAlignment(Qt.AlignCenter)
                 self.labs_table.setItem(row, 3, date)
 
                 # Оценка
-                points = lab.get('points', 0)
-                if points > 0:
-                    grade = QTableWidgetItem(str(points))
+                if lab.points > 0:
+                    grade = QTableWidgetItem(str(lab.points))
                 else:
                     grade = QTableWidgetItem('-')
                 grade.setTextAlignment(Qt.AlignCenter)
@@ -9,11 +9,12 @@ from PyQt5.QtGui import QFont
 from loguru import logger
 from .test_results_window import TestResultsWindow
 from database.db_manager import DatabaseManager
+from database.records import UserRecord
 
 class LabTestWindow(QMainWindow):
     """Окно тестирования"""
 
-    def __init__(self, user_data: dict, lab_number: int, lab_topic: str, db_manager: DatabaseManager = None):
+    def __init__(self, user_data: UserRecord, lab_number: int, lab_topic: str, db_manager: DatabaseManager = None):
         super().__init__()
         self.user_data = user_data
         self.lab_number = lab_number
@@ -292,7 +293,7 @@ class LabTestWindow(QMainWindow):
 
         # Сохраняем результат в базу данных
         self.db.save_test_result(
-            user_id=self.user_data['id'],
+            user_id=self.user_data.id,
             lab_number=self.lab_number,
             score=score,
             max_score=max_score,
@@ -3,11 +3,12 @@ from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QFrame
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from database.db_manager import DatabaseManager
+from database.records import UserRecord
 
 class TestResultsWindow(QDialog):
     """Окно с результатами тестирования"""
 
-    def __init__(self, user_data: dict, lab_number: int, lab_topic: str,
+    def __init__(self, user_data: UserRecord, lab_number: int, lab_topic: str,
                  score: int, max_score: int, time_spent: int, db_manager: DatabaseManager):
         super().__init__()
 
@@ -25,9 +26,9 @@ class TestResultsWindow(QDialog):
         student_frame.setFrameShape(QFrame.StyledPanel)
         student_layout = QVBoxLayout(student_frame)
 
-        student_info = QLabel(f"Студент: {user_data['username']}")
+        student_info = QLabel(f"Студент: {user_data.username}")
         student_info.setFont(QFont('Segoe UI', 11))
-        group_info = QLabel(f"Группа: {user_data['group_number']}")
+        group_info = QLabel(f"Группа: {user_data.group_number}")
         group_info.setFont(QFont('Segoe UI', 11))
 
         student_layout.addWidget(student_info)
@@ -1,7 +1,7 @@
 """Окно тестирования"""
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QLabel,
                            QRadioButton, QButtonGroup, QPushButton, QMessageBox)
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, QSize, Qt
 from PyQt5 import uic
 import os
 from reportlab.pdfgen import canvas
@@ -9,6 +9,11 @@ from reportlab.lib.pagesizes import A4
 from datetime import datetime
 from typing import List, Tuple, Dict
 from students_app.utils.questions_db import QuestionsDB
+from students_app.utils.question_sampler import attempt_seed
+from students_app.ui.image_prefetcher import ImagePrefetcher
+
+# Размер, в который вписываются изображения вопросов
+QUESTION_IMAGE_SIZE = QSize(800, 450)
 
 class TestWindow(QMainWindow):
     def __init__(self, student_id, lab_id, result_id, parent=None):
@@ -21,6 +26,15 @@ class TestWindow(QMainWindow):
         self.questions: List[Tuple] = []
         self.answers: Dict[int, str] = {}
         self.remaining_time = QuestionsDB.TEST_DURATION * 60
+        self.image_labels: Dict[int, QLabel] = {}
+        # Пути к изображениям в базе отсчитываются от каталога приложения
+        self.image_prefetcher = ImagePrefetcher(
+            QUESTION_IMAGE_SIZE,
+            base_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            parent=self,
+        )
+        self.image_prefetcher.image_ready.connect(self.show_question_image)
+        self.image_prefetcher.image_failed.connect(self.show_image_error)
 
         # Load UI
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -53,8 +67,12 @@ class TestWindow(QMainWindow):
 
     def load_questions(self):
         """Загрузка вопросов"""
-        self.questions = self.questions_db.get_random_questions(self.lab_id)
+        # Зерно попытки: после перезапуска окна студент получит те же вопросы
+        self.questions = self.questions_db.get_random_questions(
+            self.lab_id, seed=attempt_seed(self.student_id, self.lab_id, self.result_id))
         self.progress_indicator.setMaximum(len(self.questions))
+        self.image_prefetcher.set_paths(
+            self.questions_db.get_question_images([q[0] for q in self.questions]))
 
     def create_question_widgets(self):
         for i, question in enumerate(self.questions):
@@ -68,6 +86,14 @@ class TestWindow(QMainWindow):
             question_label.setStyleSheet("QLabel { font-size: 16pt; padding: 20px; }")
             layout.addWidget(question_label)
 
+            # Изображение подставляется, когда его загрузит image_prefetcher
+            if self.image_prefetcher.has_image(i):
+                image_label = QLabel("Загрузка изображения…")
+                image_label.setAlignment(Qt.AlignCenter)
+                image_label.setMinimumHeight(QUESTION_IMAGE_SIZE.height())
+                layout.addWidget(image_label)
+                self.image_labels[i] = image_label
+
             # Answer options
             button_group = QButtonGroup(self)
             answers = ['A', 'B', 'C', 'D']  # Замените на реальные варианты ответов
@@ -81,10 +107,20 @@ class TestWindow(QMainWindow):
             self.question_stack.addWidget(page)
 
     def show_question(self, index):
+        # Изображение держит только текущая страница: объем памяти под
+        # изображения ограничивает кеш image_prefetcher
+        if index != self.current_question_index:
+            self.clear_question_image(self.current_question_index)
         self.current_question_index = index
         self.question_stack.setCurrentIndex(index)
         self.progress_indicator.setValue(index + 1)
 
+        # Изображение берется из кеша; следующие загружаются заранее
+        pixmap = self.image_prefetcher.pixmap(index)
+        if pixmap is not None:
+            self.show_question_image(index, pixmap)
+        self.image_prefetcher.prefetch(index)
+
         # Restore saved answer if exists
         if self.answers.get(index) is not None:
             buttons = self.question_stack.currentWidget().findChildren(QRadioButton)
@@ -92,6 +128,25 @@ class TestWindow(QMainWindow):
 
         self.update_navigation_buttons()
 
+    def show_question_image(self, index, pixmap):
+        """Показ загруженного изображения, если его вопрос на экране"""
+        label = self.image_labels.get(index)
+        if label is not None and index == self.current_question_index:
+            label.setPixmap(pixmap)
+
+    def clear_question_image(self, index):
+        """Освобождение изображения вопроса, ушедшего с экрана"""
+        label = self.image_labels.get(index)
+        if label is not None:
+            label.clear()
+            label.setText("Загрузка изображения…")
+
+    def show_image_error(self, index, error):
+        """Сообщение вместо изображения, которое не удалось загрузить"""
+        label = self.image_labels.get(index)
+        if label is not None:
+            label.setText(f"Не удалось загрузить изображение: {error}")
+
     def save_answer(self, question_index):
         buttons = self.question_stack.widget(question_index).findChildren(QRadioButton)
         for i, button in enumerate(buttons):
@@ -172,18 +227,11 @@ class TestWindow(QMainWindow):
             if reply == QMessageBox.No:
                 return
 
-        # Сохраняем ответы
-        for i, answer in self.answers.items():
-            question_id = self.questions[i][0]
-            answer_str = str(answer)
-            self.questions_db.submit_answer(
-                self.result_id,
-                question_id,
-                answer_str
-            )
-
-        # Завершаем тест в базе данных
-        total_points = self.questions_db.finish_test(self.result_id)
+        # Сохраняем ответы и завершаем тест в базе данных одной транзакцией
+        total_points = self.questions_db.submit_answers(
+            self.result_id,
+            [(self.questions[i][0], str(answer)) for i, answer in self.answers.items()]
+        )
 
         QMessageBox.information(
             self,
@@ -197,6 +245,11 @@ class TestWindow(QMainWindow):
         self.lab_window.show()
         self.close()
 
+    def closeEvent(self, event):
+        """Остановка фоновой загрузки изображений при закрытии окна"""
+        self.image_prefetcher.shutdown()
+        super().closeEvent(event)
+
     def export_to_pdf(self):
         """Экспорт результатов тестов в PDF"""
         try:
@@ -0,0 +1,132 @@
+"""
+Резервное копирование SQLite без остановки работы с базой
+
+Копия снимается через sqlite3.Connection.backup: за один шаг копируется
+pages страниц, между шагами копирование засыпает на pause секунд, не держа
+блокировку чтения, и писатели успевают зафиксировать свои транзакции.
+
+Если источник изменится другим соединением во время копирования, SQLite
+начинает шаги заново, и при непрерывной записи копирование не закончилось бы
+никогда. Для базы в режиме WAL на все время копирования открывается
+транзакция чтения: копия снимается со снимка на ее начало, а писатели
+продолжают работать с журналом.
+
+Сжатая копия не пишется в gzip по ходу копирования: backup API пишет страницы
+только в базу SQLite и при перезапуске шагов переписывает уже скопированные.
+Поэтому сначала целиком снимается несжатая копия во временный файл, и лишь
+затем она сжимается. На диске под копию нужно место на размер базы плюс размер
+сжатого файла.
+"""
+
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from loguru import logger
+
+# Размер порции при сжатии готовой копии
+GZIP_CHUNK_SIZE = 1024 * 1024
+
+
+class BackupProgress(NamedTuple):
+    """Ход резервного копирования"""
+
+    copied: int
+    total: int
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.copied / self.total if self.total else 100.0
+
+
+ProgressCallback = Callable[[BackupProgress], None]
+
+
+def backup_database(
+    source_path: str,
+    target_path: str,
+    pages: int = 256,
+    pause: float = 0.005,
+    progress: Optional[ProgressCallback] = None,
+    compress: bool = False,
+) -> str:
+    """
+    Согласованная копия базы данных SQLite
+
+    Args:
+        source_path: Путь к исходной базе данных
+        target_path: Путь к файлу копии (при сжатии к нему добавляется .gz)
+        pages: Количество страниц, копируемых за один шаг
+        pause: Пауза между шагами в секундах, на время которой база свободна
+        progress: Функция, получающая BackupProgress после каждого шага
+        compress: Сжать копию в gzip после копирования (временно нужна и
+            несжатая копия)
+
+    Returns:
+        Путь к созданному файлу копии
+    """
+    if pages < 1:
+        raise ValueError("Количество страниц за шаг должно быть положительным")
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"База данных не найдена: {source_path}")
+
+    if compress and not target_path.endswith(".gz"):
+        target_path += ".gz"
+    # Копия пишется во временный файл и появляется под своим именем только
+    # целиком, чтобы прерванное копирование не оставило битый файл
+    db_part = (target_path[: -len(".gz")] if compress else target_path) + ".part"
+
+    def on_step(status: int, remaining: int, total: int) -> None:
+        if progress is not None:
+            progress(BackupProgress(total - remaining, total))
+        # Модуль sqlite3 сам ждет только при занятой базе; между обычными
+        # шагами блокировка не удерживается, и пауза пропускает писателей
+        if remaining and pause > 0:
+            time.sleep(pause)
+
+    source_uri = Path(source_path).resolve().as_uri() + "?mode=ro"
+    source = sqlite3.connect(source_uri, uri=True, isolation_level=None)
+    try:
+        journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+        pinned = journal_mode.lower() == "wal"
+        if pinned:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        target = sqlite3.connect(db_part)
+        try:
+            source.backup(target, pages=pages, progress=on_step)
+        finally:
+            target.close()
+            if pinned:
+                source.execute("COMMIT")
+
+        if compress:
+            gz_part = target_path + ".part"
+            with open(db_part, "rb") as raw, gzip.open(gz_part, "wb") as packed:
+                shutil.copyfileobj(raw, packed, GZIP_CHUNK_SIZE)
+            os.remove(db_part)
+            os.replace(gz_part, target_path)
+        else:
+            os.replace(db_part, target_path)
+    except BaseException:
+        for part in (db_part, target_path + ".part"):
+            if os.path.exists(part):
+                os.remove(part)
+        raise
+    finally:
+        source.close()
+
+    logger.debug(f"Резервная копия создана: {target_path}")
+    return target_path
+
+
+def restore_gzip_backup(backup_path: str, target_path: str) -> str:
+    """Распаковка сжатой копии в файл базы данных"""
+    with gzip.open(backup_path, "rb") as packed, open(target_path, "wb") as raw:
+        shutil.copyfileobj(packed, raw, GZIP_CHUNK_SIZE)
+    return target_path
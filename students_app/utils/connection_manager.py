@@ -0,0 +1,137 @@
+"""
+Долгоживущие соединения SQLite по потокам
+
+Каждый поток получает одно соединение с базой и использует его во всех
+вызовах, вместо того чтобы открывать соединение на каждый метод. Новое
+соединение сразу настраивается (WAL, synchronous=NORMAL, кеш страниц,
+mmap, временные таблицы в памяти). Соединения завершившихся потоков
+закрываются при следующем обращении к менеджеру. Менеджер файла общий для
+всех объектов доступа к нему, поэтому объект при закрытии освобождает только
+соединение своего потока (close_thread); все соединения закрываются через
+close_all при завершении процесса.
+
+Соединение поддерживает протокол контекстного менеджера sqlite3: блок
+with фиксирует транзакцию при успехе и откатывает ее при ошибке, но
+соединение не закрывает.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+from typing import Dict, Mapping, Optional, Union
+
+from loguru import logger
+
+from utils import db_profiler
+
+# Настройки новых соединений
+DEFAULT_PRAGMAS: Dict[str, Union[int, str]] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -8000,  # 8 МБ
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+class ConnectionManager:
+    """Соединения с одной базой, закрепленные за потоками"""
+
+    def __init__(
+        self, db_path: str, pragmas: Optional[Mapping[str, Union[int, str]]] = None
+    ) -> None:
+        """
+        Args:
+            db_path: Путь к файлу базы данных
+            pragmas: Настройки соединений (по умолчанию DEFAULT_PRAGMAS)
+        """
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Соединение закрывается из любого потока (close, уборка за
+        # завершившимися потоками), но используется только своим потоком
+        conn = db_profiler.connect(
+            self.db_path,
+            timeout=int(self.pragmas.get("busy_timeout", 5000)) / 1000,
+            check_same_thread=False,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _close_dead_threads(self) -> None:
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            self._close(self._connections.pop(thread))
+
+    @staticmethod
+    def _close(conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Ошибка при закрытии соединения: {e}")
+
+    def get(self) -> sqlite3.Connection:
+        """Соединение текущего потока (открывается при первом обращении)"""
+        thread = threading.current_thread()
+        conn = self._connections.get(thread)
+        if conn is not None:
+            return conn
+        with self._lock:
+            self._close_dead_threads()
+            conn = self._connect()
+            self._connections[thread] = conn
+            self._opened += 1
+            return conn
+
+    def close_thread(self) -> None:
+        """Закрытие соединения текущего потока"""
+        with self._lock:
+            conn = self._connections.pop(threading.current_thread(), None)
+        if conn is not None:
+            self._close(conn)
+
+    def close_all(self) -> None:
+        """
+        Закрытие соединений всех потоков
+
+        Менеджер остается рабочим: следующий get откроет новое соединение.
+        """
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn in connections:
+            self._close(conn)
+
+    def stats(self) -> Dict[str, int]:
+        """Количество открытых сейчас и открытых за все время соединений"""
+        with self._lock:
+            return {"open": len(self._connections), "opened": self._opened}
+
+
+_MANAGERS: Dict[str, ConnectionManager] = {}
+_MANAGERS_LOCK = threading.Lock()
+
+
+def get_manager(db_path: str) -> ConnectionManager:
+    """Общий менеджер соединений для файла базы"""
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _MANAGERS_LOCK:
+        manager = _MANAGERS.get(key)
+        if manager is None:
+            manager = _MANAGERS[key] = ConnectionManager(db_path)
+        return manager
+
+
+@atexit.register
+def close_all() -> None:
+    """Закрытие соединений всех менеджеров"""
+    with _MANAGERS_LOCK:
+        managers = list(_MANAGERS.values())
+    for manager in managers:
+        manager.close_all()
@@ -0,0 +1,161 @@
+"""Пул соединений SQLite с привязкой соединения к потоку"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+from loguru import logger
+
+from utils import db_profiler
+
+# Завершение потока никого не будит, поэтому ожидание свободного соединения
+# прерывается с таким интервалом (в секундах), чтобы забрать соединения
+# завершившихся потоков, не дожидаясь acquire_timeout
+DEAD_THREAD_POLL = 0.05
+
+
+class PoolExhaustedError(sqlite3.OperationalError):
+    """Все соединения пула заняты дольше допустимого времени ожидания"""
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений: каждый поток получает своё соединение"""
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        busy_timeout: int = 5000,
+        acquire_timeout: float = 30.0,
+        journal_mode: str = "WAL",
+    ) -> None:
+        """
+        Инициализация пула
+
+        Args:
+            db_path: Путь к файлу базы данных
+            max_size: Максимальное количество открытых соединений
+            busy_timeout: Время ожидания блокировки SQLite в миллисекундах
+            acquire_timeout: Время ожидания свободного соединения в секундах
+            journal_mode: Режим журнала (WAL позволяет читать во время записи)
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self.busy_timeout = busy_timeout
+        self.acquire_timeout = acquire_timeout
+        self.journal_mode = journal_mode
+
+        self._idle: List[sqlite3.Connection] = []
+        self._owners: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Писатели внутри процесса ждут друг друга на блокировке Python,
+        # а не в цикле ожидания SQLite с растущими паузами
+        self.write_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открытие нового соединения с настройками пула"""
+        conn = db_profiler.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,  # Соединение может перейти к другому потоку
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        return conn
+
+    def _reclaim_dead_threads(self) -> None:
+        """Возврат в пул соединений завершившихся потоков"""
+        for thread in [t for t in self._owners if not t.is_alive()]:
+            conn = self._owners.pop(thread)
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.append(conn)
+
+    def connection(self) -> sqlite3.Connection:
+        """Получение соединения, закреплённого за текущим потоком"""
+        thread = threading.current_thread()
+        with self._cond:
+            conn = self._owners.get(thread)
+            if conn is not None:
+                return conn
+
+            deadline = time.monotonic() + self.acquire_timeout
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Пул соединений закрыт")
+
+                self._reclaim_dead_threads()
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    conn = self._connect()
+                    self._created += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"Нет свободных соединений (максимум {self.max_size})"
+                    )
+                self._cond.wait(min(remaining, DEAD_THREAD_POLL))
+
+            self._owners[thread] = conn
+            return conn
+
+    def holds_connection(self) -> bool:
+        """Закреплено ли соединение за текущим потоком"""
+        with self._cond:
+            return threading.current_thread() in self._owners
+
+    def release(self) -> None:
+        """Возврат соединения текущего потока в пул"""
+        thread = threading.current_thread()
+        with self._cond:
+            conn = self._owners.pop(thread, None)
+            if conn is None:
+                return
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self, optimize: bool = False) -> None:
+        """
+        Закрытие всех соединений пула
+
+        Args:
+            optimize: Выполнить PRAGMA optimize на свободных соединениях и на
+                соединении текущего потока перед закрытием
+        """
+        with self._cond:
+            self._closed = True
+            if optimize:
+                own = self._owners.get(threading.current_thread())
+                for conn in self._idle + ([own] if own is not None else []):
+                    try:
+                        conn.execute("PRAGMA optimize")
+                    except sqlite3.Error as e:
+                        logger.warning(f"Не удалось выполнить PRAGMA optimize: {e}")
+            for conn in self._idle + list(self._owners.values()):
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"Ошибка при закрытии соединения: {e}")
+            self._idle.clear()
+            self._owners.clear()
+            self._created = 0
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Статистика использования пула"""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "created": self._created,
+                "in_use": len(self._owners),
+                "idle": len(self._idle),
+            }
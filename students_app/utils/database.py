@@ -1,16 +1,31 @@
-import sqlite3
 from datetime import datetime
 import os
 
+from utils.connection_manager import get_manager
+
 class Database:
     def __init__(self, db_path='students.db'):
         """Инициализация базы данных"""
         self.db_path = db_path
+        self.connections = get_manager(db_path)
         self.init_db()
 
+    def get_connection(self):
+        """Соединение текущего потока с базой данных"""
+        return self.connections.get()
+
+    def close(self):
+        """
+        Закрытие соединения текущего потока
+
+        Другие потоки продолжают работать со своими соединениями, а другие
+        объекты того же файла в этом потоке при следующем запросе получат новое
+        """
+        self.connections.close_thread()
+
     def init_db(self):
         """Расширенная инициализация базы данных"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS students (
@@ -43,7 +58,7 @@ class Database:
 
     def add_student(self, group, name, date):
         """Добавление записи о посещении студента"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'INSERT INTO students (group_name, student_name, visit_date) VALUES (?, ?, ?)',
@@ -53,14 +68,14 @@ class Database:
 
     def get_all_students(self):
         """Получение всех записей"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT group_name, student_name, visit_date FROM students')
             return [{'group': row[0], 'name': row[1], 'date': row[2]} for row in cursor.fetchall()]
 
     def search_students(self, query):
         """Поиск студентов по имени или группе"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 '''SELECT group_name, student_name, visit_date
@@ -72,7 +87,7 @@ class Database:
 
     def get_students_by_group(self, group):
         """Получение студентов определенной группы"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'SELECT group_name, student_name, visit_date FROM students WHERE group_name = ?',
@@ -82,21 +97,21 @@ class Database:
 
     def get_groups(self):
         """Получение списка всех групп"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT DISTINCT group_name FROM students')
             return [row[0] for row in cursor.fetchall()]
 
     def clear_all(self):
         """Очистка всех данных (для тестов)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM students')
             conn.commit()
 
     def start_session(self, student_id):
         """Начало сессии работы студента"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'INSERT INTO sessions (student_id, start_time) VALUES (?, ?)',
@@ -106,7 +121,7 @@ class Database:
 
     def end_session(self, session_id):
         """Завершение сессии"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'UPDATE sessions SET end_time = ? WHERE id = ?',
@@ -116,4 +131,8 @@ class Database:
     def __del__(self):
         """Очистка тестовой базы данных при завершении"""
         if os.path.exists(self.db_path) and self.db_path == 'test.db':
-            os.remove(self.db_path)
+            self.close()
+            # Вместе с базой удаляются файлы журнала WAL
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
@@ -1,5 +1,6 @@
 """Утилиты для работы с базой данных"""
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from datetime import datetime
@@ -15,6 +16,10 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase
 
+from utils.backup import ProgressCallback, backup_database
+from utils.db_maintenance import vacuum_database
+from utils.db_stats import StatisticsCollector
+
 T = TypeVar("T", bound=DeclarativeBase)
 
 
@@ -31,6 +36,7 @@ class DatabaseManager:
         self.database_url = database_url
         self.engine: Optional[AsyncEngine] = None
         self.async_session: Optional[async_sessionmaker[AsyncSession]] = None
+        self._statistics: Optional[StatisticsCollector] = None
 
     async def init(self):
         """Инициализация подключения к базе данных"""
@@ -53,8 +59,17 @@ class DatabaseManager:
             logger.error(f"Failed to initialize database connection: {e}")
             raise
 
+    def _sqlite_path(self) -> str:
+        """Путь к файлу базы данных SQLite из URL"""
+        if not self.database_url.startswith("sqlite"):
+            raise NotImplementedError("Only SQLite databases are supported")
+        return self.database_url.split(":///", 1)[-1]
+
     async def close(self):
         """Закрытие подключения к базе данных"""
+        if self._statistics is not None:
+            self._statistics.close()
+            self._statistics = None
         if self.engine:
             await self.engine.dispose()
             logger.info("Database connection closed")
@@ -84,12 +99,22 @@ class DatabaseManager:
             logger.error(f"Database connection check failed: {e}")
             return False
 
-    async def create_backup(self, backup_dir: Optional[str] = None) -> str:
+    async def create_backup(
+        self,
+        backup_dir: Optional[str] = None,
+        compress: bool = False,
+        pages: int = 256,
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
         """
-        Создание резервной копии базы данных
+        Создание резервной копии базы данных без остановки записи
 
         Args:
             backup_dir: Директория для сохранения резервной копии
+            compress: Сжать копию в gzip
+            pages: Количество страниц, копируемых за один шаг
+            progress: Функция, получающая BackupProgress после каждого шага
+                (вызывается из рабочего потока)
 
         Returns:
             Путь к файлу резервной копии
@@ -107,12 +132,17 @@ class DatabaseManager:
         )
 
         try:
-            # Для SQLite можно просто скопировать файл
             if self.database_url.startswith("sqlite"):
-                import shutil
-
-                db_path = self.database_url.replace("sqlite+aiosqlite:///", "")
-                shutil.copy2(db_path, backup_file)
+                # Копирование по страницам через backup API выполняется в
+                # отдельном потоке, чтобы не останавливать цикл событий
+                backup_file = await asyncio.to_thread(
+                    backup_database,
+                    self._sqlite_path(),
+                    backup_file,
+                    pages=pages,
+                    progress=progress,
+                    compress=compress,
+                )
                 logger.info(f"Database backup created: {backup_file}")
                 return backup_file
             else:
@@ -188,42 +218,41 @@ class DatabaseManager:
             logger.error(f"Failed to get table info for {table_name}: {e}")
             raise
 
-    async def vacuum(self):
-        """Оптимизация базы данных"""
+    async def vacuum(self, full: bool = True):
+        """
+        Оптимизация базы данных
+
+        VACUUM нельзя выполнить внутри транзакции сессии, поэтому он
+        выполняется на отдельном соединении в рабочем потоке.
+
+        Args:
+            full: Полный VACUUM; иначе только возврат свободных страниц
+                (для баз в режиме auto_vacuum=INCREMENTAL)
+        """
         try:
-            async with self.session() as session:
-                await session.execute(text("VACUUM"))
-                logger.info("Database optimized")
+            await asyncio.to_thread(vacuum_database, self._sqlite_path(), full)
+            logger.info("Database optimized")
         except Exception as e:
             logger.error(f"Failed to optimize database: {e}")
             raise
 
-    async def get_statistics(self) -> Dict[str, Any]:
+    async def get_statistics(self, force: bool = False) -> Dict[str, Any]:
         """
         Получение статистики базы данных
 
+        Размеры таблиц и индексов собираются за один проход по dbstat,
+        результат кешируется до изменения базы другим соединением.
+
+        Args:
+            force: Пересчитать статистику, даже если база не менялась
+
         Returns:
-            Словарь со статистикой
+            Словарь со статистикой (см. utils.db_stats.collect_statistics)
         """
         try:
-            async with self.session() as session:
-                # Получаем список таблиц
-                result = await session.execute(
-                    text("SELECT name FROM sqlite_master WHERE type='table'")
-                )
-                tables = [row[0] for row in result.fetchall()]
-
-                stats = {"tables": {}, "total_size": 0, "total_rows": 0}
-
-                # Собираем статистику по каждой таблице
-                for table in tables:
-                    table_info = await self.get_table_info(table)
-                    stats["tables"][table] = table_info
-                    stats["total_size"] += table_info["size_bytes"]
-                    stats["total_rows"] += table_info["row_count"]
-
-                return stats
-
+            if self._statistics is None:
+                self._statistics = StatisticsCollector(self._sqlite_path())
+            return await asyncio.to_thread(self._statistics.get, force)
         except Exception as e:
             logger.error(f"Failed to get database statistics: {e}")
             raise
@@ -0,0 +1,317 @@
+"""
+Плановое обслуживание базы данных SQLite
+
+Планировщик считает записи в базу и после заметного объема изменений
+обновляет статистику планировщика запросов (ANALYZE с analysis_limit, чтобы
+не читать таблицы целиком). В периоды простоя он возвращает свободные
+страницы файлу небольшими шагами PRAGMA incremental_vacuum, ограниченными по
+времени. Длительность каждого шага сохраняется в истории.
+
+Новая student_app.db создается сразу в режиме auto_vacuum=INCREMENTAL
+(database.migrate.upgrade_database). Перевод существующей базы требует
+полного VACUUM, который держит блокировку всей базы дольше busy_timeout
+других процессов. Поэтому планировщик его не выполняет: это отдельный шаг
+администратора (python -m database.enable_incremental_vacuum), пока
+приложение остановлено.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+from loguru import logger
+
+from utils import db_profiler
+
+# Значение PRAGMA auto_vacuum для режима INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class MaintenanceRecord(NamedTuple):
+    """Выполненный шаг обслуживания"""
+
+    task: str
+    started_at: datetime
+    duration_ms: float
+    pages: int = 0
+
+
+def incremental_vacuum_step(conn: sqlite3.Connection, pages: int) -> int:
+    """
+    Возврат не более pages свободных страниц файлу
+
+    Returns:
+        Количество освобожденных страниц
+    """
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # execute выполняет прагму только на один шаг (одну страницу), а
+    # executescript доводит ее до конца
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+    after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return before - after
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """
+    Перевод базы в режим auto_vacuum=INCREMENTAL
+
+    Для существующей базы режим вступает в силу только после полного VACUUM,
+    поэтому вызывать ее можно, только когда с базой никто не работает.
+
+    Returns:
+        True, если база была переведена в этот раз
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def vacuum_database(db_path: str, full: bool = True, busy_timeout: int = 5000) -> None:
+    """
+    VACUUM вне транзакции и обновление статистики
+
+    Args:
+        db_path: Путь к файлу базы данных
+        full: Полный VACUUM; иначе возвращаются только свободные страницы
+            (требует режима auto_vacuum=INCREMENTAL)
+        busy_timeout: Время ожидания блокировки в миллисекундах
+    """
+    conn = db_profiler.connect(
+        db_path, timeout=busy_timeout / 1000, isolation_level=None
+    )
+    try:
+        if full:
+            conn.execute("VACUUM")
+        else:
+            incremental_vacuum_step(conn, 0)
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+
+class MaintenanceScheduler:
+    """
+    Планировщик ANALYZE и инкрементальной очистки базы данных
+
+    Записи учитываются через note_writes. run_pending выполняет назревшие
+    задачи; после start то же делает фоновый поток раз в check_interval
+    секунд.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        write_threshold: int = 1000,
+        idle_seconds: float = 30.0,
+        vacuum_pages: int = 64,
+        vacuum_budget: float = 0.05,
+        min_free_pages: int = 16,
+        analysis_limit: int = 400,
+        check_interval: float = 5.0,
+        busy_timeout: int = 1000,
+        history_size: int = 100,
+    ) -> None:
+        """
+        Args:
+            db_path: Путь к файлу базы данных
+            write_threshold: Количество измененных строк до повторного ANALYZE
+            idle_seconds: Время без записей, после которого база считается
+                простаивающей
+            vacuum_pages: Количество страниц за один шаг incremental_vacuum
+            vacuum_budget: Ограничение времени очистки за один запуск в секундах
+            min_free_pages: Минимум свободных страниц, ради которого стоит
+                запускать очистку
+            analysis_limit: Значение PRAGMA analysis_limit для ANALYZE
+            check_interval: Период проверки в фоновом потоке в секундах
+            busy_timeout: Время ожидания блокировки в миллисекундах; занятая
+                база откладывает задачу до следующей проверки
+            history_size: Количество хранимых записей о выполненных шагах
+        """
+        if vacuum_pages < 1:
+            raise ValueError("Количество страниц за шаг должно быть положительным")
+
+        self.db_path = db_path
+        self.write_threshold = write_threshold
+        self.idle_seconds = idle_seconds
+        self.vacuum_pages = vacuum_pages
+        self.vacuum_budget = vacuum_budget
+        self.min_free_pages = min_free_pages
+        self.analysis_limit = analysis_limit
+        self.check_interval = check_interval
+        self.busy_timeout = busy_timeout
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Задачи фонового потока и явные вызовы не выполняются одновременно
+        self._task_lock = threading.Lock()
+        self._writes = 0
+        self._last_write = time.monotonic()
+        self._history: Deque[MaintenanceRecord] = deque(maxlen=history_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def note_writes(self, count: int = 1) -> None:
+        """Учет измененных строк"""
+        if count <= 0:
+            return
+        with self._lock:
+            self._writes += count
+            self._last_write = time.monotonic()
+
+    def is_idle(self) -> bool:
+        """Записей не было дольше idle_seconds"""
+        with self._lock:
+            return time.monotonic() - self._last_write >= self.idle_seconds
+
+    def history(self) -> List[MaintenanceRecord]:
+        """Выполненные шаги обслуживания, от старых к новым"""
+        with self._lock:
+            return list(self._history)
+
+    def stats(self) -> Dict[str, Any]:
+        """Накопленные записи и суммарное время шагов по задачам"""
+        with self._lock:
+            totals: Dict[str, float] = {}
+            for record in self._history:
+                totals[record.task] = totals.get(record.task, 0.0) + record.duration_ms
+            return {"pending_writes": self._writes, "duration_ms": totals}
+
+    def _connection(self) -> sqlite3.Connection:
+        # Соединение без неявных транзакций: VACUUM и incremental_vacuum
+        # нельзя выполнять внутри транзакции
+        if self._conn is None:
+            self._conn = db_profiler.connect(
+                self.db_path,
+                timeout=self.busy_timeout / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+        return self._conn
+
+    def _record(self, task: str, started: float, pages: int = 0) -> MaintenanceRecord:
+        duration_ms = (time.perf_counter() - started) * 1000
+        record = MaintenanceRecord(task, datetime.now(), duration_ms, pages)
+        with self._lock:
+            self._history.append(record)
+        logger.debug(
+            f"Обслуживание БД: {task} за {duration_ms:.1f} мс, страниц: {pages}"
+        )
+        return record
+
+    def analyze(self) -> MaintenanceRecord:
+        """Обновление статистики планировщика запросов"""
+        conn = self._connection()
+        with self._lock:
+            writes, self._writes = self._writes, 0
+        started = time.perf_counter()
+        try:
+            conn.execute(f"PRAGMA analysis_limit = {int(self.analysis_limit)}")
+            conn.execute("ANALYZE")
+        except sqlite3.Error:
+            self.note_writes(writes)
+            raise
+        return self._record("analyze", started)
+
+    def enable_incremental_vacuum(self) -> Optional[MaintenanceRecord]:
+        """
+        Перевод базы в режим auto_vacuum=INCREMENTAL, если это еще не сделано
+
+        Выполняет полный VACUUM, поэтому run_pending ее не вызывает.
+        """
+        started = time.perf_counter()
+        if not enable_incremental_vacuum(self._connection()):
+            return None
+        logger.info(f"База {self.db_path} переведена в режим auto_vacuum=INCREMENTAL")
+        return self._record("enable_incremental_vacuum", started)
+
+    def incremental_vacuum(
+        self, budget: Optional[float] = None
+    ) -> List[MaintenanceRecord]:
+        """
+        Возврат свободных страниц шагами по vacuum_pages страниц
+
+        Очистка прекращается, когда исчерпан бюджет времени, свободных
+        страниц не осталось или в базу снова начали писать.
+
+        Args:
+            budget: Ограничение времени в секундах (по умолчанию vacuum_budget)
+        """
+        conn = self._connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            return []
+
+        with self._lock:
+            last_write = self._last_write
+        deadline = time.perf_counter() + (
+            self.vacuum_budget if budget is None else budget
+        )
+        records = []
+        while time.perf_counter() < deadline:
+            if conn.execute("PRAGMA freelist_count").fetchone()[0] == 0:
+                break
+            with self._lock:
+                if self._last_write != last_write:
+                    break
+            started = time.perf_counter()
+            pages = incremental_vacuum_step(conn, self.vacuum_pages)
+            records.append(self._record("incremental_vacuum", started, pages))
+            if pages == 0:
+                break
+        return records
+
+    def run_pending(self) -> List[MaintenanceRecord]:
+        """Выполнение назревших задач; занятая база откладывает их"""
+        records: List[MaintenanceRecord] = []
+        with self._task_lock:
+            try:
+                self._run_pending(records)
+            except sqlite3.OperationalError as e:
+                logger.debug(f"Обслуживание БД отложено: {e}")
+        return records
+
+    def _run_pending(self, records: List[MaintenanceRecord]) -> None:
+        with self._lock:
+            writes = self._writes
+        if writes >= self.write_threshold:
+            records.append(self.analyze())
+
+        # Только шаги incremental_vacuum: полный VACUUM здесь не выполняется
+        if not self.is_idle():
+            return
+        free_pages = self._connection().execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages >= max(self.min_free_pages, 1):
+            records.extend(self.incremental_vacuum())
+
+    def _run(self) -> None:
+        """Цикл фонового потока"""
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.run_pending()
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка обслуживания базы данных: {e}")
+
+    def start(self) -> None:
+        """Запуск фонового потока обслуживания"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="db-maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановка фонового потока и закрытие соединения"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._task_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
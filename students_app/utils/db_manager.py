@@ -81,6 +81,25 @@ class DatabaseManager:
         '''
         return self.execute_query(query, (lab_id, q_type, text, answer, image_path))
 
+    def add_questions(self, questions):
+        """
+        Добавление нескольких вопросов одной транзакцией
+
+        Args:
+            questions: Кортежи (lab_id, q_type, text, answer, image_path)
+        """
+        query = '''
+        INSERT INTO questions (lab_id, question_type, question_text, correct_answer, image_path)
+        VALUES (?, ?, ?, ?, ?)
+        '''
+        try:
+            with self.connection:
+                self.cursor.executemany(query, questions)
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при выполнении запроса: {e}")
+            return False
+
     def update_question(self, question_id, text, answer, image_path=None):
         """Обновление существующего вопроса"""
         query = '''
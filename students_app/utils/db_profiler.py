@@ -0,0 +1,327 @@
+"""
+Профилирование SQL-запросов
+
+Соединения, открытые через connect() при включенном профилировании,
+записывают для каждого выражения количество выполнений, гистограмму времени
+(выполнение и чтение всех строк) и количество строк. В режиме отладки для
+каждого нового выражения выполняется EXPLAIN QUERY PLAN, а выражения с полным
+просмотром таблицы попадают в отдельный раздел отчета.
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+from loguru import logger
+
+# Верхние границы интервалов гистограммы в миллисекундах
+HISTOGRAM_BOUNDS_MS = (0.1, 1.0, 10.0, 100.0, 1000.0)
+
+_PLANNED_PREFIXES = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def normalize_sql(sql: str) -> str:
+    """Выражение в одну строку для группировки статистики"""
+    return " ".join(sql.split())
+
+
+def is_full_scan(detail: str) -> bool:
+    """Строка плана означает полный просмотр таблицы без индекса"""
+    return (
+        detail.startswith("SCAN ")
+        and " INDEX " not in detail
+        and "CONSTANT ROW" not in detail
+        and "(subquery" not in detail
+    )
+
+
+class StatementStats:
+    """Накопленная статистика одного SQL-выражения"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "rows", "histogram", "plan")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.plan: Optional[List[str]] = None
+
+    def add(self, elapsed_ms: float, rows: int) -> None:
+        """Учет одного выполнения"""
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += max(rows, 0)
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if elapsed_ms < bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+
+class QueryProfiler:
+    """Сборщик статистики SQL-выражений всех профилируемых соединений"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.explain = False
+        self._stats: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, explain: bool = False) -> None:
+        """
+        Включение профилирования для соединений, открытых после вызова
+
+        Args:
+            explain: Получать план каждого нового выражения (режим отладки)
+        """
+        self.enabled = True
+        self.explain = explain
+        logger.info(f"Профилирование SQL включено (планы запросов: {explain})")
+
+    def disable(self) -> None:
+        """Отключение профилирования для новых соединений"""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Очистка накопленной статистики"""
+        with self._lock:
+            self._stats.clear()
+
+    def record(self, sql: str, elapsed_ms: float, rows: int) -> None:
+        """Учет выполнения выражения"""
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.add(elapsed_ms, rows)
+
+    def needs_plan(self, sql: str) -> bool:
+        """План выражения еще не получен и его стоит получить"""
+        if not self.explain:
+            return False
+        key = normalize_sql(sql)
+        if not key.upper().startswith(_PLANNED_PREFIXES):
+            return False
+        with self._lock:
+            stats = self._stats.get(key)
+            return stats is None or stats.plan is None
+
+    def record_plan(self, sql: str, plan: List[str]) -> None:
+        """Сохранение плана выражения и предупреждение о полном просмотре"""
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.plan = plan
+        scans = [detail for detail in plan if is_full_scan(detail)]
+        if scans:
+            logger.warning(f"Полный просмотр таблицы ({'; '.join(scans)}): {key}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Копия статистики по выражениям"""
+        with self._lock:
+            return {
+                sql: {
+                    "count": stats.count,
+                    "total_ms": stats.total_ms,
+                    "max_ms": stats.max_ms,
+                    "rows": stats.rows,
+                    "histogram": list(stats.histogram),
+                    "plan": list(stats.plan) if stats.plan is not None else None,
+                }
+                for sql, stats in self._stats.items()
+            }
+
+    def full_scans(self) -> Dict[str, List[str]]:
+        """Выражения, план которых содержит полный просмотр таблицы"""
+        return {
+            sql: item["plan"]
+            for sql, item in self.snapshot().items()
+            if item["plan"] and any(is_full_scan(detail) for detail in item["plan"])
+        }
+
+    def report(self, limit: int = 30) -> str:
+        """Текстовый отчет: самые затратные выражения и полные просмотры"""
+        items = sorted(
+            self.snapshot().items(), key=lambda item: item[1]["total_ms"], reverse=True
+        )
+        bounds = [f"<{bound:g}" for bound in HISTOGRAM_BOUNDS_MS]
+        bounds.append(f">={HISTOGRAM_BOUNDS_MS[-1]:g}")
+
+        lines = [
+            f"Профиль SQL: {len(items)} выражений, "
+            f"{sum(item['count'] for _, item in items)} выполнений",
+            f"Гистограмма, мс: {' '.join(bounds)}",
+            "",
+            f"{'вызовов':>8} {'всего, мс':>10} {'сред., мс':>10} {'макс., мс':>10} "
+            f"{'строк':>9}  гистограмма / выражение",
+        ]
+        for sql, item in items[:limit]:
+            lines.append(
+                f"{item['count']:>8} {item['total_ms']:>10.1f} "
+                f"{item['total_ms'] / item['count'] if item['count'] else 0:>10.2f} "
+                f"{item['max_ms']:>10.2f} {item['rows']:>9}  "
+                f"{' '.join(map(str, item['histogram']))}"
+            )
+            lines.append(f"{'':>52}{sql[:160]}")
+
+        scans = self.full_scans()
+        if scans:
+            lines.extend(["", "Полный просмотр таблиц:"])
+            for sql, plan in scans.items():
+                lines.append(f"  {sql[:160]}")
+                lines.extend(f"    {detail}" for detail in plan)
+        return "\n".join(lines)
+
+    def dump_report(self, stream: Optional[TextIO] = None) -> None:
+        """Вывод отчета (по умолчанию в stderr)"""
+        print(self.report(), file=stream or sys.stderr)
+
+
+PROFILER = QueryProfiler()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Курсор, учитывающий время выражения вместе с чтением его строк"""
+
+    _sql: Optional[str] = None
+    _elapsed = 0.0
+    _rows = 0
+
+    def _begin(self, sql: str, parameters: Any = None) -> None:
+        """Завершение учета предыдущего выражения и подготовка плана нового"""
+        self._finish()
+        if parameters is not None and PROFILER.needs_plan(sql):
+            explain = sqlite3.Cursor(self.connection)
+            try:
+                plan = explain.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+                PROFILER.record_plan(sql, [row[3] for row in plan.fetchall()])
+            except sqlite3.Error:
+                pass
+            finally:
+                explain.close()
+        self._sql = sql
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def _finish(self) -> None:
+        """Запись статистики текущего выражения"""
+        if self._sql is not None:
+            PROFILER.record(self._sql, self._elapsed * 1000, self._rows)
+            self._sql = None
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def execute(self, sql: str, parameters: Any = ()) -> "ProfiledCursor":
+        self._begin(sql, parameters)
+        try:
+            self._timed(super().execute, sql, parameters)
+        except Exception:
+            self._finish()
+            raise
+        if self.description is None:
+            # Выражение без результата: учитываем сразу с числом измененных строк
+            self._rows = self.rowcount
+            self._finish()
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "ProfiledCursor":
+        self._begin(sql)
+        try:
+            self._timed(super().executemany, sql, seq_of_parameters)
+            self._rows = self.rowcount
+        finally:
+            self._finish()
+        return self
+
+    def executescript(self, sql_script: str) -> "ProfiledCursor":
+        self._begin(sql_script)
+        try:
+            self._timed(super().executescript, sql_script)
+        finally:
+            self._finish()
+        return self
+
+    def fetchone(self) -> Any:
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        rows = self._timed(super().fetchall)
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self) -> Any:
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        self._rows += 1
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        self._finish()
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Соединение, все курсоры которого профилируются"""
+
+    def cursor(self, factory=ProfiledCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str) -> sqlite3.Cursor:
+        return self.cursor().executescript(sql_script)
+
+
+def connect(database: str, **kwargs: Any) -> sqlite3.Connection:
+    """sqlite3.connect; при включенном профилировании соединение профилируется"""
+    if PROFILER.enabled:
+        kwargs.setdefault("factory", ProfiledConnection)
+    return sqlite3.connect(database, **kwargs)
+
+
+def enable(explain: bool = False) -> None:
+    """Включение профилирования (см. QueryProfiler.enable)"""
+    PROFILER.enable(explain)
+
+
+def dump_report(stream: Optional[TextIO] = None) -> None:
+    """Вывод отчета общего профилировщика"""
+    PROFILER.dump_report(stream)
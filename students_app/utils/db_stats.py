@@ -0,0 +1,255 @@
+"""
+Статистика базы данных SQLite за один проход
+
+Размеры таблиц и индексов берутся из виртуальной таблицы dbstat одним
+просмотром всех страниц. Если SQLite собран без dbstat, размеры оцениваются
+по выборке строк. Количество строк берется из sqlite_stat1 (после ANALYZE),
+а при ее отсутствии - из числа записей в b-дереве объекта.
+
+Результат кешируется и пересчитывается только после того, как другое
+соединение изменило базу (PRAGMA data_version).
+"""
+
+import copy
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from utils import db_profiler
+
+# Количество строк, по которым оценивается средний размер строки без dbstat
+SAMPLE_ROWS = 200
+
+
+def _new_object(name: str, kind: str, table: str, index_btree: bool) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "type": kind,
+        "table": table,
+        # В b-дереве индекса (и таблицы WITHOUT ROWID) ключи есть и во
+        # внутренних страницах, в таблице с rowid - только в листьях
+        "index_btree": index_btree,
+        "cells": 0,
+        "pages": 0,
+        "size_bytes": 0,
+        "unused_bytes": 0,
+        "row_estimate": None,
+        "fragmentation": 0.0,
+    }
+
+
+def _schema_objects(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+    """Таблицы и индексы из sqlite_master"""
+    objects = {}
+    for name, kind, table, sql in conn.execute(
+        "SELECT name, type, tbl_name, sql FROM sqlite_master "
+        "WHERE type IN ('table', 'index')"
+    ):
+        without_rowid = "WITHOUT ROWID" in " ".join((sql or "").upper().split())
+        objects[name] = _new_object(name, kind, table, kind == "index" or without_rowid)
+    return objects
+
+
+def _has_dbstat(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("SELECT 1 FROM dbstat LIMIT 1").fetchall()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def _scan_dbstat(conn: sqlite3.Connection, objects: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Один проход по dbstat: страницы, байты, ячейки и фрагментация
+
+    Фрагментация - доля страниц объекта, которые в порядке обхода b-дерева
+    лежат в файле не сразу за предыдущей страницей.
+    """
+    previous: Dict[str, int] = {}
+    jumps: Dict[str, int] = {}
+    for name, pageno, pagetype, ncell, unused, pgsize in conn.execute(
+        "SELECT name, pageno, pagetype, ncell, unused, pgsize FROM dbstat"
+    ):
+        item = objects.get(name)
+        if item is None:
+            item = objects[name] = _new_object(name, "table", name, False)
+        item["pages"] += 1
+        item["size_bytes"] += pgsize
+        item["unused_bytes"] += unused
+        if pagetype == "leaf" or item["index_btree"]:
+            item["cells"] += ncell
+
+        last = previous.get(name)
+        if last is not None and pageno != last + 1:
+            jumps[name] = jumps.get(name, 0) + 1
+        previous[name] = pageno
+
+    for name, item in objects.items():
+        if item["pages"] > 1:
+            item["fragmentation"] = jumps.get(name, 0) / (item["pages"] - 1)
+
+
+def _sample_sizes(
+    conn: sqlite3.Connection, objects: Dict[str, Dict[str, Any]], page_size: int
+) -> None:
+    """Оценка размеров таблиц по выборке строк, когда dbstat недоступна"""
+    for item in objects.values():
+        if item["type"] != "table" or item["name"].startswith("sqlite_"):
+            continue
+        name = item["name"].replace('"', '""')
+        try:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')]
+            if not columns:
+                continue
+            lengths = " + ".join(
+                f'COALESCE(LENGTH(CAST("{column}" AS BLOB)), 0)'
+                for column in (c.replace('"', '""') for c in columns)
+            )
+            sample = conn.execute(
+                f'SELECT COUNT(*), AVG({lengths}) FROM (SELECT * FROM "{name}" '
+                f"LIMIT {SAMPLE_ROWS})"
+            ).fetchone()
+            rows = item["row_estimate"]
+            if rows is None:
+                # Для таблиц с rowid максимальный rowid - быстрая оценка сверху
+                rows = conn.execute(f'SELECT MAX(rowid) FROM "{name}"').fetchone()[0]
+                rows = rows or sample[0]
+                item["row_estimate"] = rows
+        except sqlite3.Error as e:
+            logger.debug(f"Не удалось оценить размер {item['name']}: {e}")
+            continue
+        size = int((sample[1] or 0) * (rows or 0))
+        item["size_bytes"] = size
+        item["pages"] = -(-size // page_size)
+
+
+def _stat1_estimates(
+    conn: sqlite3.Connection, objects: Dict[str, Dict[str, Any]]
+) -> None:
+    """Количество строк из sqlite_stat1: первое число поля stat"""
+    try:
+        rows = conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.Error:
+        return
+    for table, index, stat in rows:
+        try:
+            estimate = int(str(stat).split()[0])
+        except (ValueError, IndexError):
+            continue
+        for name in (table, index):
+            if name in objects:
+                objects[name]["row_estimate"] = estimate
+
+
+def collect_statistics(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Статистика базы данных
+
+    Returns:
+        Словарь с ключами tables (таблицы с вложенными indexes), total_size,
+        total_rows, page_size, page_count, free_pages, free_ratio и method
+        (dbstat или sample)
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    objects = _schema_objects(conn)
+    _stat1_estimates(conn, objects)
+    if _has_dbstat(conn):
+        method = "dbstat"
+        _scan_dbstat(conn, objects)
+        for item in objects.values():
+            if item["row_estimate"] is None and item["pages"]:
+                item["row_estimate"] = item["cells"]
+    else:
+        method = "sample"
+        _sample_sizes(conn, objects, page_size)
+
+    tables: Dict[str, Dict[str, Any]] = {}
+    for item in objects.values():
+        if item["type"] == "table":
+            tables[item["name"]] = {
+                "table_name": item["name"],
+                "row_count": item["row_estimate"] or 0,
+                "size_bytes": item["size_bytes"],
+                "pages": item["pages"],
+                "unused_bytes": item["unused_bytes"],
+                "fragmentation": item["fragmentation"],
+                "indexes": {},
+            }
+    for item in objects.values():
+        if item["type"] == "index" and item["table"] in tables:
+            tables[item["table"]]["indexes"][item["name"]] = {
+                "index_name": item["name"],
+                "row_count": item["row_estimate"] or 0,
+                "size_bytes": item["size_bytes"],
+                "pages": item["pages"],
+                "unused_bytes": item["unused_bytes"],
+                "fragmentation": item["fragmentation"],
+            }
+
+    return {
+        "tables": tables,
+        "total_size": page_count * page_size,
+        "total_rows": sum(
+            table["row_count"]
+            for name, table in tables.items()
+            if not name.startswith("sqlite_")
+        ),
+        "page_size": page_size,
+        "page_count": page_count,
+        "free_pages": free_pages,
+        "free_ratio": free_pages / page_count if page_count else 0.0,
+        "method": method,
+    }
+
+
+class StatisticsCollector:
+    """Кеш статистики с проверкой изменений через PRAGMA data_version"""
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Args:
+            db_path: Путь к файлу базы данных
+        """
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._cached: Optional[Tuple[int, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Собственное соединение только читает, поэтому data_version на нем
+        # меняется при любой фиксации других соединений
+        if self._conn is None:
+            self._conn = db_profiler.connect(self.db_path, check_same_thread=False)
+        return self._conn
+
+    def get(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Статистика из кеша или пересчитанная после изменений базы
+
+        Возвращается копия: изменения у вызывающего не попадают в кеш и в
+        результаты других вызовов
+        """
+        with self._lock:
+            conn = self._connection()
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if force or self._cached is None or self._cached[0] != version:
+                self._cached = (version, collect_statistics(conn))
+            return copy.deepcopy(self._cached[1])
+
+    def invalidate(self) -> None:
+        """Сброс кеша"""
+        with self._lock:
+            self._cached = None
+
+    def close(self) -> None:
+        """Закрытие соединения сборщика"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cached = None
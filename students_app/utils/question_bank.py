@@ -0,0 +1,166 @@
+"""
+Общий для процесса кеш банка вопросов
+
+Лабораторные работы и вопросы с правильными ответами меняются редко, поэтому
+хранятся в памяти в виде кортежей. Актуальность проверяется без чтения
+таблиц: на собственном соединении кеша запрашивается PRAGMA data_version,
+которая меняется только после фиксации изменений другими соединениями. Если
+база менялась, сравнивается сумма версий банков (question_bank_versions,
+ее поддерживают триггеры questions и labs), и только при ее изменении банк
+загружается заново. Замена файла базы (например, восстановление из копии)
+определяется по stat файла.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from utils import db_profiler
+
+
+class QuestionRecord(NamedTuple):
+    """Вопрос банка"""
+
+    id: int
+    lab_id: int
+    question_text: str
+    correct_answer: str
+    points: int
+    image_path: Optional[str]
+
+
+class QuestionBank(NamedTuple):
+    """Содержимое банка вопросов"""
+
+    stamp: float
+    labs: Tuple[Tuple[int, str, str], ...]
+    questions: Dict[int, QuestionRecord]
+    by_lab: Dict[int, Tuple[int, ...]]
+    versions: Dict[int, int]
+
+
+def load_bank(conn: sqlite3.Connection, stamp: float) -> QuestionBank:
+    """Загрузка банка вопросов по соединению"""
+    labs = tuple(conn.execute("SELECT id, name, description FROM labs ORDER BY id"))
+    questions: Dict[int, QuestionRecord] = {}
+    by_lab: Dict[int, list] = {}
+    rows = conn.execute(
+        "SELECT id, lab_id, question_text, correct_answer, points, image_path "
+        "FROM questions ORDER BY id"
+    )
+    for row in rows:
+        record = QuestionRecord(*row)
+        questions[record.id] = record
+        by_lab.setdefault(record.lab_id, []).append(record.id)
+    versions = dict(conn.execute("SELECT lab_id, version FROM question_bank_versions"))
+    return QuestionBank(
+        stamp,
+        labs,
+        questions,
+        {lab_id: tuple(ids) for lab_id, ids in by_lab.items()},
+        versions,
+    )
+
+
+class QuestionBankCache:
+    """Кеш банка вопросов одной базы"""
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Args:
+            db_path: Путь к файлу базы данных
+        """
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._file: Optional[Tuple[int, int]] = None
+        self._data_version: Optional[int] = None
+        self._bank: Optional[QuestionBank] = None
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def _file_id(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def _connection(self) -> sqlite3.Connection:
+        # Файл заменен: старое соединение видит прежнюю базу
+        file_id = self._file_id()
+        if self._conn is not None and file_id != self._file:
+            self._conn.close()
+            self._conn = None
+            self._bank = None
+        if self._conn is None:
+            # Соединение только читает, поэтому data_version на нем меняется
+            # при любой фиксации других соединений
+            self._conn = db_profiler.connect(self.db_path, check_same_thread=False)
+            self._file = file_id
+            self._data_version = None
+        return self._conn
+
+    def get(self) -> QuestionBank:
+        """Банк вопросов из кеша или загруженный заново после изменений"""
+        with self._lock:
+            conn = self._connection()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._bank is not None and data_version == self._data_version:
+                self._hits += 1
+                return self._bank
+
+            # База менялась, но не обязательно банк вопросов
+            stamp = conn.execute(
+                "SELECT total(version) FROM question_bank_versions"
+            ).fetchone()[0]
+            self._data_version = data_version
+            if self._bank is not None and self._bank.stamp == stamp:
+                self._hits += 1
+                return self._bank
+
+            self._misses += 1
+            self._bank = load_bank(conn, stamp)
+            return self._bank
+
+    def invalidate(self) -> None:
+        """Сброс кеша"""
+        with self._lock:
+            self._bank = None
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики обращений: hits - без загрузки банка, misses - с загрузкой"""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses}
+
+    def close(self) -> None:
+        """Закрытие соединения кеша"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._bank = None
+
+
+_CACHES: Dict[str, QuestionBankCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(db_path: str) -> QuestionBankCache:
+    """Общий кеш банка вопросов для файла базы"""
+    key = os.path.abspath(db_path)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = QuestionBankCache(db_path)
+        return cache
+
+
+def clear_caches() -> None:
+    """Закрытие и сброс всех кешей"""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+        _CACHES.clear()
+    for cache in caches:
+        cache.close()
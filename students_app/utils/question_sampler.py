@@ -0,0 +1,148 @@
+"""
+Выборка случайных вопросов без сортировки всего банка
+
+Для каждой лабораторной работы в памяти хранится упорядоченный по id
+кортеж вопросов (и отдельные кортежи по группам для стратифицированной
+выборки). k вопросов без повторений выбираются алгоритмом Флойда за O(k)
+обращений к генератору, независимо от размера банка. Генератор
+инициализируется зерном, поэтому при том же зерне и неизменном банке
+выборка повторяется в точности (например, после аварийного завершения).
+"""
+
+import hashlib
+import random
+import threading
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+# Загрузка банка: (версия банка, строки (id вопроса, группа)) по id работы
+BankLoader = Callable[[int], Tuple[int, Sequence[Tuple[int, Hashable]]]]
+
+
+def attempt_seed(student_id: int, lab_id: int, attempt: int) -> int:
+    """
+    Зерно выборки для попытки студента
+
+    Не зависит от запуска интерпретатора (в отличие от hash для строк).
+    """
+    digest = hashlib.blake2b(
+        f"{student_id}:{lab_id}:{attempt}".encode(), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big")
+
+
+def floyd_sample(population: Sequence[int], k: int, rng: random.Random) -> List[int]:
+    """
+    k различных элементов в случайном порядке за O(k)
+
+    Args:
+        population: Элементы, из которых выбираются k
+        k: Размер выборки (не больше размера population)
+        rng: Генератор случайных чисел
+    """
+    n = len(population)
+    chosen: Dict[int, None] = {}
+    for j in range(n - k, n):
+        index = rng.randrange(j + 1)
+        chosen[j if index in chosen else index] = None
+    order = list(chosen)
+    rng.shuffle(order)
+    return [population[index] for index in order]
+
+
+class LabBank(NamedTuple):
+    """Вопросы одной работы в кеше выборки"""
+
+    version: int
+    ids: Tuple[int, ...]
+    strata: Dict[Hashable, Tuple[int, ...]]
+
+
+class QuestionSampler:
+    """Кеш банков вопросов по работам и выборка из них"""
+
+    def __init__(self, loader: BankLoader) -> None:
+        """
+        Args:
+            loader: Функция, возвращающая версию банка работы и строки
+                (id вопроса, группа) в порядке id
+        """
+        self.loader = loader
+        self._banks: Dict[int, LabBank] = {}
+        self._lock = threading.Lock()
+
+    def bank(self, lab_id: int, version: Optional[int] = None) -> LabBank:
+        """
+        Банк работы из кеша
+
+        Args:
+            lab_id: id лабораторной работы
+            version: Текущая версия банка; если она отличается от
+                сохраненной, банк загружается заново
+        """
+        with self._lock:
+            bank = self._banks.get(lab_id)
+        if bank is not None and (version is None or bank.version == version):
+            return bank
+
+        loaded_version, rows = self.loader(lab_id)
+        strata: Dict[Hashable, List[int]] = {}
+        for question_id, stratum in rows:
+            strata.setdefault(stratum, []).append(question_id)
+        bank = LabBank(
+            loaded_version,
+            tuple(question_id for question_id, _ in rows),
+            {stratum: tuple(ids) for stratum, ids in strata.items()},
+        )
+        with self._lock:
+            self._banks[lab_id] = bank
+        return bank
+
+    def invalidate(self, lab_id: Optional[int] = None) -> None:
+        """Сброс банка работы (или всех банков)"""
+        with self._lock:
+            if lab_id is None:
+                self._banks.clear()
+            else:
+                self._banks.pop(lab_id, None)
+
+    def sample(
+        self,
+        lab_id: int,
+        count: int,
+        seed: Optional[int] = None,
+        strata: Optional[Mapping[Hashable, int]] = None,
+        version: Optional[int] = None,
+    ) -> List[int]:
+        """
+        id случайных вопросов без повторений
+
+        Args:
+            lab_id: id лабораторной работы
+            count: Количество вопросов (при нехватке - все вопросы банка)
+            seed: Зерно генератора; None - случайная выборка
+            strata: Количество вопросов по группам; группы перебираются в
+                порядке сортировки, count при этом не используется
+            version: Текущая версия банка (см. bank)
+        """
+        bank = self.bank(lab_id, version)
+        rng = random.Random(seed)
+        if strata is None:
+            return floyd_sample(bank.ids, min(count, len(bank.ids)), rng)
+
+        selected: List[int] = []
+        for stratum in sorted(strata, key=repr):
+            ids = bank.strata.get(stratum, ())
+            selected.extend(floyd_sample(ids, min(strata[stratum], len(ids)), rng))
+        # Вопросы разных групп перемешиваются между собой
+        rng.shuffle(selected)
+        return selected
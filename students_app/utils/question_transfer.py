@@ -0,0 +1,279 @@
+"""
+Потоковый импорт и экспорт банка вопросов (CSV и JSON Lines)
+
+Формат строки: lab (название работы) или lab_id, question_text,
+correct_answer и необязательный points (по умолчанию 1). Формат файла
+определяется по расширению: .csv или .jsonl/.ndjson.
+
+Импорт читает файл порциями по chunk_size строк: строки порции
+проверяются, id работ берутся из словаря, построенного один раз за импорт,
+и порция записывается одним executemany в своей транзакции. Ошибочные
+строки пропускаются и попадают в отчет с номером строки файла; если порцию
+не удалось записать, в отчет попадают все ее строки, а импорт продолжается
+со следующей порции. Экспорт читает вопросы курсором порциями и пишет их в
+файл по мере чтения.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Количество строк, проверяемых и записываемых за одну транзакцию
+DEFAULT_CHUNK_SIZE = 1000
+
+FIELDS = ("lab_id", "lab", "question_text", "correct_answer", "points")
+
+INSERT_QUESTION = """
+    INSERT INTO questions (lab_id, question_text, correct_answer, points)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+class RowError(NamedTuple):
+    """Ошибочная строка файла импорта"""
+
+    line: int
+    message: str
+
+
+class TransferProgress(NamedTuple):
+    """Ход импорта или экспорта"""
+
+    rows: int
+    written: int
+    skipped: int
+
+
+class ImportReport(NamedTuple):
+    """Итог импорта"""
+
+    imported: int
+    skipped: int
+    errors: List[RowError]
+
+
+ProgressCallback = Callable[[TransferProgress], None]
+
+
+def file_format(path: str) -> str:
+    """Формат файла по расширению: 'csv' или 'jsonl'"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Неизвестный формат файла банка вопросов: {path}")
+
+
+def read_rows(path: str) -> Iterator[Tuple[int, Any]]:
+    """Строки файла с номерами строк (без загрузки файла целиком)"""
+    if file_format(path) == "csv":
+        # utf-8-sig: файлы, сохраненные из Excel, начинаются с BOM
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_num, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_num, e
+
+
+class LabResolver:
+    """
+    id работ по id или названию из файла; словарь строится один раз
+
+    Работы, созданные в транзакции порции, попадают в словарь только после
+    ее фиксации (commit); при откате порции они забываются (rollback).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, create_labs: bool) -> None:
+        self.conn = conn
+        self.create_labs = create_labs
+        self.ids = set()
+        self.by_name: Dict[str, int] = {}
+        self.created: Dict[str, int] = {}
+        for lab_id, name in conn.execute("SELECT id, name FROM labs"):
+            self.ids.add(lab_id)
+            self.by_name.setdefault(name, lab_id)
+
+    def resolve(self, row: Dict[str, Any]) -> int:
+        # Название переносимо между базами, поэтому важнее id
+        name = str(row.get("lab") or "").strip()
+        if name:
+            if name in self.by_name:
+                return self.by_name[name]
+            if name not in self.created:
+                if not self.create_labs:
+                    raise ValueError(f"Работа {name!r} не найдена")
+                cursor = self.conn.execute(
+                    "INSERT INTO labs (name) VALUES (?)", (name,)
+                )
+                self.created[name] = cursor.lastrowid
+            return self.created[name]
+
+        lab_id = row.get("lab_id")
+        if lab_id in (None, ""):
+            raise ValueError("Не указана работа (lab_id или lab)")
+        try:
+            lab_id = int(lab_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"lab_id не число: {lab_id!r}")
+        if lab_id not in self.ids and lab_id not in self.created.values():
+            raise ValueError(f"Работа {lab_id} не найдена")
+        return lab_id
+
+    def commit(self) -> None:
+        """Порция зафиксирована: созданные в ней работы известны"""
+        self.by_name.update(self.created)
+        self.ids.update(self.created.values())
+        self.created.clear()
+
+    def rollback(self) -> None:
+        """Порция откачена: созданных в ней работ больше нет"""
+        self.created.clear()
+
+
+def validate_row(row: Any, labs: LabResolver) -> Tuple[int, str, str, int]:
+    """Параметры INSERT_QUESTION для строки или ValueError"""
+    if isinstance(row, Exception):
+        raise ValueError(f"Некорректный JSON: {row}")
+    if not isinstance(row, dict):
+        raise ValueError("Строка должна быть объектом")
+    text = str(row.get("question_text") or "").strip()
+    answer = str(row.get("correct_answer") or "").strip()
+    if not text:
+        raise ValueError("Пустой текст вопроса")
+    if not answer:
+        raise ValueError("Пустой правильный ответ")
+    points = row.get("points")
+    if points in (None, ""):
+        points = 1
+    try:
+        points = int(points)
+    except (TypeError, ValueError):
+        raise ValueError(f"points не число: {points!r}")
+    if points < 1:
+        raise ValueError("points должно быть положительным")
+    return labs.resolve(row), text, answer, points
+
+
+def import_questions(
+    conn: sqlite3.Connection,
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    create_labs: bool = False,
+    progress: Optional[ProgressCallback] = None,
+) -> ImportReport:
+    """
+    Импорт вопросов из файла
+
+    Args:
+        conn: Соединение с базой вопросов
+        path: Файл .csv или .jsonl
+        chunk_size: Количество строк в одной транзакции
+        create_labs: Создавать работы, указанные по названию и отсутствующие в базе
+        progress: Функция, получающая TransferProgress после каждой порции
+
+    Returns:
+        Количество импортированных и пропущенных строк и ошибки строк
+    """
+    labs = LabResolver(conn, create_labs)
+    rows = read_rows(path)
+    errors: List[RowError] = []
+    read = imported = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        read += len(chunk)
+        chunk_errors: List[RowError] = []
+        values = []
+        try:
+            with conn:
+                for line, row in chunk:
+                    try:
+                        values.append(validate_row(row, labs))
+                    except ValueError as e:
+                        chunk_errors.append(RowError(line, str(e)))
+                conn.executemany(INSERT_QUESTION, values)
+        except sqlite3.Error as e:
+            # Транзакция порции откачена целиком, включая созданные работы
+            labs.rollback()
+            rejected = {error.line for error in chunk_errors}
+            chunk_errors.extend(
+                RowError(line, f"Ошибка записи порции: {e}")
+                for line, _ in chunk
+                if line not in rejected
+            )
+            chunk_errors.sort()
+        else:
+            labs.commit()
+            imported += len(values)
+        errors.extend(chunk_errors)
+        if progress is not None:
+            progress(TransferProgress(read, imported, len(errors)))
+    return ImportReport(imported, len(errors), errors)
+
+
+def export_questions(
+    conn: sqlite3.Connection,
+    path: str,
+    lab_id: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """
+    Экспорт вопросов в файл
+
+    Args:
+        conn: Соединение с базой вопросов
+        path: Файл .csv или .jsonl
+        lab_id: Экспортировать только вопросы работы
+        chunk_size: Количество строк, читаемых из курсора за раз
+        progress: Функция, получающая TransferProgress после каждой порции
+
+    Returns:
+        Количество экспортированных вопросов
+    """
+    fmt = file_format(path)
+    query = (
+        "SELECT q.lab_id, l.name, q.question_text, q.correct_answer, q.points "
+        "FROM questions q LEFT JOIN labs l ON l.id = q.lab_id"
+    )
+    params: Tuple = ()
+    if lab_id is not None:
+        query += " WHERE q.lab_id = ?"
+        params = (lab_id,)
+    query += " ORDER BY q.id"
+
+    written = 0
+    cursor = conn.execute(query, params)
+    encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+    with open(path, "w", newline="", encoding=encoding) as f:
+        writer = csv.writer(f) if fmt == "csv" else None
+        if writer is not None:
+            writer.writerow(FIELDS)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if writer is not None:
+                writer.writerows(rows)
+            else:
+                f.writelines(
+                    json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+            written += len(rows)
+            if progress is not None:
+                progress(TransferProgress(written, written, 0))
+    return written
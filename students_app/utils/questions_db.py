@@ -1,21 +1,218 @@
 """Модуль для работы с базой данных вопросов"""
 import os
 import sqlite3
-from typing import List, Tuple, Optional, Dict, Any, Union
+import re
+from typing import List, Tuple, Optional, Dict, Any, Union, NamedTuple
 from datetime import datetime
 
+from loguru import logger
+
+from utils import question_bank, question_transfer
+from utils.connection_manager import get_manager
+from utils.question_sampler import QuestionSampler
+
+# Версия банка вопросов работы растет при любом изменении ее вопросов или
+# самой работы, чтобы кеши банка могли проверить актуальность, не читая
+# вопросы (см. utils.question_bank)
+QUESTION_BANK_TRIGGERS = {
+    'questions_bank_insert': """
+        CREATE TRIGGER IF NOT EXISTS questions_bank_insert
+        AFTER INSERT ON questions
+        BEGIN
+            INSERT INTO question_bank_versions (lab_id, version) VALUES (NEW.lab_id, 1)
+            ON CONFLICT (lab_id) DO UPDATE SET version = version + 1;
+        END
+    """,
+    'questions_bank_update': """
+        CREATE TRIGGER IF NOT EXISTS questions_bank_update
+        AFTER UPDATE ON questions
+        BEGIN
+            INSERT INTO question_bank_versions (lab_id, version) VALUES (OLD.lab_id, 1)
+            ON CONFLICT (lab_id) DO UPDATE SET version = version + 1;
+            INSERT INTO question_bank_versions (lab_id, version)
+            SELECT NEW.lab_id, 1 WHERE NEW.lab_id IS NOT OLD.lab_id
+            ON CONFLICT (lab_id) DO UPDATE SET version = version + 1;
+        END
+    """,
+    'questions_bank_delete': """
+        CREATE TRIGGER IF NOT EXISTS questions_bank_delete
+        AFTER DELETE ON questions
+        BEGIN
+            INSERT INTO question_bank_versions (lab_id, version) VALUES (OLD.lab_id, 1)
+            ON CONFLICT (lab_id) DO UPDATE SET version = version + 1;
+        END
+    """,
+    'labs_bank_insert': """
+        CREATE TRIGGER IF NOT EXISTS labs_bank_insert
+        AFTER INSERT ON labs
+        BEGIN
+            INSERT INTO question_bank_versions (lab_id, version) VALUES (NEW.id, 1)
+            ON CONFLICT (lab_id) DO UPDATE SET version = version + 1;
+        END
+    """,
+    'labs_bank_update': """
+        CREATE TRIGGER IF NOT EXISTS labs_bank_update
+        AFTER UPDATE ON labs
+        BEGIN
+            INSERT INTO question_bank_versions (lab_id, version) VALUES (NEW.id, 1)
+            ON CONFLICT (lab_id) DO UPDATE SET version = version + 1;
+        END
+    """,
+    'labs_bank_delete': """
+        CREATE TRIGGER IF NOT EXISTS labs_bank_delete
+        AFTER DELETE ON labs
+        BEGIN
+            INSERT INTO question_bank_versions (lab_id, version) VALUES (OLD.id, 1)
+            ON CONFLICT (lab_id) DO UPDATE SET version = version + 1;
+        END
+    """,
+}
+
+# Полнотекстовый индекс вопросов (FTS5 с внешним содержимым: текст хранится
+# только в questions, индекс обновляют триггеры)
+QUESTIONS_FTS = """
+    CREATE VIRTUAL TABLE questions_fts USING fts5(
+        question_text, correct_answer,
+        content='questions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+QUESTIONS_FTS_TRIGGERS = {
+    'questions_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS questions_fts_insert
+        AFTER INSERT ON questions
+        BEGIN
+            INSERT INTO questions_fts (rowid, question_text, correct_answer)
+            VALUES (NEW.id, NEW.question_text, NEW.correct_answer);
+        END
+    """,
+    'questions_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS questions_fts_update
+        AFTER UPDATE OF question_text, correct_answer ON questions
+        BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, question_text, correct_answer)
+            VALUES ('delete', OLD.id, OLD.question_text, OLD.correct_answer);
+            INSERT INTO questions_fts (rowid, question_text, correct_answer)
+            VALUES (NEW.id, NEW.question_text, NEW.correct_answer);
+        END
+    """,
+    'questions_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS questions_fts_delete
+        AFTER DELETE ON questions
+        BEGIN
+            INSERT INTO questions_fts (questions_fts, rowid, question_text, correct_answer)
+            VALUES ('delete', OLD.id, OLD.question_text, OLD.correct_answer);
+        END
+    """,
+}
+
+# Текст вопроса при ранжировании весит больше правильного ответа
+SEARCH_WEIGHTS = (2.0, 1.0)
+
+
+def fts_query(text: str) -> str:
+    """
+    Запрос FTS5 из произвольного текста
+
+    Каждое слово ищется как префикс (учитывает окончания), все слова
+    обязательны; операторы FTS5 во вводе не интерпретируются.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+# Итоги попытки (test_results.total_points и correct_answers) меняются
+# вместе с ее ответами, поэтому чтение истории не агрегирует test_answers
+_CORRECT = """
+    IFNULL((SELECT q.correct_answer = {row}.answer
+            FROM questions q WHERE q.id = {row}.question_id), 0)
+"""
+TEST_ANSWER_TRIGGERS = {
+    'test_answers_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS test_answers_insert
+        AFTER INSERT ON test_answers
+        BEGIN
+            UPDATE test_results
+            SET total_points = total_points + IFNULL(NEW.points_earned, 0),
+                correct_answers = correct_answers + {_CORRECT.format(row='NEW')}
+            WHERE id = NEW.result_id;
+        END
+    """,
+    'test_answers_update': f"""
+        CREATE TRIGGER IF NOT EXISTS test_answers_update
+        AFTER UPDATE ON test_answers
+        BEGIN
+            UPDATE test_results
+            SET total_points = total_points - IFNULL(OLD.points_earned, 0),
+                correct_answers = correct_answers - {_CORRECT.format(row='OLD')}
+            WHERE id = OLD.result_id;
+            UPDATE test_results
+            SET total_points = total_points + IFNULL(NEW.points_earned, 0),
+                correct_answers = correct_answers + {_CORRECT.format(row='NEW')}
+            WHERE id = NEW.result_id;
+        END
+    """,
+    'test_answers_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS test_answers_delete
+        AFTER DELETE ON test_answers
+        BEGIN
+            UPDATE test_results
+            SET total_points = total_points - IFNULL(OLD.points_earned, 0),
+                correct_answers = correct_answers - {_CORRECT.format(row='OLD')}
+            WHERE id = OLD.result_id;
+        END
+    """,
+}
+
+# Сохранение ответа: при повторном ответе строка обновляется (а не
+# заменяется, как в INSERT OR REPLACE), чтобы сработал триггер обновления
+UPSERT_ANSWER = """
+    INSERT INTO test_answers (result_id, question_id, answer, points_earned)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (result_id, question_id) DO UPDATE
+    SET answer = excluded.answer, points_earned = excluded.points_earned
+"""
+
+
+class ScoreDrift(NamedTuple):
+    """Расхождение сохраненных итогов попытки с ее ответами"""
+    result_id: int
+    stored_points: int
+    actual_points: int
+    stored_correct: int
+    actual_correct: int
+
+
+def attempt_score(correct_answers: int) -> int:
+    """Итоговый балл попытки по количеству правильных ответов"""
+    return int(correct_answers * 100 / 10)  # 10 вопросов максимум
+
+
 class QuestionsDB:
     TEST_DURATION: int = 20  # Длительность теста в минутах
 
     def __init__(self, db_path: str = 'questions.db') -> None:
         self.db_path = db_path
+        self.connections = get_manager(db_path)
+        self.bank_cache = question_bank.get_cache(db_path)
+        # Банки выборки строятся по общему кешу банка вопросов, поэтому
+        # собственный кеш выборки у экземпляра обходится дешево
+        self.sampler = QuestionSampler(self._load_bank)
         self.init_db()
         # Добавляем тестовые данные, если база пустая
         self.init_test_data()
 
     def get_connection(self) -> sqlite3.Connection:
-        """Получение соединения с базой данных"""
-        return sqlite3.connect(self.db_path)
+        """Соединение текущего потока с базой данных"""
+        return self.connections.get()
+
+    def close(self) -> None:
+        """
+        Закрытие соединения текущего потока
+
+        Другие потоки продолжают работать со своими соединениями, а другие
+        объекты того же файла в этом потоке при следующем запросе получат новое
+        """
+        self.connections.close_thread()
 
     def init_db(self) -> None:
         """Инициализация базы данных"""
@@ -49,10 +246,31 @@ class QuestionsDB:
                     question_text TEXT NOT NULL,
                     correct_answer TEXT NOT NULL,
                     points INTEGER DEFAULT 1,
+                    image_path TEXT,
                     FOREIGN KEY (lab_id) REFERENCES labs(id)
                 )
             ''')
 
+            # Изображения вопросов (есть и в прежней схеме utils/db_manager.py)
+            cursor.execute('PRAGMA table_info(questions)')
+            if 'image_path' not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute('ALTER TABLE questions ADD COLUMN image_path TEXT')
+
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_questions_lab_id ON questions (lab_id, id)'
+            )
+
+            # Версии банков вопросов по работам
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS question_bank_versions (
+                    lab_id INTEGER PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            ''')
+            for trigger in QUESTION_BANK_TRIGGERS.values():
+                cursor.execute(trigger)
+            self.fts_enabled = self._init_search(cursor)
+
             # Таблица результатов тестирования
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS test_results (
@@ -62,11 +280,24 @@ class QuestionsDB:
                     start_time TEXT,
                     end_time TEXT,
                     points INTEGER DEFAULT 0,
+                    total_points INTEGER NOT NULL DEFAULT 0,
+                    correct_answers INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (student_id) REFERENCES students(id),
                     FOREIGN KEY (lab_id) REFERENCES labs(id)
                 )
             ''')
 
+            # В базах, созданных до появления итогов, они добавляются и
+            # заполняются по уже сохраненным ответам
+            cursor.execute('PRAGMA table_info(test_results)')
+            columns = {row[1] for row in cursor.fetchall()}
+            backfill = 'total_points' not in columns
+            for column in ('total_points', 'correct_answers'):
+                if column not in columns:
+                    cursor.execute(
+                        f'ALTER TABLE test_results ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0'
+                    )
+
             # Таблица ответов на тест
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS test_answers (
@@ -79,9 +310,35 @@ class QuestionsDB:
                     PRIMARY KEY (result_id, question_id)
                 )
             ''')
+            for trigger in TEST_ANSWER_TRIGGERS.values():
+                cursor.execute(trigger)
+            if backfill:
+                self._repair_scores(cursor, self._score_drift(cursor))
 
             conn.commit()
 
+    def _init_search(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Создание полнотекстового индекса вопросов
+
+        Returns:
+            False, если SQLite собран без FTS5 (поиск выполняется через LIKE)
+        """
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions_fts'"
+        )
+        if cursor.fetchone() is None:
+            try:
+                cursor.execute(QUESTIONS_FTS)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Полнотекстовый поиск недоступен: {e}")
+                return False
+            # Индекс для уже сохраненных вопросов
+            cursor.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+        for trigger in QUESTIONS_FTS_TRIGGERS.values():
+            cursor.execute(trigger)
+        return True
+
     def init_test_data(self) -> None:
         """Инициализация тестовых данных"""
         with self.get_connection() as conn:
@@ -99,19 +356,33 @@ class QuestionsDB:
                 cursor.executemany('INSERT INTO labs (name, description) VALUES (?, ?)', labs)
                 conn.commit()
 
-    def get_random_questions(self, lab_id: int, count: int = 10) -> List[Tuple[int, str, int]]:
-        """Получение случайных вопросов для теста"""
-        query = """
-            SELECT id, question_text, points
-            FROM questions
-            WHERE lab_id = ?
-            ORDER BY RANDOM()
-            LIMIT ?
+    def _load_bank(self, lab_id: int) -> Tuple[int, List[Tuple[int, int]]]:
+        """Версия банка и вопросы работы (id, баллы) для кеша выборки"""
+        bank = self.bank_cache.get()
+        return bank.versions.get(lab_id, 0), [
+            (question_id, bank.questions[question_id].points)
+            for question_id in bank.by_lab.get(lab_id, ())
+        ]
+
+    def get_random_questions(self, lab_id: int, count: int = 10,
+                             seed: Optional[int] = None,
+                             strata: Optional[Dict[int, int]] = None
+                             ) -> List[Tuple[int, str, int]]:
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, (lab_id, count))
-            return cursor.fetchall()
+        Получение случайных вопросов для теста
+
+        Args:
+            lab_id: id лабораторной работы
+            count: Количество вопросов
+            seed: Зерно выборки (см. utils.question_sampler.attempt_seed); с
+                тем же зерном и неизменным банком выборка повторяется
+            strata: Количество вопросов по стоимости в баллах, например
+                {1: 6, 2: 3, 3: 1}; count при этом не используется
+        """
+        bank = self.bank_cache.get()
+        ids = self.sampler.sample(lab_id, count, seed, strata, bank.versions.get(lab_id, 0))
+        questions = (bank.questions.get(question_id) for question_id in ids)
+        return [(q.id, q.question_text, q.points) for q in questions if q is not None]
 
     def start_test(self, student_id: int, lab_id: int) -> int:
         """Начало тестирования"""
@@ -128,56 +399,139 @@ class QuestionsDB:
 
     def submit_answer(self, result_id: int, question_id: int, answer: str) -> None:
         """Сохранение ответа на вопрос"""
-        query = """
-            INSERT OR REPLACE INTO test_answers
-            (result_id, question_id, answer, points_earned)
-            VALUES (?, ?, ?, ?)
-        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT points FROM questions WHERE id = ?', (question_id,))
             points = cursor.fetchone()[0]
-            cursor.execute(query, (result_id, question_id, answer, points))
+            cursor.execute(UPSERT_ANSWER, (result_id, question_id, answer, points))
+
+    def submit_answers(self, result_id: int,
+                       answers: Union[Dict[int, str], List[Tuple[int, str]]]) -> int:
+        """
+        Сохранение всех ответов попытки и завершение тестирования
+
+        Баллы вопросов читаются одним запросом, ответы записываются через
+        executemany, итог подсчитывается в той же транзакции.
+
+        Args:
+            result_id: id попытки (test_results)
+            answers: Ответы по id вопроса или пары (id вопроса, ответ)
+
+        Returns:
+            Итоговое количество баллов (как в finish_test)
+
+        Raises:
+            ValueError: Если вопроса с указанным id нет в базе
+        """
+        items = list(answers.items() if isinstance(answers, dict) else answers)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            points: Dict[int, int] = {}
+            if items:
+                question_ids = list({question_id for question_id, _ in items})
+                placeholders = ', '.join('?' * len(question_ids))
+                cursor.execute(
+                    f'SELECT id, points FROM questions WHERE id IN ({placeholders})',
+                    question_ids,
+                )
+                points = dict(cursor.fetchall())
+                missing = sorted(set(question_ids) - points.keys())
+                if missing:
+                    raise ValueError(f"Вопросы не найдены: {missing}")
+                cursor.executemany(UPSERT_ANSWER, [
+                    (result_id, question_id, answer, points[question_id])
+                    for question_id, answer in items
+                ])
+            return self._finish(cursor, result_id)
 
     def finish_test(self, result_id: int) -> int:
         """Завершение тестирования"""
+        with self.get_connection() as conn:
+            return self._finish(conn.cursor(), result_id)
+
+    def _finish(self, cursor: sqlite3.Cursor, result_id: int) -> int:
+        """Запись времени окончания и итоговых баллов попытки"""
         query = """
             UPDATE test_results
             SET end_time = ?
             WHERE id = ?
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            end_time = datetime.now().isoformat()
-            cursor.execute(query, (end_time, result_id))
+        end_time = datetime.now().isoformat()
+        cursor.execute(query, (end_time, result_id))
 
-            # Подсчитываем количество правильных ответов
-            query = """
-                SELECT COUNT(*)
+        # Количество правильных ответов хранится в попытке
+        cursor.execute('SELECT correct_answers FROM test_results WHERE id = ?', (result_id,))
+        row = cursor.fetchone()
+        correct_answers = row[0] if row else 0
+
+        # Обновляем количество баллов
+        query = """
+            UPDATE test_results
+            SET points = ?
+            WHERE id = ?
+        """
+        points = attempt_score(correct_answers)
+        cursor.execute(query, (points, result_id))
+        return points
+
+    def _score_drift(self, cursor: sqlite3.Cursor) -> List[ScoreDrift]:
+        """Попытки, итоги которых не совпадают с их ответами"""
+        cursor.execute("""
+            SELECT tr.id, tr.total_points, IFNULL(a.total_points, 0),
+                   tr.correct_answers, IFNULL(a.correct_answers, 0)
+            FROM test_results tr
+            LEFT JOIN (
+                SELECT ta.result_id,
+                       SUM(IFNULL(ta.points_earned, 0)) AS total_points,
+                       SUM(IFNULL(ta.answer = q.correct_answer, 0)) AS correct_answers
                 FROM test_answers ta
-                JOIN questions q ON ta.question_id = q.id
-                WHERE ta.result_id = ? AND ta.answer = q.correct_answer
-            """
-            cursor.execute(query, (result_id,))
-            correct_answers = cursor.fetchone()[0]
+                LEFT JOIN questions q ON q.id = ta.question_id
+                GROUP BY ta.result_id
+            ) a ON a.result_id = tr.id
+            WHERE tr.total_points != IFNULL(a.total_points, 0)
+               OR tr.correct_answers != IFNULL(a.correct_answers, 0)
+            ORDER BY tr.id
+        """)
+        return [ScoreDrift(*row) for row in cursor.fetchall()]
+
+    def _repair_scores(self, cursor: sqlite3.Cursor, drift: List[ScoreDrift]) -> None:
+        """Запись пересчитанных итогов; балл завершенных попыток тоже обновляется"""
+        cursor.executemany("""
+            UPDATE test_results
+            SET total_points = ?, correct_answers = ?,
+                points = CASE WHEN end_time IS NULL THEN points ELSE ? END
+            WHERE id = ?
+        """, [
+            (item.actual_points, item.actual_correct,
+             attempt_score(item.actual_correct), item.result_id)
+            for item in drift
+        ])
 
-            # Обновляем количество баллов
-            query = """
-                UPDATE test_results
-                SET points = ?
-                WHERE id = ?
-            """
-            points = int(correct_answers * 100 / 10)  # 10 вопросов максимум
-            cursor.execute(query, (points, result_id))
-            return points
+    def check_scores(self, repair: bool = False) -> List[ScoreDrift]:
+        """
+        Проверка итогов попыток по сохраненным ответам
+
+        Итоги расходятся с ответами, например, после изменения правильного
+        ответа вопроса или правки test_answers в обход триггеров.
+
+        Args:
+            repair: Записать пересчитанные итоги
+
+        Returns:
+            Найденные расхождения (до исправления)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            drift = self._score_drift(cursor)
+            if repair and drift:
+                self._repair_scores(cursor, drift)
+            return drift
 
     def get_test_results(self, student_id: int, lab_id: Optional[int] = None) -> List[Tuple[int, int, str, str, str, int]]:
         """Получение результатов тестирования"""
         query = """
             SELECT tr.id, tr.student_id, l.name, tr.start_time, tr.end_time,
-                   COALESCE((SELECT SUM(points_earned)
-                            FROM test_answers ta
-                            WHERE ta.result_id = tr.id), 0) as total_points
+                   tr.total_points
             FROM test_results tr
             JOIN labs l ON tr.lab_id = l.id
             WHERE tr.student_id = ?
@@ -197,31 +551,125 @@ class QuestionsDB:
 
     def get_detailed_results(self, result_id: int) -> List[Dict[str, Any]]:
         """Получить детальные результаты теста"""
+        # Тексты вопросов и правильные ответы берутся из кеша банка
+        questions = self.bank_cache.get().questions
         with self.get_connection() as conn:
             cursor = conn.cursor()
             query = """
-                SELECT q.question_text, ta.answer, q.correct_answer, ta.points_earned
-                FROM test_answers ta
-                JOIN questions q ON ta.question_id = q.id
-                WHERE ta.result_id = ?
+                SELECT question_id, answer, points_earned
+                FROM test_answers
+                WHERE result_id = ?
             """
             cursor.execute(query, (result_id,))
             results = []
-            for row in cursor.fetchall():
+            for question_id, answer, points in cursor.fetchall():
+                question = questions.get(question_id)
+                if question is None:
+                    continue
                 results.append({
-                    'question': row[0],
-                    'student_answer': row[1],
-                    'correct_answer': row[2],
-                    'points': row[3]
+                    'question': question.question_text,
+                    'student_answer': answer,
+                    'correct_answer': question.correct_answer,
+                    'points': points
                 })
             return results
 
-    def get_all_labs(self) -> List[Tuple[int, str, str]]:
-        """Получить список всех лабораторных работ"""
+    def search_questions(self, query: str, lab_id: Optional[int] = None,
+                         limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Поиск вопросов по словам в тексте вопроса и правильном ответе
+
+        Args:
+            query: Искомые слова (все обязательны, ищутся как начала слов)
+            lab_id: Искать только в вопросах работы
+            limit: Максимальное количество результатов
+
+        Returns:
+            Вопросы по убыванию релевантности: id, lab_id, question_text,
+            correct_answer, points, rank (меньше - релевантнее) и snippet
+            (фрагмент с найденными словами в [квадратных скобках])
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        if not self.fts_enabled:
+            return self._search_like(re.findall(r'\w+', query), lab_id, limit)
+
+        sql = f"""
+            SELECT q.id, q.lab_id, q.question_text, q.correct_answer, q.points,
+                   bm25(questions_fts, {', '.join(map(str, SEARCH_WEIGHTS))}) AS rank,
+                   snippet(questions_fts, -1, '[', ']', '…', 12)
+            FROM questions_fts
+            JOIN questions q ON q.id = questions_fts.rowid
+            WHERE questions_fts MATCH ?
+        """
+        params: List[Union[int, str]] = [match]
+        if lab_id is not None:
+            sql += " AND q.lab_id = ?"
+            params.append(lab_id)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT id, name, description FROM labs ORDER BY id')
-            return cursor.fetchall()
+            cursor.execute(sql, params)
+            return [self._search_result(row) for row in cursor.fetchall()]
+
+    def _search_like(self, words: List[str], lab_id: Optional[int],
+                     limit: int) -> List[Dict[str, Any]]:
+        """Поиск без FTS5: полный просмотр с LIKE, без ранжирования"""
+        conditions = ['(question_text LIKE ? OR correct_answer LIKE ?)'] * len(words)
+        params: List[Union[int, str]] = []
+        for word in words:
+            params += [f'%{word}%', f'%{word}%']
+        if lab_id is not None:
+            conditions.append('lab_id = ?')
+            params.append(lab_id)
+        params.append(limit)
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT id, lab_id, question_text, correct_answer, points, NULL, question_text '
+                f'FROM questions WHERE {" AND ".join(conditions)} ORDER BY id LIMIT ?',
+                params,
+            )
+            return [self._search_result(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _search_result(row: Tuple) -> Dict[str, Any]:
+        """Строка результата поиска в виде словаря"""
+        keys = ('id', 'lab_id', 'question_text', 'correct_answer', 'points', 'rank', 'snippet')
+        return dict(zip(keys, row))
+
+    def import_questions(self, path: str,
+                         chunk_size: int = question_transfer.DEFAULT_CHUNK_SIZE,
+                         create_labs: bool = False,
+                         progress: Optional[question_transfer.ProgressCallback] = None
+                         ) -> question_transfer.ImportReport:
+        """Импорт банка вопросов из CSV или JSON Lines (см. utils.question_transfer)"""
+        return question_transfer.import_questions(
+            self.get_connection(), path, chunk_size, create_labs, progress
+        )
+
+    def export_questions(self, path: str, lab_id: Optional[int] = None,
+                         progress: Optional[question_transfer.ProgressCallback] = None
+                         ) -> int:
+        """Экспорт банка вопросов в CSV или JSON Lines (см. utils.question_transfer)"""
+        return question_transfer.export_questions(
+            self.get_connection(), path, lab_id, progress=progress
+        )
+
+    def get_question_images(self, question_ids: List[int]) -> List[Optional[str]]:
+        """Пути к изображениям вопросов в порядке question_ids (None - без изображения)"""
+        questions = self.bank_cache.get().questions
+        return [
+            questions[question_id].image_path if question_id in questions else None
+            for question_id in question_ids
+        ]
+
+    def get_all_labs(self) -> List[Tuple[int, str, str]]:
+        """Получить список всех лабораторных работ"""
+        return list(self.bank_cache.get().labs)
 
     def _has_data(self) -> bool:
         """Проверка наличия данных в базе"""
@@ -259,4 +707,8 @@ class QuestionsDB:
     def __del__(self) -> None:
         """Очистка тестовой базы данных при завершении"""
         if os.path.exists(self.db_path) and self.db_path == 'test.db':
-            os.remove(self.db_path)
+            self.close()
+            # Вместе с базой удаляются файлы журнала WAL
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
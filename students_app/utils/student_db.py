@@ -6,17 +6,35 @@ import sqlite3
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Union
 
+from utils.connection_manager import get_manager
+
 
 class StudentDB:
     def __init__(self, db_path: str = "students.db"):
         self.db_path = db_path
+        self.connections = get_manager(db_path)
         self.init_db()
 
+    def get_connection(self) -> sqlite3.Connection:
+        """Соединение текущего потока с базой данных"""
+        return self.connections.get()
+
+    def close(self) -> None:
+        """
+        Закрытие соединения текущего потока
+
+        Другие потоки продолжают работать со своими соединениями, а другие
+        объекты того же файла в этом потоке при следующем запросе получат новое
+        """
+        self.connections.close_thread()
+
     def init_db(self) -> None:
         """Инициализация базы данных студентов"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.get_connection() as conn:
+            self._create_tables(conn.cursor())
 
+    def _create_tables(self, cursor: sqlite3.Cursor) -> None:
+        """Создание таблиц"""
         # Создаем таблицу групп
         cursor.execute(
             """
@@ -68,9 +86,6 @@ class StudentDB:
         """
         )
 
-        conn.commit()
-        conn.close()
-
     def get_current_semester(self) -> str:
         """Определение текущего семестра на основе даты"""
         current_month = datetime.now().month
@@ -107,9 +122,8 @@ class StudentDB:
         self, first_name: str, last_name: str, group_name: str
     ) -> Optional[Tuple[int, str]]:
         """Поиск студента в базе данных"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(
                 """
                 SELECT id, group_id FROM students
@@ -125,61 +139,57 @@ class StudentDB:
                 if group_result:
                     return student_id, group_result[0]
             return None
-        finally:
-            conn.close()
 
     def add_student(
         self, first_name: str, last_name: str, group_name: str
     ) -> Union[int, None]:
         """Добавление нового студента"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            # Получаем ID группы
-            cursor.execute("SELECT id FROM groups WHERE name = ?", (group_name,))
-            group_id = cursor.fetchone()
-
-            if not group_id:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Получаем ID группы
+                cursor.execute("SELECT id FROM groups WHERE name = ?", (group_name,))
+                group_id = cursor.fetchone()
+
+                if not group_id:
+                    return None
+
+                # Добавляем студента
+                cursor.execute(
+                    """
+                    INSERT INTO students (first_name, last_name, group_id)
+                    VALUES (?, ?, ?)
+                """,
+                    (first_name, last_name, group_id[0]),
+                )
+
+                conn.commit()
+                return cursor.lastrowid
+
+            except sqlite3.Error:
+                conn.rollback()
                 return None
 
-            # Добавляем студента
-            cursor.execute(
-                """
-                INSERT INTO students (first_name, last_name, group_id)
-                VALUES (?, ?, ?)
-            """,
-                (first_name, last_name, group_id[0]),
-            )
-
-            conn.commit()
-            return cursor.lastrowid
-
-        except sqlite3.Error:
-            return None
-        finally:
-            conn.close()
-
     def update_student_group(self, student_id: int, new_group: str) -> bool:
         """Обновление группы студента"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                """
-                UPDATE students
-                SET group_id = (SELECT id FROM groups WHERE name = ?)
-                WHERE id = ?
-            """,
-                (new_group, student_id),
-            )
-
-            conn.commit()
-            return cursor.rowcount > 0
-
-        except sqlite3.Error:
-            return False
-        finally:
-            conn.close()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    """
+                    UPDATE students
+                    SET group_id = (SELECT id FROM groups WHERE name = ?)
+                    WHERE id = ?
+                """,
+                    (new_group, student_id),
+                )
+
+                conn.commit()
+                return cursor.rowcount > 0
+
+            except sqlite3.Error:
+                conn.rollback()
+                return False
 
     def check_and_update_semester(
         self, student_id: int, current_group: str
@@ -195,9 +205,8 @@ class StudentDB:
 
     def get_group_statistics(self, group_name: str) -> Tuple[int, float]:
         """Получение статистики по группе"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(
                 """
                 SELECT COUNT(*) as total_students,
@@ -208,8 +217,6 @@ class StudentDB:
                 (group_name,),
             )
             return cursor.fetchone()
-        finally:
-            conn.close()
 
     def validate_student_name(self, name: str) -> bool:
         """Валидация имени/фамилии студента"""
@@ -222,9 +229,8 @@ class StudentDB:
 
     def get_student_history(self, student_id: int) -> List[Dict[str, Union[str, int]]]:
         """Получение истории посещений студента"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(
                 """
                 SELECT g.name, g.semester
@@ -241,5 +247,3 @@ class StudentDB:
                 history.append({"group": group_name, "semester": semester})
 
             return history
-        finally:
-            conn.close()